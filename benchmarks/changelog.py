@@ -0,0 +1,54 @@
+# Compare the time needed to load a large changelog, look up a section by
+# version, add a new section at the top, and write the changelog back out,
+# with sections parsed eagerly (the old behavior, emulated by accessing every
+# section after loading) versus lazily by line offset.
+#
+# Run from the root of the pyrepo repository:
+#
+#     python benchmarks/changelog.py [-n N] [-s SECTIONS]
+
+from io import StringIO
+import time
+import click
+from pyrepo.changelog import Changelog, ChangelogSection
+
+
+def make_changelog(sections):
+    chunks = []
+    for i in range(sections, 0, -1):
+        header = f"v{i // 100}.{i % 100}.0 (2020-01-01)"
+        chunks.append(
+            f"{header}\n{'-' * len(header)}\n"
+            f"- Fixed bug #{i}\n- Added feature #{i}\n\n    Details of #{i}\n"
+        )
+    return "\n\n".join(chunks)
+
+
+def run(text, eager):
+    start = time.perf_counter()
+    chlog = Changelog.load(StringIO(text))
+    if eager:
+        list(chlog.sections)
+    chlog.get("v0.50.0")
+    chlog.insert(
+        0, ChangelogSection(version="v99.0.0", date="in development", content="")
+    )
+    out = StringIO()
+    chlog.save(out)
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("-n", "--number", type=int, default=20, show_default=True)
+@click.option("-s", "--sections", type=int, default=5000, show_default=True)
+def main(number, sections):
+    text = make_changelog(sections)
+    eager = min(run(text, True) for _ in range(number))
+    lazy = min(run(text, False) for _ in range(number))
+    click.echo(f"Changelog with {sections} sections ({len(text)} bytes):")
+    click.echo(f"Eager parse:  {eager * 1000:8.2f} ms")
+    click.echo(f"Lazy parse:   {lazy * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
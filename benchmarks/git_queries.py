@@ -0,0 +1,77 @@
+# Compare looking up the commits behind many tags by forking `git show` once
+# per tag versus querying a single persistent `git cat-file --batch` process
+# via `GitRepo`.
+#
+# Run from the root of the pyrepo repository:
+#
+#     python benchmarks/git_queries.py [--tags N]
+
+from pathlib import Path
+import subprocess
+from tempfile import TemporaryDirectory
+import time
+import click
+from pyrepo.gitrepo import GitRepo
+
+
+def git(dirpath: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=str(dirpath),
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+
+def make_repo(dirpath: Path, tags: int) -> None:
+    dirpath.mkdir()
+    git(dirpath, "init", "-q")
+    git(dirpath, "config", "user.name", "bench")
+    git(dirpath, "config", "user.email", "bench@example.com")
+    for i in range(tags):
+        git(
+            dirpath,
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            f"Version 0.{i}.0\n\n- Change number {i}\n",
+        )
+        git(dirpath, "tag", "-a", "-m", f"Version 0.{i}.0", f"v0.{i}.0")
+    git(dirpath, "pack-refs", "--all")
+
+
+@click.command()
+@click.option("--tags", type=int, default=300, show_default=True)
+def main(tags):
+    with TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir, "repo")
+        make_repo(dirpath, tags)
+        names = [f"v0.{i}.0" for i in range(tags)]
+
+        start = time.perf_counter()
+        forked = []
+        for name in names:
+            subject, _, body = git(
+                dirpath, "show", "-s", "--format=%s%x00%b", name + "^{commit}"
+            ).partition("\0")
+            forked.append((subject, body.strip()))
+        t_fork = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with GitRepo(dirpath) as repo:
+            batched = []
+            for name in names:
+                info = repo.commit_info(name)
+                batched.append((info.subject, info.body.strip()))
+        t_batch = time.perf_counter() - start
+
+        assert forked == batched
+        click.echo(f"{tags} tags")
+        click.echo(f"git show per tag:      {t_fork * 1000:8.1f} ms")
+        click.echo(f"git cat-file --batch:  {t_batch * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Measure the wall-clock time of `inspect_project()` (without its cache) on a
+# synthetic project with a large src/ tree.
+#
+# Run from the root of the pyrepo repository:
+#
+#     python benchmarks/inspect_project.py [--packages N] [--modules N]
+
+from pathlib import Path
+from shutil import copytree
+import subprocess
+from tempfile import TemporaryDirectory
+import timeit
+import click
+from pyrepo import inspecting
+
+TEMPLATE_PROJECT = (
+    Path(__file__).parent.parent / "test" / "data" / "inspect_project" / "has-pypi"
+)
+
+MODULE_SRC = '''\
+"""A module without any doctests"""
+
+def func{i}(x):
+    """Return ``x`` plus {i}"""
+    return x + {i}
+
+'''
+
+
+def make_project(dirpath: Path, packages: int, modules: int) -> None:
+    copytree(TEMPLATE_PROJECT, dirpath)
+    srcdir = dirpath / "src"
+    for p in range(packages):
+        pkgdir = srcdir / f"vendored{p}"
+        pkgdir.mkdir()
+        (pkgdir / "__init__.py").touch()
+        for m in range(modules):
+            (pkgdir / f"mod{m}.py").write_text(MODULE_SRC * 50)
+    for args in [
+        ["git", "init", "-q"],
+        ["git", "checkout", "-q", "-b", "main"],
+        ["git", "add", "-A"],
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "-q",
+            "-m",
+            "Initial commit",
+        ],
+    ]:
+        subprocess.run(args, cwd=dirpath, check=True)
+
+
+@click.command()
+@click.option("--packages", type=int, default=50, show_default=True)
+@click.option("--modules", type=int, default=40, show_default=True)
+@click.option("-n", "--number", type=int, default=10, show_default=True)
+def main(packages, modules, number):
+    with TemporaryDirectory() as tmpdir:
+        dirpath = Path(tmpdir, "project")
+        make_project(dirpath, packages, modules)
+        click.echo(f"src/ tree: {packages * modules} modules")
+        # Warm the OS's file cache first:
+        inspecting.inspect_project(dirpath)
+        t = timeit.timeit(lambda: inspecting.inspect_project(dirpath), number=number)
+        click.echo(f"{t / number * 1000:.1f} ms per call")
+
+
+if __name__ == "__main__":
+    main()
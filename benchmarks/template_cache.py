@@ -0,0 +1,71 @@
+# Compare the time needed to load all of pyrepo's templates in a fresh Jinja2
+# environment without a bytecode cache, with an empty (cold) cache, with a
+# populated (warm) cache, and from a precompiled template bundle.
+#
+# Run from the root of the pyrepo repository:
+#
+#     python benchmarks/template_cache.py [-n N]
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+import click
+from jinja2 import Environment, PackageLoader
+import pyrepo
+from pyrepo.template_bundle import (
+    BUNDLE_DIRNAME,
+    TEMPLATE_OPTIONS,
+    build_bundle,
+    load_bundle,
+)
+from pyrepo.template_cache import TemplateBytecodeCache
+from pyrepo.util import get_jinja_env
+
+
+def load_all(cache_dir, loader=None):
+    env = Environment(
+        loader=loader or PackageLoader("pyrepo", "templates"),
+        bytecode_cache=(
+            TemplateBytecodeCache(cache_dir) if cache_dir is not None else None
+        ),
+        **TEMPLATE_OPTIONS,
+    )
+    env.filters.update(get_jinja_env().filters)
+    start = time.perf_counter()
+    for name in env.list_templates():
+        env.get_template(name)
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("-n", "--number", type=int, default=20, show_default=True)
+def main(number):
+    with TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        uncached = min(load_all(None) for _ in range(number))
+        cold = 0.0
+        for _ in range(number):
+            TemplateBytecodeCache(cache_dir).clear()
+            cold += load_all(cache_dir)
+        warm = min(load_all(cache_dir) for _ in range(number))
+        pkgdir = Path(tmpdir, "pkg")
+        build_bundle(
+            Path(pyrepo.__file__).with_name("templates"),
+            pkgdir / BUNDLE_DIRNAME,
+            pyrepo.__version__,
+        )
+        # Import the compiled modules once so that Python's own bytecode is
+        # written, as an installer would do:
+        load_all(None, load_bundle(pyrepo.__version__, pkgdir))
+        bundled = min(
+            load_all(None, load_bundle(pyrepo.__version__, pkgdir))
+            for _ in range(number)
+        )
+        click.echo(f"no cache:   {uncached * 1000:7.1f} ms")
+        click.echo(f"cold cache: {cold / number * 1000:7.1f} ms")
+        click.echo(f"warm cache: {warm * 1000:7.1f} ms")
+        click.echo(f"bundle:     {bundled * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
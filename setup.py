@@ -1,3 +1,32 @@
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
-setup()
+SRC_DIR = Path(__file__).parent / "src" / "pyrepo"
+
+
+class BuildPyWithTemplates(build_py):
+    """Also precompile the templates into a bundle inside the build"""
+
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        # Load the bundle module by path, as pyrepo's dependencies may not be
+        # installed at build time
+        spec = spec_from_file_location(
+            "_pyrepo_template_bundle", SRC_DIR / "template_bundle.py"
+        )
+        bundle = module_from_spec(spec)
+        spec.loader.exec_module(bundle)
+        target = Path(self.build_lib, "pyrepo", bundle.BUNDLE_DIRNAME)
+        bundle.build_bundle(
+            SRC_DIR / "templates",
+            target,
+            self.distribution.get_version(),
+            log_function=self.announce,
+        )
+
+
+setup(cmdclass={"build_py": BuildPyWithTemplates})
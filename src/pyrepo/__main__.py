@@ -1,15 +1,51 @@
 from importlib import import_module
 import logging
 import os
-from pathlib import Path
 import click
 from click_loglevel import LogLevel
 import colorlog
 from . import __version__
 from .config import DEFAULT_CFG, configure
 
+#: Mapping from subcommand names to the names of the modules in
+#: `pyrepo.commands` that define them.  Each such module must define a Click
+#: command named `cli`.
+COMMANDS = {
+    "add-ci-testenv": "add_ci_testenv",
+    "add-typing": "add_typing",
+    "init": "init",
+    "inspect": "inspect",
+    "make": "make",
+    "mkgithub": "mkgithub",
+    "release": "release",
+    "retemplate": "retemplate",
+    "serve": "serve",
+    "template": "template",
+    "unflatten": "unflatten",
+}
 
-@click.group(context_settings={"help_option_names": ["-h", "--help"]})
+
+class LazyGroup(click.Group):
+    """
+    A `click.Group` that only imports a subcommand's module when the
+    subcommand is actually looked up, using `COMMANDS` to list the available
+    subcommands
+    """
+
+    def list_commands(self, ctx):  # noqa: U100
+        return sorted(set(self.commands).union(COMMANDS))
+
+    def get_command(self, ctx, cmd_name):  # noqa: U100
+        if cmd_name not in self.commands and cmd_name in COMMANDS:
+            submod = import_module("." + COMMANDS[cmd_name], "pyrepo.commands")
+            self.add_command(submod.cli, cmd_name)
+        return self.commands.get(cmd_name)
+
+
+@click.group(
+    cls=LazyGroup,
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
 @click.option(
     "-c",
     "--config",
@@ -33,6 +69,16 @@ from .config import DEFAULT_CFG, configure
     help="Set logging level  [default: INFO]",
     show_default=True,
 )
+@click.option(
+    "--refresh-pyversions",
+    is_flag=True,
+    help="Refetch the Python version support data instead of using the cache",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Whether to reuse cached project inspection results  [default: true]",
+)
 @click.version_option(
     __version__,
     "-V",
@@ -40,9 +86,10 @@ from .config import DEFAULT_CFG, configure
     message="jwodder-pyrepo %(version)s",
 )
 @click.pass_context
-def main(ctx, chdir, config, log_level):
+def main(ctx, chdir, config, log_level, refresh_pyversions, cache):
     """Manage Python packaging boilerplate"""
-    configure(ctx, config)
+    configure(ctx, config, refresh_pyversions=refresh_pyversions)
+    ctx.obj.use_cache = cache
     if chdir is not None:
         os.chdir(chdir)
     colorlog.basicConfig(
@@ -58,19 +105,5 @@ def main(ctx, chdir, config, log_level):
     )
 
 
-for fpath in Path(__file__).with_name("commands").iterdir():
-    modname = fpath.stem
-    if (
-        modname.isidentifier()
-        and not modname.startswith("_")
-        and (
-            fpath.suffix == ""
-            and (fpath / "__init__.py").exists()
-            or fpath.suffix == ".py"
-        )
-    ):
-        submod = import_module("." + modname, "pyrepo.commands")
-        main.add_command(submod.cli, modname.replace("_", "-"))
-
 if __name__ == "__main__":
     main()
@@ -1,7 +1,11 @@
+from io import StringIO
 import re
-from typing import IO, List
+from typing import IO, Dict, Iterable, List, MutableSequence, Optional, Tuple, overload
 import attr
 
+HRULE_RGX = re.compile(r"^---+$")
+HEADER_RGX = re.compile(r"^(?P<version>\S+)\s+\((?P<date>.+)\)$")
+
 
 @attr.s
 class Changelog:
@@ -11,64 +15,134 @@ class Changelog:
     """
 
     intro: str = attr.ib()
-    sections: List["ChangelogSection"] = attr.ib(converter=list)
+    sections: "SectionStore" = attr.ib(converter=lambda s: SectionStore.coerce(s))
+    #: When only the first sections of a file were loaded (see `load()`), the
+    #: rest of the file, unparsed & verbatim, starting with the header of the
+    #: first unloaded section
+    tail: str = attr.ib(default="", repr=False)
+    #: The text that separated the last loaded section from `tail` in the file
+    tail_sep: str = attr.ib(default="", repr=False)
 
     @classmethod
-    def load(cls, fp: IO[str]) -> "Changelog":
-        intro = ""
-        prev = None
-        sections = []
-        for line in fp:
-            if re.match(r"^---+$", line):
-                if sections:
-                    sections[-1]._end()
-                if prev is None:
-                    raise ValueError("File begins with hrule")
-                m = re.match(r"^(?P<version>\S+)\s+\((?P<date>.+)\)$", prev)
-                if not m:
-                    raise ValueError(
-                        'Section header not in "version (date)"'
-                        " format: " + repr(prev)
-                    )
-                sections.append(
-                    ChangelogSection(
-                        version=m.group("version"),
-                        date=m.group("date"),
-                        content="",
-                    )
-                )
-                prev = None
-            elif prev is not None:
-                if sections:
-                    sections[-1].content += prev
+    def load(cls, fp: IO[str], max_sections: Optional[int] = None) -> "Changelog":
+        """
+        Parse a changelog.  If ``max_sections`` is given, only the intro and
+        the first ``max_sections`` sections are parsed, and the rest of the
+        file is stored unparsed in `tail`, to be written back out unchanged by
+        `save()`.
+
+        Sections are located by their line offsets and are only converted to
+        `ChangelogSection` objects when accessed; sections that are never
+        accessed are written back out by `save()` exactly as they were read.
+        """
+        lines = fp.readlines()
+        # Line indices of each section's header:
+        headers: List[int] = []
+        # Only lines starting with a hyphen can be hrules; finding them with a
+        # comprehension is much faster than testing every line in a loop.
+        for i in [i for i, line in enumerate(lines) if line[:1] == "-"]:
+            if not HRULE_RGX.match(lines[i]):
+                continue
+            if i == 0 or (headers and headers[-1] == i - 2):
+                raise ValueError("File begins with hrule")
+            if max_sections is not None and len(headers) >= max_sections:
+                store = SectionStore.from_lines(lines, headers, i - 1)
+                if headers:
+                    raw = "".join(lines[headers[-1] : i - 1])
+                    tail_sep = raw[len(raw.rstrip("\r\n")) :]
                 else:
-                    intro += prev
-                prev = line
-            else:
-                prev = line
-        if prev is not None:
-            if not sections:
-                raise ValueError("Changelog is nonempty but lacks headers")
-            sections[-1].content += prev
-        if sections:
-            sections[-1]._end()
-        return cls(intro, sections)
+                    tail_sep = ""
+                return cls(
+                    "".join(lines[: headers[0] if headers else i - 1]),
+                    store,
+                    tail="".join(lines[i - 1 :]),
+                    tail_sep=tail_sep,
+                )
+            headers.append(i - 1)
+        if lines and not headers:
+            raise ValueError("Changelog is nonempty but lacks headers")
+        intro = "".join(lines[: headers[0]]) if headers else ""
+        return cls(intro, SectionStore.from_lines(lines, headers, len(lines)))
+
+    def get(self, version: str) -> Optional["ChangelogSection"]:
+        """
+        Return the section for the given version, or `None` if there is no
+        such section.  If the version is not among the loaded sections, the
+        `tail` is loaded and searched as well.
+        """
+        sect = self.sections.get(version)
+        if sect is None and self.tail:
+            self.load_tail()
+            sect = self.sections.get(version)
+        return sect
+
+    def insert(self, index: int, section: "ChangelogSection") -> None:
+        """Insert a section at the given position"""
+        self.sections.insert(index, section)
+
+    def replace(self, version: str, section: "ChangelogSection") -> None:
+        """
+        Replace the section for the given version with ``section``
+
+        :raises KeyError: if there is no section for ``version``
+        """
+        if self.get(version) is None:
+            raise KeyError(version)
+        self.sections.replace(version, section)
+
+    def load_tail(self) -> None:
+        """Parse `tail` (if any) and append its sections to `sections`"""
+        if self.tail:
+            rest = Changelog.load(StringIO(self.tail))
+            self.sections.extend_store(rest.sections)
+            self.tail = ""
+            self.tail_sep = ""
 
     def save(self, fp: IO[str]) -> None:
         print(self, file=fp, end="")
 
     def __str__(self) -> str:
+        if self.tail:
+            sep = self.get_separator()
+            # The tail can only be written out verbatim if it was separated
+            # from the loaded sections the same way as the loaded sections
+            # are now separated from each other.  If the loaded sections no
+            # longer contain blank lines (e.g., because they were all
+            # deleted) but the file was using two blank lines between
+            # sections, whether the tail contains blank lines (and thus which
+            # separator to use) can only be determined by parsing it.
+            if not self.sections:
+                # An empty `tail_sep` means that no sections were loaded in
+                # the first place.
+                if self.tail_sep in ("", sep):
+                    return self.intro + self.tail
+            elif sep == self.tail_sep:
+                return self.intro + self.sections.join(sep) + sep + self.tail
+            full = attr.evolve(self, sections=self.sections.copy())
+            full.load_tail()
+            return str(full)
         if self.sections:
-            if any("\n\n" in sect.content for sect in self.sections):
-                sep = "\n\n\n"
-            else:
-                sep = "\n\n"
-            return self.intro + sep.join(map(str, self.sections)) + "\n"
+            return self.intro + self.sections.join(self.get_separator()) + "\n"
         else:
             return self.intro
 
+    def get_separator(self) -> str:
+        """
+        Return the text to place between the loaded sections: two blank lines
+        if any section contains a blank line, one otherwise
+        """
+        if self.sections.has_blank_lines():
+            return "\n\n\n"
+        else:
+            return "\n\n"
+
     def for_json(self) -> dict:
-        return attr.asdict(self)
+        full = attr.evolve(self, sections=self.sections.copy())
+        full.load_tail()
+        return {
+            "intro": full.intro,
+            "sections": [attr.asdict(sect) for sect in full.sections],
+        }
 
 
 @attr.s
@@ -83,5 +157,263 @@ class ChangelogSection:
             s += f" ({self.date})"
         return s + "\n" + "-" * len(s) + ("\n" + self.content if self.content else "")
 
-    def _end(self) -> None:
-        self.content = self.content.rstrip("\r\n")
+
+@attr.s(slots=True)
+class LineSpan:
+    """
+    A changelog section read from a file, stored as offsets into the file's
+    lines.  It is only converted to a `ChangelogSection` when first accessed.
+    """
+
+    #: The lines of the file that the section was read from
+    lines: List[str] = attr.ib(repr=False)
+    version: str = attr.ib()
+    date: str = attr.ib()
+    #: Index of the header line
+    start: int = attr.ib()
+    #: Index one past the last nonblank line of the content
+    end: int = attr.ib()
+    #: Whether the content contains a blank line, computed on demand
+    has_blank: Optional[bool] = attr.ib(default=None)
+    #: The `ChangelogSection`, once the section has been accessed
+    section: Optional[ChangelogSection] = attr.ib(default=None, init=False)
+
+    def get_section(self) -> ChangelogSection:
+        if self.section is None:
+            self.section = ChangelogSection(
+                version=self.version,
+                date=self.date,
+                content="".join(self.lines[self.start + 2 : self.end]).rstrip("\r\n"),
+            )
+        return self.section
+
+    def get_version(self) -> str:
+        return self.section.version if self.section is not None else self.version
+
+    def has_blank_lines(self) -> bool:
+        if self.section is not None:
+            return "\n\n" in self.section.content
+        if self.has_blank is None:
+            self.has_blank = any(
+                self.lines[k].startswith("\n") and self.lines[k - 1].endswith("\n")
+                for k in range(self.start + 3, self.end)
+            )
+        return self.has_blank
+
+    def __str__(self) -> str:
+        if self.section is not None:
+            # The section may have been modified.
+            return str(self.section)
+        return "".join(self.lines[self.start : self.end]).rstrip("\r\n")
+
+
+def wrap_section(section: ChangelogSection) -> LineSpan:
+    """Wrap a `ChangelogSection` not read from a file in a `LineSpan`"""
+    span = LineSpan(
+        lines=[],
+        version=section.version,
+        date=section.date,
+        start=0,
+        end=0,
+    )
+    span.section = section
+    return span
+
+
+class SectionStore(MutableSequence[ChangelogSection]):
+    """
+    The sections of a `Changelog`, in order, as a mutable sequence of
+    `ChangelogSection` objects.  Sections read from a file are kept as
+    `LineSpan`\\s into the file's lines until they are first accessed, and
+    sections can be looked up by version without scanning the store.
+    """
+
+    def __init__(self, sections: Iterable[ChangelogSection] = ()) -> None:
+        self._spans: List[LineSpan] = [wrap_section(s) for s in sections]
+        #: Mapping from versions to the position of the first span with that
+        #: version, counted from the end of the store so that inserting a
+        #: section at the front leaves the entries valid; built on demand
+        self._index: Optional[Dict[str, int]] = None
+        #: The sections that have been handed out to or received from callers
+        #: since the index was built, keyed by `id()`, along with their
+        #: versions at the time.  Callers may change a section's version in
+        #: place, in which case the index has to be rebuilt.
+        self._shared: Dict[int, Tuple[ChangelogSection, str]] = {}
+
+    @classmethod
+    def coerce(cls, sections: Iterable[ChangelogSection]) -> "SectionStore":
+        if isinstance(sections, cls):
+            return sections
+        return cls(sections)
+
+    @classmethod
+    def from_lines(
+        cls, lines: List[str], headers: List[int], stop: int
+    ) -> "SectionStore":
+        """
+        Construct a store for the sections in ``lines[:stop]`` whose headers
+        are on the lines with the indices ``headers``
+        """
+        store = cls()
+        for n, start in enumerate(headers):
+            m = HEADER_RGX.match(lines[start])
+            if not m:
+                raise ValueError(
+                    'Section header not in "version (date)"'
+                    " format: " + repr(lines[start])
+                )
+            content_start = start + 2
+            end = headers[n + 1] if n + 1 < len(headers) else stop
+            while end > content_start and lines[end - 1].strip("\r\n") == "":
+                end -= 1
+            store._spans.append(
+                LineSpan(
+                    lines=lines,
+                    version=m.group("version"),
+                    date=m.group("date"),
+                    start=start,
+                    end=end,
+                )
+            )
+        return store
+
+    def copy(self) -> "SectionStore":
+        """
+        Return a shallow copy of the store; sections that have already been
+        accessed are shared with the copy
+        """
+        store = type(self)()
+        store._spans = list(self._spans)
+        return store
+
+    def extend_store(self, other: "SectionStore") -> None:
+        """Append the sections of another store without accessing them"""
+        self._spans.extend(other._spans)
+        self._index = None
+
+    @overload
+    def __getitem__(self, i: int) -> ChangelogSection:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[ChangelogSection]:
+        ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._share(span.get_section()) for span in self._spans[i]]
+        return self._share(self._spans[i].get_section())
+
+    def __setitem__(self, i, value) -> None:
+        if isinstance(i, slice):
+            self._spans[i] = [wrap_section(s) for s in value]
+            self._index = None
+        else:
+            self._set_span(range(len(self._spans))[i], value)
+
+    def __delitem__(self, i) -> None:
+        del self._spans[i]
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def insert(self, index: int, value: ChangelogSection) -> None:
+        n = len(self._spans)
+        index = min(max(index + n if index < 0 else index, 0), n)
+        self._spans.insert(index, wrap_section(self._share(value)))
+        if self._index is not None:
+            rank = n - index
+            if index > 0:
+                # The sections before the new one are now one position
+                # further from the end.
+                for version, r in self._index.items():
+                    if r >= rank:
+                        self._index[version] = r + 1
+            if self._index.get(value.version, -1) < rank:
+                self._index[value.version] = rank
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (SectionStore, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def _share(self, section: ChangelogSection) -> ChangelogSection:
+        """
+        Record that a caller holds a reference to ``section``, whose version
+        it may later change
+        """
+        if self._index is not None:
+            self._shared.setdefault(id(section), (section, section.version))
+        return section
+
+    def _build_index(self) -> Dict[str, int]:
+        self._index = {}
+        self._shared = {}
+        for rank, span in enumerate(reversed(self._spans)):
+            self._index[span.get_version()] = rank
+            if span.section is not None:
+                self._share(span.section)
+        return self._index
+
+    def _find(self, version: str) -> Optional[int]:
+        """
+        Return the position of the first span with the given version, or
+        `None` if there is no such span
+        """
+        index = self._index
+        if index is None or any(sect.version != v for sect, v in self._shared.values()):
+            index = self._build_index()
+        rank = index.get(version)
+        return len(self._spans) - 1 - rank if rank is not None else None
+
+    def _set_span(self, i: int, section: ChangelogSection) -> None:
+        """Replace the span at position ``i`` with ``section``"""
+        old_version = self._spans[i].get_version()
+        self._spans[i] = wrap_section(self._share(section))
+        if self._index is None or section.version == old_version:
+            return
+        rank = len(self._spans) - 1 - i
+        if self._index.get(old_version) == rank:
+            # Point the old version at the next span with it, if any.
+            for j in range(i + 1, len(self._spans)):
+                if self._spans[j].get_version() == old_version:
+                    self._index[old_version] = len(self._spans) - 1 - j
+                    break
+            else:
+                del self._index[old_version]
+        if self._index.get(section.version, -1) < rank:
+            self._index[section.version] = rank
+
+    def get(self, version: str) -> Optional[ChangelogSection]:
+        """
+        Return the first section with the given version, or `None` if there is
+        no such section
+        """
+        i = self._find(version)
+        return self[i] if i is not None else None
+
+    def replace(self, version: str, section: ChangelogSection) -> None:
+        """
+        Replace the first section with the given version with ``section``
+
+        :raises KeyError: if there is no section for ``version``
+        """
+        i = self._find(version)
+        if i is None:
+            raise KeyError(version)
+        self._set_span(i, section)
+
+    def has_blank_lines(self) -> bool:
+        """Test whether the content of any section contains a blank line"""
+        return any(span.has_blank_lines() for span in self._spans)
+
+    def join(self, sep: str) -> str:
+        """
+        Join the string forms of the sections with ``sep``.  Sections that
+        have not been accessed are output exactly as they were read.
+        """
+        return sep.join(map(str, self._spans))
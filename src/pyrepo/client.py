@@ -0,0 +1,157 @@
+"""
+Thin client for a running ``pyrepo serve`` daemon
+
+This module only uses the standard library so that starting it is cheap.  If
+no daemon is listening on the socket, the command is run in a new ``pyrepo``
+process instead.
+
+Protocol: the client sends a single line containing a JSON object with
+``argv``, ``cwd``, and ``env`` fields.  The server replies with a series of
+frames, each consisting of a one-byte frame type, a four-byte big-endian
+payload length, and the payload.  Frame types are `STDOUT` and `STDERR` (data
+written to the respective stream) and `EXIT` (the command's exit status as a
+four-byte big-endian signed integer), which is always the final frame.
+"""
+
+import json
+import os
+from pathlib import Path
+import socket
+import struct
+import sys
+from typing import IO, List, Optional, Tuple
+
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+
+HEADER = struct.Struct(">cI")
+EXIT_STATUS = struct.Struct(">i")
+
+
+def default_socket_path() -> Path:
+    """
+    Return the path to the socket used by ``pyrepo serve`` when none is given,
+    honoring ``$PYREPO_SOCKET``
+    """
+    if os.environ.get("PYREPO_SOCKET"):
+        return Path(os.environ["PYREPO_SOCKET"])
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"], "pyrepo.sock")
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return Path(cache_home, "pyrepo", "serve.sock")
+
+
+def send_frame(sock: socket.socket, ftype: bytes, payload: bytes) -> None:
+    sock.sendall(HEADER.pack(ftype, len(payload)) + payload)
+
+
+def recv_frame(fp: IO[bytes]) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Read a frame from ``fp`` and return a ``(type, payload)`` pair, or `None`
+    if the connection was closed
+    """
+    header = fp.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    ftype, length = HEADER.unpack(header)
+    payload = fp.read(length)
+    if len(payload) < length:
+        return None
+    return (ftype, payload)
+
+
+def connect(socket_path: Optional[Path] = None) -> socket.socket:
+    """
+    Connect to the ``pyrepo serve`` daemon listening on ``socket_path``
+    (default: `default_socket_path()`)
+
+    :raises OSError: if the daemon cannot be connected to
+    """
+    if socket_path is None:
+        socket_path = default_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def run(
+    argv: List[str],
+    cwd: Optional[str] = None,
+    env: Optional[dict] = None,
+    socket_path: Optional[Path] = None,
+    stdout: Optional[IO[bytes]] = None,
+    stderr: Optional[IO[bytes]] = None,
+) -> int:
+    """
+    Run ``pyrepo`` with the given arguments in a running ``pyrepo serve``
+    daemon, copying its output to ``stdout`` & ``stderr`` (default: the
+    current process's standard output & error), and return its exit status.
+
+    :raises OSError: if the daemon cannot be connected to
+    """
+    with connect(socket_path) as sock:
+        return run_on_socket(sock, argv, cwd=cwd, env=env, stdout=stdout, stderr=stderr)
+
+
+def run_on_socket(
+    sock: socket.socket,
+    argv: List[str],
+    cwd: Optional[str] = None,
+    env: Optional[dict] = None,
+    stdout: Optional[IO[bytes]] = None,
+    stderr: Optional[IO[bytes]] = None,
+) -> int:
+    """
+    Like `run()`, but sends the command over an already-connected socket
+    """
+    if stdout is None:
+        stdout = sys.stdout.buffer
+    if stderr is None:
+        stderr = sys.stderr.buffer
+    request = {
+        "argv": list(argv),
+        "cwd": os.getcwd() if cwd is None else str(cwd),
+        "env": dict(os.environ if env is None else env),
+    }
+    sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    with sock.makefile("rb") as fp:
+        while True:
+            frame = recv_frame(fp)
+            if frame is None:
+                print("pyrepo-client: Server closed connection", file=sys.stderr)
+                return 1
+            ftype, payload = frame
+            if ftype == STDOUT:
+                stdout.write(payload)
+                stdout.flush()
+            elif ftype == STDERR:
+                stderr.write(payload)
+                stderr.flush()
+            elif ftype == EXIT:
+                (status,) = EXIT_STATUS.unpack(payload)
+                return status
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    try:
+        sock = connect()
+    except OSError:
+        # No daemon is reachable (not running, stale or inaccessible socket,
+        # etc.); do the work ourselves.  Errors after connecting are not
+        # caught, as the command may already have run in part.
+        os.execv(sys.executable, [sys.executable, "-m", "pyrepo", *argv])
+    with sock:
+        status = run_on_socket(sock, argv)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,11 @@ log = logging.getLogger(__name__)
 @click.command()
 @click.argument("testenv")
 @click.argument("pyver")
-def cli(testenv, pyver):
+@click.pass_obj
+def cli(obj, testenv, pyver):
     """Add a TESTENV job with the given PYVER to the CI configuration"""
     try:
-        project = Project.from_directory()
+        project = Project.from_directory(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     log.info("Adding testenv %r with Python version %r", testenv, pyver)
@@ -1,13 +1,52 @@
+from functools import partial
 import json
+import sys
 import click
+from ..fleet import run_fleet
 from ..inspecting import InvalidProjectError, inspect_project
+from ..util import yield_lines
 
 
 @click.command()
-def cli():
-    """Extract template variables from a project"""
-    try:
-        data = inspect_project()
-    except InvalidProjectError as e:
-        raise click.UsageError(str(e))
-    click.echo(json.dumps(data, indent=4, sort_keys=True))
+@click.option(
+    "-f",
+    "--from-file",
+    type=click.File(encoding="utf-8"),
+    help="Also inspect the directories listed in the given file (one per line)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of projects to inspect in parallel  [default: number of CPUs]",
+)
+@click.argument("dirpath", nargs=-1, type=click.Path(file_okay=False))
+@click.pass_obj
+def cli(obj, dirpath, from_file, jobs):
+    """
+    Extract template variables from a project.
+
+    If one or more directories are given (as arguments and/or via
+    --from-file), they are all inspected in parallel, and for each one, a JSON
+    object containing either its template variables or the error encountered
+    is output on a single line as soon as it completes.
+    """
+    directories = list(dirpath)
+    if from_file is not None:
+        directories.extend(yield_lines(from_file))
+    if not directories:
+        try:
+            data = inspect_project(use_cache=obj.use_cache)
+        except InvalidProjectError as e:
+            raise click.UsageError(str(e))
+        click.echo(json.dumps(data, indent=4, sort_keys=True))
+        return
+    ok = True
+    for res in run_fleet(
+        partial(inspect_project, use_cache=obj.use_cache), directories, jobs=jobs
+    ):
+        ok = ok and res.ok
+        click.echo(json.dumps(res.for_json(), sort_keys=True))
+        sys.stdout.flush()
+    if not ok:
+        sys.exit(1)
@@ -21,10 +21,11 @@ from ..project import Project
     default=True,
     help="Whether to build a wheel [default: true]",
 )
-def cli(clean, sdist, wheel):
+@click.pass_obj
+def cli(obj, clean, sdist, wheel):
     """Build an sdist and/or wheel for a project"""
     try:
-        project = Project.from_directory()
+        project = Project.from_directory(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     project.build(clean=clean, sdist=sdist, wheel=wheel)
@@ -1,7 +1,9 @@
+from pathlib import Path
 import click
 from ..gh import ACCEPT
+from ..gitrepo import GitRepo
 from ..inspecting import InvalidProjectError, inspect_project
-from ..util import readcmd, runcmd
+from ..util import runcmd
 
 TOPICS_ACCEPT = f"application/vnd.github.mercy-preview,{ACCEPT}"
 
@@ -12,7 +14,7 @@ TOPICS_ACCEPT = f"application/vnd.github.mercy-preview,{ACCEPT}"
 @click.pass_obj
 def cli(obj, repo_name, private):
     try:
-        env = inspect_project()
+        env = inspect_project(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     if repo_name is None:
@@ -31,7 +33,7 @@ def cli(obj, repo_name, private):
         headers={"Accept": TOPICS_ACCEPT},
         json={"names": keywords},
     )
-    if "origin" in readcmd("git", "remote").splitlines():
+    if "origin" in GitRepo.for_directory(Path()).remotes():
         runcmd("git", "remote", "rm", "origin")
     runcmd("git", "remote", "add", "origin", repo["ssh_url"])
     runcmd("git", "push", "-u", "origin", env["default_branch"])
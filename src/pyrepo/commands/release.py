@@ -13,25 +13,28 @@
 # - The version is set as `__version__` in `packagename/__init__.py` or
 #   `packagename.py`.
 
+from io import StringIO
 import logging
 from mimetypes import add_type, guess_type
 import os
 import os.path
+from pathlib import Path
 import re
 import sys
 from tempfile import NamedTemporaryFile
 import time
 import attr
 import click
-from in_place import InPlace
 from linesep import read_paragraphs
 from packaging.version import Version
 from uritemplate import expand
 from ..changelog import Changelog, ChangelogSection
 from ..gh import ACCEPT, GitHub
+from ..gitrepo import GitRepo
+from ..inifile import KEY_RGX, IniEntry
 from ..inspecting import InvalidProjectError, get_commit_years
 from ..project import Project
-from ..util import ensure_license_years, optional, readcmd, runcmd, update_years2str
+from ..util import optional, runcmd, update_license_years, update_years2str
 
 log = logging.getLogger(__name__)
 
@@ -56,11 +59,20 @@ class Releaser:
     ghrepo = attr.ib()
     tox = attr.ib()
     sign_assets = attr.ib()
+    use_cache = attr.ib(default=False)
     assets = attr.ib(factory=list)
     assets_asc = attr.ib(factory=list)
 
     @classmethod
-    def from_project(cls, project, version=None, gh=None, tox=False, sign_assets=False):
+    def from_project(
+        cls,
+        project,
+        version=None,
+        gh=None,
+        tox=False,
+        sign_assets=False,
+        use_cache=False,
+    ):
         if version is None:
             # Remove prerelease & dev release from __version__
             ### TODO: Just use Version.base_version instead?
@@ -75,6 +87,7 @@ class Releaser:
             ghrepo=gh.repos[project.github_user][project.repo_name],
             tox=tox,
             sign_assets=sign_assets,
+            use_cache=use_cache,
         )
 
     def run(self):
@@ -109,7 +122,7 @@ class Releaser:
             # a line to delete:
             print("DELETE THIS LINE", file=tmplate)
             print(file=tmplate)
-            chlog = self.project.get_changelog()
+            chlog = self.project.get_changelog(max_sections=1)
             if chlog and chlog.sections:
                 print(f"v{self.version} — INSERT SHORT DESCRIPTION HERE", file=tmplate)
                 print(file=tmplate)
@@ -149,14 +162,10 @@ class Releaser:
 
     def mkghrelease(self):  ### Not idempotent
         log.info("Creating GitHub release ...")
-        subject, body = readcmd(
-            "git",
-            "show",
-            "-s",
-            "--format=%s%x00%b",
-            "v" + self.version + "^{commit}",
-            cwd=self.project.directory,
-        ).split("\0", 1)
+        commit = GitRepo.for_directory(self.project.directory).commit_info(
+            "v" + self.version
+        )
+        subject, body = commit.subject, commit.body
         reldata = self.ghrepo.releases.post(
             json={
                 "tag_name": "v" + self.version,
@@ -228,9 +237,9 @@ class Releaser:
                 log.info("Adding new section to docs/changelog.rst ...")
             else:
                 log.info("Adding new section to CHANGELOG ...")
-            chlog = self.project.get_changelog(docs=docs)
+            chlog = self.project.get_changelog(docs=docs, max_sections=1)
             if chlog and chlog.sections:
-                chlog.sections.insert(0, new_sect)
+                chlog.insert(0, new_sect)
             else:
                 chlog = Changelog(
                     intro="Changelog\n=========\n\n" if docs else "",
@@ -244,6 +253,7 @@ class Releaser:
                     ],
                 )
             self.project.set_changelog(chlog, docs=docs)
+        self.project.flush()
 
     def end_dev(self):  # Idempotent
         log.info("Finalizing version ...")
@@ -254,67 +264,58 @@ class Releaser:
                 log.info("Updating docs/changelog.rst ...")
             else:
                 log.info("Updating CHANGELOG ...")
-            chlog = self.project.get_changelog(docs=docs)
+            chlog = self.project.get_changelog(docs=docs, max_sections=1)
             if chlog and chlog.sections:
                 chlog.sections[0].version = f"v{self.version}"
                 chlog.sections[0].date = today()
                 self.project.set_changelog(chlog, docs=docs)
-        years = get_commit_years(self.project.directory)
+        years = get_commit_years(self.project.directory, use_cache=self.use_cache)
         # Update year ranges in LICENSE
         log.info("Ensuring LICENSE copyright line is up to date ...")
-        ensure_license_years(self.project.directory / "LICENSE", years)
+        files = self.project.files
+        files.write_text(
+            "LICENSE", update_license_years(files.read_text("LICENSE"), years)
+        )
         # Update year ranges in docs/conf.py
-        docs_conf = self.project.directory / "docs" / "conf.py"
-        if docs_conf.exists():
+        docs_conf = Path("docs", "conf.py")
+        if files.exists(docs_conf):
             log.info("Ensuring docs/conf.py copyright is up to date ...")
-            with InPlace(docs_conf, mode="t", encoding="utf-8") as fp:
-                for line in fp:
-                    m = re.match(r'^copyright\s*=\s*[\x27"](\d[-,\d\s]+\d) \w+', line)
-                    if m:
-                        line = (
-                            line[: m.start(1)]
-                            + update_years2str(m.group(1), years)
-                            + line[m.end(1) :]
-                        )
-                    print(line, file=fp, end="")
-        if self.project.get_changelog() is None:
+            fp = StringIO()
+            for line in files.read_text(docs_conf).splitlines(keepends=True):
+                m = re.match(r'^copyright\s*=\s*[\x27"](\d[-,\d\s]+\d) \w+', line)
+                if m:
+                    line = (
+                        line[: m.start(1)]
+                        + update_years2str(m.group(1), years)
+                        + line[m.end(1) :]
+                    )
+                print(line, file=fp, end="")
+            files.write_text(docs_conf, fp.getvalue())
+        if self.project.get_changelog(max_sections=0) is None:
             # Initial release
             self.end_initial_dev()
+        self.project.flush()
 
     def end_initial_dev(self):  # Idempotent
         # Set repostatus to "Active":
         log.info("Advancing repostatus ...")
         ### TODO: Use the Readme class for this:
-        with InPlace(
-            self.project.directory / "README.rst",
-            mode="t",
-            encoding="utf-8",
-        ) as fp:
-            for para in read_paragraphs(fp):
-                if para.splitlines()[0] == (
-                    ".. image:: http://www.repostatus.org/badges/latest/wip.svg"
-                ):
-                    print(ACTIVE_BADGE, file=fp)
-                else:
-                    print(para, file=fp, end="")
+        files = self.project.files
+        fp = StringIO()
+        for para in read_paragraphs(StringIO(files.read_text("README.rst"))):
+            if para.splitlines()[0] == (
+                ".. image:: http://www.repostatus.org/badges/latest/wip.svg"
+            ):
+                print(ACTIVE_BADGE, file=fp)
+            else:
+                print(para, file=fp, end="")
+        files.write_text("README.rst", fp.getvalue())
         # Set "Development Status" classifier to "Beta" or higher:
         log.info("Advancing Development Status classifier ...")
-        with InPlace(
-            self.project.directory / "setup.cfg",
-            mode="t",
-            encoding="utf-8",
-        ) as fp:
-            matched = False
-            for line in fp:
-                if re.match(r"^\s*#?\s*Development Status :: [123] ", line):
-                    continue
-                elif (
-                    re.match(r"^\s*#?\s*Development Status :: [4567] ", line)
-                    and not matched
-                ):
-                    matched = True
-                    line = line.replace("#", "", 1)
-                print(line, file=fp, end="")
+        cfg = self.project.get_ini("setup.cfg")
+        metadata = cfg.get("metadata")
+        if metadata is not None and "classifiers" in metadata:
+            advance_dev_status(metadata["classifiers"])
         log.info("Updating GitHub topics ...")
         ### TODO: Check that the repository has topics first?
         self.update_gh_topics(
@@ -339,7 +340,7 @@ class Releaser:
 @click.pass_obj
 def cli(obj, version, **options):
     try:
-        project = Project.from_directory()
+        project = Project.from_directory(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     defaults = obj.defaults["release"]
@@ -355,6 +356,7 @@ def cli(obj, version, **options):
         gh=obj.gh,
         tox=tox,
         sign_assets=sign_assets,
+        use_cache=obj.use_cache,
     ).run()
 
 
@@ -375,6 +377,31 @@ def next_version(v: str) -> str:
     return s
 
 
+def advance_dev_status(classifiers: IniEntry) -> None:
+    """
+    Remove any "Development Status" classifiers for stages before "Beta" from
+    the given :file:`setup.cfg` ``classifiers`` entry and uncomment the first
+    classifier for a later stage
+    """
+    m = KEY_RGX.match(classifiers.lines[0])
+    assert m
+    matched = False
+    if re.match(r"Development Status :: [123] ", m.group("value")):
+        # The classifier is on the same line as the key.
+        lines = [m.group("key") + m.group("sep").rstrip() + "\n"]
+    else:
+        matched = bool(re.match(r"Development Status :: [4567] ", m.group("value")))
+        lines = classifiers.lines[:1]
+    for line in classifiers.lines[1:]:
+        if re.match(r"^\s*#?\s*Development Status :: [123] ", line):
+            continue
+        elif re.match(r"^\s*#?\s*Development Status :: [4567] ", line) and not matched:
+            matched = True
+            line = line.replace("#", "", 1)
+        lines.append(line)
+    classifiers.lines = lines
+
+
 def today():
     return time.strftime("%Y-%m-%d")
 
@@ -0,0 +1,175 @@
+from difflib import unified_diff
+from functools import partial
+import json
+from pathlib import Path
+import sys
+import time
+from typing import List, Optional, Sequence
+import click
+from ..fleet import run_fleet
+from ..project import Project, WriteStatus, get_write_status
+from ..template_deps import parse_variables, select_templated_files
+from ..util import get_jinja_env, yield_lines
+
+
+@click.command()
+@click.option(
+    "-a",
+    "--all",
+    "all_templates",
+    is_flag=True,
+    help="Re-evaluate all templated files that each project uses",
+)
+@click.option(
+    "--affected-by",
+    metavar="VAR[,VAR...]",
+    help=(
+        "Only re-evaluate the templated files that read the given"
+        " comma-separated template variables"
+    ),
+)
+@click.option(
+    "--apply",
+    is_flag=True,
+    help="Write the changes to the projects instead of only reporting them",
+)
+@click.option(
+    "--diff",
+    type=click.File("w", encoding="utf-8"),
+    help="Write unified diffs of all changes to the given file",
+)
+@click.option(
+    "-f",
+    "--from-file",
+    type=click.File(encoding="utf-8"),
+    help="Also process the directories listed in the given file (one per line)",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of projects to process in parallel  [default: number of CPUs]",
+)
+@click.option(
+    "-t",
+    "--template",
+    "templates",
+    multiple=True,
+    metavar="TEMPLATED-FILE",
+    help="Re-evaluate the given templated file (can be given multiple times)",
+)
+@click.argument("dirpath", nargs=-1, type=click.Path(file_okay=False))
+@click.pass_obj
+def cli(
+    obj, dirpath, from_file, jobs, templates, all_templates, affected_by, apply, diff
+):
+    """
+    Re-evaluate templates across many projects.
+
+    Each project given (as arguments and/or via --from-file) is inspected, and
+    the selected templated files are rendered and compared with their current
+    contents, with the projects processed in parallel.  For each project, a
+    JSON object listing the files that differ (or the error encountered) is
+    output on a single line as soon as it completes.  Nothing is written
+    unless --apply is given.
+    """
+    if not (templates or all_templates or affected_by is not None):
+        raise click.UsageError(
+            "No templates selected; use --template, --all, or --affected-by"
+        )
+    if all_templates and templates:
+        raise click.UsageError("--all and --template are mutually exclusive")
+    if affected_by is not None:
+        try:
+            variables: Optional[List[str]] = parse_variables(affected_by)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    else:
+        variables = None
+    directories = list(dirpath)
+    if from_file is not None:
+        directories.extend(yield_lines(from_file))
+    func = partial(
+        retemplate_project,
+        templates=templates,
+        all_templates=all_templates,
+        variables=variables,
+        apply=apply,
+        with_diff=diff is not None,
+        use_cache=obj.use_cache,
+    )
+    ok = True
+    for res in run_fleet(func, directories, jobs=jobs):
+        data = res.for_json()
+        if res.ok:
+            patch = data["result"].pop("diff")
+            if diff is not None:
+                diff.write(patch)
+        else:
+            ok = False
+        click.echo(json.dumps(data, sort_keys=True))
+        sys.stdout.flush()
+    if not ok:
+        sys.exit(1)
+
+
+def retemplate_project(
+    dirpath: Path,
+    templates: Sequence[str],
+    all_templates: bool,
+    variables: Optional[List[str]],
+    apply: bool,
+    with_diff: bool,
+    use_cache: bool,
+) -> dict:
+    """
+    Inspect the project at ``dirpath``, render the selected templated files,
+    and (if ``apply`` is true) write the ones that differ from the current
+    contents.  Returns a JSON-serializable `dict` describing the results.
+    """
+    start = time.perf_counter()
+    project = Project.from_directory(dirpath, use_cache=use_cache)
+    inspect_time = time.perf_counter() - start
+    paths = select_templated_files(project, templates, all_templates, variables)
+    start = time.perf_counter()
+    rendered = project.render_templates(paths, get_jinja_env())
+    render_time = time.perf_counter() - start
+    changed = []
+    created = []
+    unchanged = []
+    patches = []
+    for path, content in rendered.items():
+        status: Optional[WriteStatus] = None
+        if with_diff:
+            # Read the file once for both the diff and the write status:
+            try:
+                current: Optional[bytes] = (project.directory / path).read_bytes()
+            except FileNotFoundError:
+                current = None
+            status = get_write_status(current, content.encode("utf-8"))
+            old = current.decode("utf-8") if current is not None else ""
+            filename = str(Path(dirpath, path))
+            patches.extend(
+                unified_diff(
+                    old.splitlines(True),
+                    content.splitlines(True),
+                    fromfile=filename,
+                    tofile=filename,
+                )
+            )
+        status = project.write_rendered(path, content, dry_run=not apply, status=status)
+        if status is WriteStatus.CHANGED:
+            changed.append(path)
+        elif status is WriteStatus.CREATED:
+            created.append(path)
+        else:
+            unchanged.append(path)
+    return {
+        "changed": changed,
+        "created": created,
+        "unchanged": unchanged,
+        "applied": apply,
+        "inspect_time": round(inspect_time, 6),
+        "render_time": round(render_time, 6),
+        "diff": "".join(patches),
+    }
@@ -0,0 +1,22 @@
+import click
+from ..client import default_socket_path
+from ..server import serve
+
+
+@click.command()
+@click.option(
+    "-s",
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Listen on the given Unix socket  [default: $PYREPO_SOCKET or a file"
+    " in $XDG_RUNTIME_DIR]",
+)
+def cli(socket_path):
+    """Run a daemon that executes commands sent by pyrepo-client"""
+    if socket_path is None:
+        socket_path = default_socket_path()
+    try:
+        serve(socket_path)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
@@ -1,16 +1,52 @@
+from collections import Counter
+import logging
+import sys
 import click
 from ..inspecting import InvalidProjectError
-from ..project import Project
+from ..project import Project, WriteStatus
+from ..template_deps import parse_variables, select_templated_files
 from ..util import get_jinja_env
 
+log = logging.getLogger(__name__)
+
 
 @click.command()
+@click.option(
+    "-a",
+    "--all",
+    "all_templates",
+    is_flag=True,
+    help="Re-evaluate all templated files that the project uses",
+)
+@click.option(
+    "--affected-by",
+    metavar="VAR[,VAR...]",
+    help=(
+        "Only re-evaluate the templated files that read the given"
+        " comma-separated template variables"
+    ),
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Don't write anything; exit nonzero if any file would be changed",
+)
 @click.option("-o", "--outfile", type=click.File("w", encoding="utf-8"))
 @click.argument("template", nargs=-1)
-def cli(template, outfile):
+@click.pass_obj
+def cli(obj, template, outfile, check, all_templates, affected_by):
     """Replace files with their re-evaluated templates"""
+    if all_templates and template:
+        raise click.UsageError("--all cannot be combined with template arguments")
+    if affected_by is not None:
+        try:
+            variables = parse_variables(affected_by)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    else:
+        variables = None
     try:
-        project = Project.from_directory()
+        project = Project.from_directory(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     jenv = get_jinja_env()
@@ -19,7 +55,35 @@ def cli(template, outfile):
             raise click.UsageError(
                 "--outfile may only be used with a single template argument"
             )
+        if check or all_templates or affected_by is not None:
+            raise click.UsageError(
+                "--outfile is mutually exclusive with --all, --affected-by,"
+                " and --check"
+            )
         print(project.render_template(template[0], jenv), end="", file=outfile)
+        return
+    if all_templates or variables is not None:
+        paths = select_templated_files(project, template, all_templates, variables)
+        if variables is not None:
+            log.info("Templated files affected: %s", ", ".join(paths) or "none")
+        statuses = project.write_templates(paths, jenv, dry_run=check)
     else:
-        for tmplt in template:
-            project.write_template(tmplt, jenv)
+        statuses = {
+            tmplt: project.write_template(tmplt, jenv, dry_run=check)
+            for tmplt in template
+        }
+    counts = Counter(statuses.values())
+    if check:
+        for tmplt, status in statuses.items():
+            if status is not WriteStatus.UNCHANGED:
+                click.echo(tmplt)
+    log.info(
+        "%d file(s) %s, %d unchanged, %d %s",
+        counts[WriteStatus.CHANGED],
+        "would be changed" if check else "changed",
+        counts[WriteStatus.UNCHANGED],
+        counts[WriteStatus.CREATED],
+        "would be created" if check else "created",
+    )
+    if check and counts[WriteStatus.UNCHANGED] < len(statuses):
+        sys.exit(1)
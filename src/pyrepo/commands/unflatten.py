@@ -4,9 +4,20 @@ from ..project import Project
 
 
 @click.command()
-def cli():
+@click.option(
+    "-n",
+    "--dry-run",
+    is_flag=True,
+    help="Show a diff of the changes instead of making them",
+)
+@click.pass_obj
+def cli(obj, dry_run):
     try:
-        project = Project.from_directory()
+        project = Project.from_directory(use_cache=obj.use_cache)
     except InvalidProjectError as e:
         raise click.UsageError(str(e))
     project.unflatten()
+    if dry_run:
+        click.echo(project.get_diff(), nl=False)
+    else:
+        project.flush()
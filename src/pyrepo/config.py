@@ -1,12 +1,13 @@
+from collections.abc import Mapping
 from configparser import ConfigParser
 from pathlib import Path
 import platform
 from types import SimpleNamespace
 import click
-from pyversion_info import get_pyversion_info
 import requests
 from pyrepo import __url__, __version__
 from .gh import ACCEPT, GitHub
+from .pyversions import DEFAULT_TTL, cached_pyversion_info
 
 DEFAULT_CFG = str(Path.home() / ".config" / "pyrepo.cfg")
 
@@ -29,20 +30,41 @@ MAJOR_PYTHON_VERSIONS = [3]
 PYVER_TEMPLATE = '"3.X"'
 
 
-def configure(ctx, filename):
+def configure(ctx, filename, refresh_pyversions=False):
     cfg = ConfigParser(interpolation=None)
     cfg.optionxform = lambda s: s.lower().replace("-", "_")
     cfg.read_dict(DEFAULTS)
     if filename is not None:
         cfg.read(filename)
         ### TODO: Check the return value and raise an exception if it's empty
-    supported_series = [
-        v for v in get_pyversion_info().supported_series() if not v.startswith("2.")
-    ]
+    try:
+        pyversions_ttl = float(cfg.get("pyversions", "cache_ttl", fallback=DEFAULT_TTL))
+    except ValueError:
+        raise click.UsageError(
+            f"Invalid setting for pyversions.cache_ttl config option:"
+            f' {cfg["pyversions"]["cache_ttl"]!r}: must be a number of seconds'
+        )
+
+    supported_series = None
+
+    def get_supported_series():
+        # Only consult the version data if the config file doesn't specify
+        # both ends of the version range
+        nonlocal supported_series
+        if supported_series is None:
+            supported_series = [
+                v
+                for v in cached_pyversion_info(
+                    ttl=pyversions_ttl, refresh=refresh_pyversions
+                ).supported_series()
+                if not v.startswith("2.")
+            ]
+        return supported_series
+
     try:
         min_pyversion = parse_pyversion(cfg["pyversions"]["minimum"])
     except KeyError:
-        min_pyversion = parse_pyversion(supported_series[0])
+        min_pyversion = parse_pyversion(get_supported_series()[0])
     except ValueError:
         raise click.UsageError(
             f"Invalid setting for pyversions.minimum config option:"
@@ -52,7 +74,7 @@ def configure(ctx, filename):
     try:
         max_pyversion = parse_pyversion(cfg["pyversions"]["maximum"])
     except KeyError:
-        max_pyversion = parse_pyversion(supported_series[-1])
+        max_pyversion = parse_pyversion(get_supported_series()[-1])
     except ValueError:
         raise click.UsageError(
             f"Invalid setting for pyversions.maximum config option:"
@@ -64,8 +86,11 @@ def configure(ctx, filename):
             "Config option pyversions.minimum cannot be greater than"
             " pyversions.maximum"
         )
+    if not cfg.has_option("options", "python_requires"):
+        cfg["options"]["python_requires"] = "~={}.{}".format(*min_pyversion)
     ctx.obj = SimpleNamespace(
-        defaults={},
+        cfg=cfg,
+        defaults=CommandDefaults(ctx, cfg),
         pyversions=pyver_range(min_pyversion, max_pyversion),
     )
 
@@ -80,24 +105,43 @@ def configure(ctx, filename):
         s.headers["Authorization"] = "token " + auth_gh["token"]
     ctx.obj.gh = GitHub(session=s)
 
-    if not cfg.has_option("options", "python_requires"):
-        cfg["options"]["python_requires"] = "~={}.{}".format(*min_pyversion)
-    from .__main__ import main
 
-    for cmdname, cmdobj in main.commands.items():
-        defaults = dict(cfg["options"])
-        if cfg.has_section("options." + cmdname):
-            defaults.update(cfg["options." + cmdname])
+class CommandDefaults(Mapping):
+    """
+    A mapping from subcommand names to dicts of default option values for the
+    subcommands as read from the configuration file.  A subcommand's defaults
+    are only computed (including converting the values for its boolean
+    options) when looked up, and a fresh `dict` is returned on each lookup.
+    """
+
+    def __init__(self, ctx, cfg):
+        #: The context for the command group
+        self.ctx = ctx
+        self.cfg = cfg
+
+    def __getitem__(self, cmdname):
+        cmdobj = self.ctx.command.get_command(self.ctx, cmdname)
+        if cmdobj is None:
+            raise KeyError(cmdname)
+        defaults = dict(self.cfg["options"])
+        if self.cfg.has_section("options." + cmdname):
+            defaults.update(self.cfg["options." + cmdname])
         for p in cmdobj.params:
             if isinstance(p, click.Option) and p.is_flag and p.name in defaults:
                 try:
-                    defaults[p.name] = cfg.BOOLEAN_STATES[defaults[p.name].lower()]
+                    defaults[p.name] = self.cfg.BOOLEAN_STATES[defaults[p.name].lower()]
                 except KeyError:
                     raise click.UsageError(
                         f"Invalid boolean value for config option {p.name}:"
                         f" {defaults[p.name]!r}"
                     )
-        ctx.obj.defaults[cmdname] = defaults
+        return defaults
+
+    def __iter__(self):
+        return iter(self.ctx.command.list_commands(self.ctx))
+
+    def __len__(self):
+        return len(self.ctx.command.list_commands(self.ctx))
 
 
 def parse_pyversion(s):
@@ -0,0 +1,181 @@
+"""
+Fast detection of whether a project's source code contains any doctests
+
+Candidate files are listed with ``git ls-files`` (so that ignored files are
+skipped) or, outside of a Git repository, with `os.scandir()`.  Each file is
+scanned as raw bytes (via `mmap` for large files) without being decoded, and
+the scan stops at the first file with a doctest.  Per-file results can be
+cached on disk keyed on each file's inode, mtime, and size.
+"""
+
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+import re
+import subprocess
+from typing import Dict, Iterator, List, Optional
+from .inspection_cache import stable_mtime
+from .util import write_json_atomic
+
+log = logging.getLogger(__name__)
+
+#: Matches a doctest example prompt at the start of a line
+DOCTEST_RGX = re.compile(rb"[ \t\f\v\r]*>>>\s")
+
+#: Files larger than this many bytes are assumed to be generated or vendored
+#: data rather than hand-written code with doctests and are skipped
+MAX_FILE_SIZE = 4 * 1024 * 1024
+
+#: Files at least this many bytes in size are memory-mapped rather than read;
+#: for smaller files, the cost of setting up the mapping outweighs the savings
+MMAP_THRESHOLD = 64 * 1024
+
+#: Number of leading bytes checked for NUL bytes to detect binary files
+BINARY_CHECK_SIZE = 8192
+
+
+def has_doctests(srcdir: Path, cache_file: Optional[Path] = None) -> bool:
+    """
+    Test whether any Python source file under ``srcdir`` contains a doctest.
+    If ``cache_file`` is given, per-file results are read from & saved to it.
+    """
+    cache = load_cache(cache_file) if cache_file is not None else {}
+    newcache: Dict[str, List] = {}
+    found = False
+    scanned = 0
+    candidates = []
+    srcroot = str(srcdir)
+    for relpath in list_python_files(srcdir):
+        try:
+            st = os.stat(os.path.join(srcroot, relpath))
+        except FileNotFoundError:
+            continue
+        # Cache entries are `[inode, mtime_ns, size, has_doctest]` lists.
+        # Recently-modified files are stored with an mtime of 0 so that they
+        # are rescanned next time.
+        key = (st.st_ino, stable_mtime(st), st.st_size)
+        cached = cache.get(relpath)
+        if cached is not None and cached[:3] == [
+            st.st_ino,
+            st.st_mtime_ns,
+            st.st_size,
+        ]:
+            newcache[relpath] = cached
+            if cached[3]:
+                found = True
+                break
+        else:
+            candidates.append((relpath, key))
+    if not found:
+        for relpath, key in candidates:
+            scanned += 1
+            result = scan_file(os.path.join(srcroot, relpath), key[2])
+            newcache[relpath] = [*key, result]
+            if result:
+                found = True
+                break
+    log.debug(
+        "Doctest scan of %s: %d files cached, %d scanned, doctests %s",
+        srcdir,
+        len(newcache) - scanned,
+        scanned,
+        "found" if found else "not found",
+    )
+    if cache_file is not None and scanned:
+        if found:
+            # The scan stopped early, so keep the entries for files that
+            # weren't reached this time.
+            newcache = dict(cache, **newcache)
+        try:
+            write_json_atomic(cache_file, newcache)
+        except OSError as e:
+            log.debug("Could not write doctest cache: %s", e)
+    return found
+
+
+def scan_file(path: str, size: int) -> bool:
+    """
+    Test whether the file at ``path`` (of size ``size``) contains a doctest,
+    skipping empty, oversized, and binary files
+    """
+    if size == 0 or size > MAX_FILE_SIZE:
+        return False
+    try:
+        with open(path, "rb") as fp:
+            if size < MMAP_THRESHOLD:
+                return contains_doctest(fp.read())
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return contains_doctest(mm)
+    except (OSError, ValueError):
+        # ValueError is raised if the file was truncated to zero bytes after
+        # being stat'ed
+        return False
+
+
+def contains_doctest(data) -> bool:
+    """
+    Test whether the `bytes` or `mmap.mmap` ``data`` is a non-binary file
+    containing a doctest
+    """
+    if data.find(b"\0", 0, BINARY_CHECK_SIZE) != -1:
+        return False
+    # Searching for the literal ">>>" is much faster than running the regex
+    # over the whole file, so only run the regex on lines containing it.
+    pos = data.find(b">>>")
+    while pos != -1:
+        linestart = data.rfind(b"\n", 0, pos) + 1
+        if DOCTEST_RGX.match(data, linestart) is not None:
+            return True
+        pos = data.find(b">>>", pos + 3)
+    return False
+
+
+def list_python_files(srcdir: Path) -> Iterator[str]:
+    """
+    Yield the paths (relative to ``srcdir``, with forward slashes) of all
+    :file:`*.py` files under ``srcdir``, excluding files ignored by Git if
+    ``srcdir`` is in a Git repository
+    """
+    try:
+        r = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=str(srcdir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        pass
+    else:
+        if r.returncode == 0:
+            seen = set()
+            for relpath in r.stdout.decode("utf-8", "surrogateescape").split("\0"):
+                # Files with unmerged changes are listed more than once
+                if relpath.endswith(".py") and relpath not in seen:
+                    seen.add(relpath)
+                    yield relpath
+            return
+    yield from scandir_python_files(srcdir, "")
+
+
+def scandir_python_files(dirpath: Path, prefix: str) -> Iterator[str]:
+    with os.scandir(dirpath) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.name.startswith(".") or entry.name == "__pycache__":
+                continue
+            elif entry.is_dir():
+                yield from scandir_python_files(
+                    Path(entry.path), f"{prefix}{entry.name}/"
+                )
+            elif entry.name.endswith(".py") and entry.is_file():
+                yield prefix + entry.name
+
+
+def load_cache(cache_file: Path) -> Dict[str, List]:
+    try:
+        with cache_file.open(encoding="utf-8") as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
@@ -0,0 +1,138 @@
+"""
+Write-back cache of project files
+
+Commands that edit a project often modify the same file more than once (e.g.,
+``pyrepo add-typing`` unflattens the project, which rewrites
+:file:`setup.cfg`, and then edits :file:`setup.cfg` again).  A `FileCache`
+reads each file at most once and applies all edits to an in-memory copy; the
+modified files are then either written out together by `FileCache.flush()`,
+each one atomically, or shown as a diff by `FileCache.diff()` without
+touching the disk.
+"""
+
+from difflib import unified_diff
+import errno
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import attr
+from .util import write_text_atomic
+
+log = logging.getLogger(__name__)
+
+AnyPath = Union[str, "os.PathLike[str]"]
+
+
+@attr.s
+class CachedFile:
+    #: The contents of the file on disk, or `None` if it does not exist
+    original: Optional[str] = attr.ib()
+    #: The contents of the file in the cache, or `None` if it is to be deleted
+    content: Optional[str] = attr.ib()
+
+    @property
+    def dirty(self) -> bool:
+        return self.content != self.original
+
+
+@attr.s
+class FileCache:
+    #: The directory relative to which paths are resolved
+    directory: Path = attr.ib()
+    #: Mapping from paths relative to `directory` to the files' cached states
+    files: Dict[Path, CachedFile] = attr.ib(factory=dict, repr=False)
+
+    def relpath(self, path: AnyPath) -> Path:
+        p = Path(path)
+        if p.is_absolute():
+            p = p.relative_to(self.directory)
+        return p
+
+    def get(self, path: AnyPath) -> CachedFile:
+        p = self.relpath(path)
+        try:
+            return self.files[p]
+        except KeyError:
+            try:
+                text: Optional[str] = (self.directory / p).read_text(encoding="utf-8")
+            except FileNotFoundError:
+                text = None
+            cached = self.files[p] = CachedFile(original=text, content=text)
+            return cached
+
+    def exists(self, path: AnyPath) -> bool:
+        return self.get(path).content is not None
+
+    def read_text(self, path: AnyPath) -> str:
+        """
+        :raises FileNotFoundError: if the file does not exist or has been
+            deleted
+        """
+        content = self.get(path).content
+        if content is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), str(path))
+        return content
+
+    def write_text(self, path: AnyPath, content: str) -> None:
+        self.get(path).content = content
+
+    def touch(self, path: AnyPath) -> None:
+        """Create the file as an empty file if it does not already exist"""
+        if not self.exists(path):
+            self.write_text(path, "")
+
+    def delete(self, path: AnyPath) -> None:
+        """
+        :raises FileNotFoundError: if the file does not exist or has been
+            deleted
+        """
+        self.read_text(path)
+        self.get(path).content = None
+
+    def rename(self, src: AnyPath, dest: AnyPath) -> None:
+        """
+        :raises FileNotFoundError: if ``src`` does not exist or has been
+            deleted
+        """
+        self.write_text(dest, self.read_text(src))
+        self.delete(src)
+
+    def get_dirty(self) -> List[Path]:
+        """Return the paths of all files that have been modified, sorted"""
+        return sorted(p for p, cached in self.files.items() if cached.dirty)
+
+    def diff(self) -> str:
+        """Return a unified diff of all changes made in the cache"""
+        patches: List[str] = []
+        for p in self.get_dirty():
+            cached = self.files[p]
+            patches.extend(
+                unified_diff(
+                    (cached.original or "").splitlines(True),
+                    (cached.content or "").splitlines(True),
+                    fromfile=str(p) if cached.original is not None else os.devnull,
+                    tofile=str(p) if cached.content is not None else os.devnull,
+                )
+            )
+        return "".join(patches)
+
+    def flush(self) -> List[Path]:
+        """
+        Write all modified files to disk (deleting those that were deleted in
+        the cache) and return their paths
+        """
+        dirty = self.get_dirty()
+        for p in dirty:
+            cached = self.files[p]
+            if cached.content is None:
+                log.debug("Deleting %s", p)
+                try:
+                    (self.directory / p).unlink()
+                except FileNotFoundError:
+                    pass
+            else:
+                log.debug("Writing %s", p)
+                write_text_atomic(self.directory / p, cached.content)
+            cached.original = cached.content
+        return dirty
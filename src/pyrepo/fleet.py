@@ -0,0 +1,83 @@
+"""
+Running an operation over many project directories in parallel
+
+Each directory is handled in a separate worker process so that the work is
+spread across CPU cores.  Errors are reported per directory rather than
+aborting the whole batch.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+import attr
+
+
+@attr.s(auto_attribs=True)
+class FleetResult:
+    #: The project directory, as given
+    directory: str
+    #: The return value of the operation, or `None` if it failed
+    value: Any = None
+    #: The name of the exception class raised by the operation, if any
+    error_type: Optional[str] = None
+    #: The message of the exception raised by the operation, if any
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error_type is None
+
+    def for_json(self) -> dict:
+        data = {"directory": self.directory}
+        if self.ok:
+            data["result"] = self.value
+        else:
+            data["error_type"] = self.error_type
+            data["error"] = self.error
+        return data
+
+
+def run_fleet(
+    func: Callable[[Path], Any],
+    directories: Iterable[str],
+    jobs: Optional[int] = None,
+) -> Iterator[FleetResult]:
+    """
+    Call ``func`` on each directory in ``directories`` in a pool of ``jobs``
+    worker processes (default: the number of CPUs) and yield a `FleetResult`
+    for each directory as soon as it completes.  ``func`` must be picklable,
+    i.e., a module-level function, and its return values must be picklable as
+    well.
+    """
+    directories = list(directories)
+    if not directories:
+        return
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(jobs, len(directories))) as pool:
+        futures = [pool.submit(call_safely, func, d) for d in directories]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def call_safely(func: Callable[[Path], Any], directory: str) -> FleetResult:
+    try:
+        value = func(Path(directory))
+    except Exception as e:
+        return FleetResult(
+            directory=directory, error_type=type(e).__name__, error=str(e)
+        )
+    except SystemExit as e:
+        # Helpers like `util.readcmd()` exit when a command fails; that should
+        # only fail this directory, not the whole batch.
+        return FleetResult(
+            directory=directory,
+            error_type="SystemExit",
+            error=(
+                e.code
+                if isinstance(e.code, str)
+                else f"Process exited with status {e.code}"
+            ),
+        )
+    return FleetResult(directory=directory, value=value)
@@ -0,0 +1,264 @@
+"""
+Reading Git repository metadata directly from the filesystem
+
+`GitMetadata` answers simple questions about a repository — which branches
+exist, what ``HEAD`` points to, and the URLs of its remotes — by reading the
+files in the :file:`.git` directory instead of running ``git``, thereby
+avoiding the cost of spawning a process.  It understands loose refs,
+:file:`packed-refs`, linked worktrees, and :file:`.git` files that point to a
+Git directory elsewhere.  Repositories using features it does not understand
+(e.g., the reftable ref storage format) cause `UnsupportedRepositoryError` to
+be raised so that callers can fall back to running ``git``.
+"""
+
+import os
+from pathlib import Path
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import attr
+
+
+class GitMetadataError(Exception):
+    """Base class for errors raised by this module"""
+
+    pass
+
+
+class NotARepositoryError(GitMetadataError):
+    """Raised when no Git repository can be found"""
+
+    pass
+
+
+class UnsupportedRepositoryError(GitMetadataError):
+    """Raised when a repository uses features that cannot be read"""
+
+    pass
+
+
+@attr.s(auto_attribs=True)
+class GitMetadata:
+    #: The Git directory for the worktree, containing :file:`HEAD`
+    gitdir: Path
+    #: The Git directory containing the refs, objects, and config shared by
+    #: all worktrees; the same as `gitdir` except for linked worktrees
+    commondir: Path
+
+    @classmethod
+    def for_directory(cls, dirpath) -> "GitMetadata":
+        """
+        Return the metadata for the Git repository containing the directory
+        ``dirpath``
+
+        :raises NotARepositoryError: if ``dirpath`` is not in a repository
+        :raises UnsupportedRepositoryError:
+            if the repository's ref storage format is not supported
+        """
+        dirpath = Path(dirpath).resolve()
+        for d in (dirpath, *dirpath.parents):
+            dotgit = d / ".git"
+            if dotgit.is_dir():
+                gitdir = dotgit
+                break
+            elif dotgit.is_file():
+                gitdir = read_gitfile(dotgit)
+                break
+        else:
+            raise NotARepositoryError(f"{dirpath} is not in a Git repository")
+        try:
+            commondir = gitdir / (gitdir / "commondir").read_text().strip()
+        except FileNotFoundError:
+            commondir = gitdir
+        meta = cls(gitdir=gitdir, commondir=commondir.resolve())
+        for section, _, key, value in meta.read_config():
+            if section == "extensions" and key == "refstorage" and value != "files":
+                raise UnsupportedRepositoryError(
+                    f"Unsupported ref storage format {value!r}"
+                )
+        return meta
+
+    def branches(self) -> Set[str]:
+        """Return the short names of all local branches"""
+        return {
+            name[len("refs/heads/") :]
+            for name in self.ref_names("refs/heads/")
+            if name.startswith("refs/heads/")
+        }
+
+    def has_branch(self, name: str) -> bool:
+        return self.resolve_ref(f"refs/heads/{name}") is not None
+
+    def ref_names(self, prefix: str = "refs/") -> Set[str]:
+        """Return the full names of all refs that start with ``prefix``"""
+        names = {name for name in self.packed_refs() if name.startswith(prefix)}
+        base = self.commondir
+        for dirpath, _, filenames in os.walk(base / prefix.rstrip("/")):
+            relpath = Path(dirpath).relative_to(base).as_posix()
+            for fn in filenames:
+                if not fn.endswith(".lock"):
+                    names.add(f"{relpath}/{fn}")
+        return names
+
+    def head(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return a pair of the full name of the branch that ``HEAD`` points to
+        (or `None` if ``HEAD`` is detached) and the commit hash that ``HEAD``
+        resolves to (or `None` if the branch does not have any commits yet)
+        """
+        content = (self.gitdir / "HEAD").read_text().strip()
+        if content.startswith("ref:"):
+            ref = content[len("ref:") :].strip()
+            return (ref, self.resolve_ref(ref))
+        else:
+            return (None, content)
+
+    def current_branch(self) -> Optional[str]:
+        """
+        Return the short name of the branch that ``HEAD`` points to, or `None`
+        if ``HEAD`` is detached
+        """
+        ref, _ = self.head()
+        if ref is not None and ref.startswith("refs/heads/"):
+            return ref[len("refs/heads/") :]
+        return None
+
+    def resolve_ref(self, ref: str) -> Optional[str]:
+        """
+        Return the object hash that the full ref name ``ref`` points to
+        (following symbolic refs), or `None` if the ref does not exist
+        """
+        for _ in range(10):
+            content = self.read_loose_ref(ref)
+            if content is None:
+                return self.packed_refs().get(ref)
+            elif content.startswith("ref:"):
+                ref = content[len("ref:") :].strip()
+            else:
+                return content
+        raise GitMetadataError(f"Too many levels of symbolic refs for {ref}")
+
+    def read_loose_ref(self, ref: str) -> Optional[str]:
+        # Per-worktree refs live in the worktree's own Git directory; all
+        # other refs are shared.
+        if ref == "HEAD" or ref.startswith(("refs/bisect/", "refs/worktree/")):
+            base = self.gitdir
+        else:
+            base = self.commondir
+        try:
+            return (base / ref).read_text().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def packed_refs(self) -> Dict[str, str]:
+        """Return a `dict` mapping ref names to hashes in :file:`packed-refs`"""
+        refs = {}
+        try:
+            with (self.commondir / "packed-refs").open(encoding="utf-8") as fp:
+                for line in fp:
+                    line = line.strip()
+                    # Skip the header and peeled tag lines
+                    if not line or line.startswith(("#", "^")):
+                        continue
+                    sha, _, name = line.partition(" ")
+                    refs[name] = sha
+        except FileNotFoundError:
+            pass
+        return refs
+
+    def remote_urls(self) -> Dict[str, List[str]]:
+        """
+        Return a `dict` mapping the names of the repository's remotes to lists
+        of their configured fetch URLs.  ``url.<base>.insteadOf`` rewrites are
+        not applied.
+        """
+        remotes: Dict[str, List[str]] = {}
+        for section, subsection, key, value in self.read_config():
+            if section == "remote" and subsection is not None:
+                urls = remotes.setdefault(subsection, [])
+                if key == "url":
+                    urls.append(value)
+        return remotes
+
+    def read_config(self) -> Iterator[Tuple[str, Optional[str], str, str]]:
+        """
+        Yield a ``(section, subsection, key, value)`` tuple for each setting in
+        the repository's :file:`config` file.  Section and key names are
+        lowercased.  ``include`` directives are not followed.
+        """
+        try:
+            with (self.commondir / "config").open(encoding="utf-8") as fp:
+                yield from parse_git_config(fp)
+        except FileNotFoundError:
+            return
+
+
+def read_gitfile(path: Path) -> Path:
+    """Read a :file:`.git` file and return the Git directory it points to"""
+    content = path.read_text().strip()
+    if not content.startswith("gitdir:"):
+        raise NotARepositoryError(f"Invalid gitfile format: {path}")
+    gitdir = Path(content[len("gitdir:") :].strip())
+    if not gitdir.is_absolute():
+        gitdir = path.parent / gitdir
+    return gitdir.resolve()
+
+
+SECTION_RGX = re.compile(
+    r'\s*\[\s*([-.\w]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(?:[#;].*)?'
+)
+KEY_RGX = re.compile(r"\s*([A-Za-z][-A-Za-z0-9]*)\s*(?:=\s*(.*))?")
+
+
+def parse_git_config(lines) -> Iterator[Tuple[str, Optional[str], str, str]]:
+    section: Optional[str] = None
+    subsection: Optional[str] = None
+    for line in lines:
+        m = SECTION_RGX.fullmatch(line.rstrip("\r\n"))
+        if m:
+            name = m.group(1).lower()
+            if m.group(2) is not None:
+                section = name
+                subsection = re.sub(r"\\(.)", r"\1", m.group(2))
+            elif "." in name:
+                # Deprecated `[section.subsection]` syntax
+                section, _, subsection = name.partition(".")
+            else:
+                section, subsection = name, None
+            continue
+        m = KEY_RGX.fullmatch(line.rstrip("\r\n"))
+        if m and section is not None:
+            value = m.group(2)
+            yield (
+                section,
+                subsection,
+                m.group(1).lower(),
+                "true" if value is None else parse_config_value(value),
+            )
+
+
+def parse_config_value(s: str) -> str:
+    """
+    Unquote a Git config value, stripping any trailing comment.  Line
+    continuations are not supported.
+    """
+    value = []
+    in_quotes = False
+    pending_space = ""
+    chars = iter(s)
+    for c in chars:
+        if c == '"':
+            in_quotes = not in_quotes
+        elif c == "\\":
+            esc = next(chars, "")
+            value.append(
+                pending_space + {"n": "\n", "t": "\t", "b": "\b"}.get(esc, esc)
+            )
+            pending_space = ""
+        elif not in_quotes and c in "#;":
+            break
+        elif not in_quotes and c.isspace():
+            pending_space += c
+        else:
+            value.append(pending_space + c)
+            pending_space = ""
+    return "".join(value)
@@ -0,0 +1,240 @@
+"""
+Querying a Git repository over long-lived pipes
+
+Rather than forking a new ``git`` process for every query, `GitRepo` keeps a
+single ``git cat-file --batch`` process running per repository and reads
+objects (commits, tags, etc.) from it on demand.  Log queries are streamed
+from ``git log`` line by line instead of being buffered in full.
+"""
+
+import atexit
+import logging
+from pathlib import Path
+import subprocess
+import threading
+from typing import IO, Dict, Iterator, List, Optional, Tuple, cast
+import attr
+from .gitmeta import GitMetadata, GitMetadataError
+
+log = logging.getLogger(__name__)
+
+
+class GitError(Exception):
+    """Raised when a Git query fails"""
+
+    pass
+
+
+@attr.s(auto_attribs=True)
+class Signature:
+    name: str
+    email: str
+    #: Seconds since the epoch
+    timestamp: int
+    #: UTC offset in the form ``"+HHMM"``
+    tz: str
+
+    @classmethod
+    def parse(cls, s: str) -> "Signature":
+        # `Name <email> 1234567890 +0000`
+        name, _, rest = s.partition(" <")
+        email, _, when = rest.partition("> ")
+        timestamp, _, tz = when.partition(" ")
+        return cls(name=name, email=email, timestamp=int(timestamp), tz=tz)
+
+
+@attr.s(auto_attribs=True)
+class CommitInfo:
+    sha: str
+    tree: str
+    parents: List[str]
+    author: Signature
+    committer: Signature
+    #: The full commit message
+    message: str
+
+    @classmethod
+    def parse(cls, sha: str, data: bytes) -> "CommitInfo":
+        headers, _, message = data.decode("utf-8", "replace").partition("\n\n")
+        fields: Dict[str, List[str]] = {}
+        key = None
+        for line in headers.splitlines():
+            if line.startswith(" ") and key is not None:
+                # Continuation of a multiline header, e.g., `gpgsig`
+                fields[key][-1] += "\n" + line[1:]
+            else:
+                key, _, value = line.partition(" ")
+                fields.setdefault(key, []).append(value)
+        return cls(
+            sha=sha,
+            tree=fields["tree"][0],
+            parents=fields.get("parent", []),
+            author=Signature.parse(fields["author"][0]),
+            committer=Signature.parse(fields["committer"][0]),
+            message=message,
+        )
+
+    @property
+    def subject(self) -> str:
+        """
+        The first paragraph of the commit message with line breaks replaced
+        by spaces, like ``git log --format=%s``
+        """
+        return " ".join(self.split_message()[0].splitlines())
+
+    @property
+    def body(self) -> str:
+        """
+        The commit message after the first paragraph, like ``git log
+        --format=%b``
+        """
+        return self.split_message()[1]
+
+    def split_message(self) -> Tuple[str, str]:
+        msg = self.message.lstrip("\n")
+        subject, _, body = msg.partition("\n\n")
+        return (subject, body.lstrip("\n"))
+
+
+@attr.s(auto_attribs=True)
+class GitRepo:
+    #: The repository's working tree
+    directory: Path
+    _batch: Optional[subprocess.Popen] = attr.ib(default=None, init=False)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False)
+
+    @classmethod
+    def for_directory(cls, dirpath) -> "GitRepo":
+        """
+        Return the `GitRepo` for the given directory, reusing an existing
+        instance (and thus its ``git`` processes) when there is one
+        """
+        key = Path(dirpath).resolve()
+        with REGISTRY_LOCK:
+            try:
+                return REGISTRY[key]
+            except KeyError:
+                repo = REGISTRY[key] = cls(key)
+                return repo
+
+    def __enter__(self) -> "GitRepo":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Terminate the repository's persistent ``git`` process, if any"""
+        with self._lock:
+            if self._batch is not None:
+                log.debug("Stopping git cat-file --batch for %s", self.directory)
+                cast(IO[bytes], self._batch.stdin).close()
+                self._batch.wait()
+                cast(IO[bytes], self._batch.stdout).close()
+                self._batch = None
+
+    def read_object(self, spec: str) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Look up the object named by ``spec`` (any expression accepted by
+        :command:`git rev-parse`, e.g., ``v1.2^{commit}``) and return a
+        triple of its hash, type, and raw contents, or `None` if there is no
+        such object
+        """
+        if "\n" in spec:
+            raise ValueError(f"Invalid object name: {spec!r}")
+        with self._lock:
+            if self._batch is None or self._batch.poll() is not None:
+                log.debug("Starting git cat-file --batch for %s", self.directory)
+                self._batch = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=str(self.directory),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                )
+            stdin = cast(IO[bytes], self._batch.stdin)
+            stdout = cast(IO[bytes], self._batch.stdout)
+            stdin.write(spec.encode("utf-8") + b"\n")
+            stdin.flush()
+            header = stdout.readline().decode("utf-8").rstrip("\n")
+            if not header:
+                raise GitError(f"git cat-file --batch exited in {self.directory}")
+            parts = header.split(" ")
+            if len(parts) != 3:
+                # `<spec> missing` or `<spec> ambiguous`
+                return None
+            sha, objtype, size = parts
+            data = stdout.read(int(size))
+            stdout.read(1)  # Trailing newline
+            return (sha, objtype, data)
+
+    def commit_info(self, rev: str) -> CommitInfo:
+        """
+        Return the metadata of the commit that ``rev`` (e.g., a tag name)
+        refers to
+
+        :raises GitError: if ``rev`` does not refer to a commit
+        """
+        obj = self.read_object(f"{rev}^{{commit}}")
+        if obj is None:
+            raise GitError(f"{rev!r} does not name a commit in {self.directory}")
+        sha, _, data = obj
+        return CommitInfo.parse(sha, data)
+
+    def log_lines(self, *args: str) -> Iterator[str]:
+        """
+        Run ``git log`` with the given arguments and yield each line of its
+        output as soon as it is read
+
+        :raises GitError: if ``git log`` fails
+        """
+        cmd = ["git", "--no-pager", "log", *args]
+        log.debug("Streaming: %s", " ".join(cmd))
+        with subprocess.Popen(
+            cmd,
+            cwd=str(self.directory),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ) as p:
+            for line in cast(IO[str], p.stdout):
+                yield line.rstrip("\n")
+        if p.returncode != 0:
+            raise GitError(f"git log failed in {self.directory}")
+
+    def head(self) -> Optional[str]:
+        """
+        Return the hash of the commit that ``HEAD`` points to, or `None` if
+        there are no commits yet
+        """
+        try:
+            return GitMetadata.for_directory(self.directory).head()[1]
+        except GitMetadataError:
+            obj = self.read_object("HEAD")
+            return obj[0] if obj is not None else None
+
+    def remotes(self) -> List[str]:
+        """Return the names of the repository's remotes"""
+        try:
+            return list(GitMetadata.for_directory(self.directory).remote_urls())
+        except GitMetadataError:
+            r = subprocess.run(
+                ["git", "remote"],
+                cwd=str(self.directory),
+                stdout=subprocess.PIPE,
+                universal_newlines=True,
+                check=True,
+            )
+            return r.stdout.splitlines()
+
+
+REGISTRY: Dict[Path, GitRepo] = {}
+REGISTRY_LOCK = threading.Lock()
+
+
+@atexit.register
+def close_all() -> None:
+    """Close all `GitRepo` instances created via `GitRepo.for_directory()`"""
+    with REGISTRY_LOCK:
+        repos = list(REGISTRY.values())
+        REGISTRY.clear()
+    for repo in repos:
+        repo.close()
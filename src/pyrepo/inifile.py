@@ -0,0 +1,373 @@
+"""
+A lossless document model for INI files like :file:`setup.cfg` & :file:`tox.ini`
+
+`IniDocument.parse()` splits a file into sections and each section into
+entries, where an entry is either a key (with its continuation lines) or a run
+of blank & comment lines.  Every line of the file is kept verbatim in exactly
+one entry, so a document that is parsed and then stringified reproduces the
+input exactly, and edits only rewrite the lines of the entries they touch.
+Sections and keys are indexed by name for constant-time lookup.
+
+Lines are classified the same way as by `configparser`: a line whose first
+non-whitespace character is ``#`` or ``;`` is a comment, and an indented line
+following a key (possibly after blank or comment lines) continues the key's
+value.  Indented comment lines directly after a value (such as commented-out
+list items) are kept with the value's entry.
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional
+import attr
+
+SECTION_RGX = re.compile(r"^\[(?P<name>[^]]+)\]\s*$")
+
+KEY_RGX = re.compile(r"^(?P<key>[^=:\s][^=:]*?)(?P<sep>\s*[=:]\s*)(?P<value>.*?)\s*$")
+
+COMMENT_PREFIXES = ("#", ";")
+
+#: The indentation used for continuation lines added to values that do not
+#: already have any
+DEFAULT_INDENT = "    "
+
+
+def is_blank_or_comment(line: str) -> bool:
+    s = line.strip()
+    return s == "" or s.startswith(COMMENT_PREFIXES)
+
+
+def ensure_newline(lines: List[str]) -> None:
+    """Make sure that the last line in ``lines`` (if any) ends with a newline"""
+    if lines and not lines[-1].endswith(("\n", "\r")):
+        lines[-1] += "\n"
+
+
+@attr.s
+class IniEntry:
+    """
+    A key & its value (including any continuation lines), or (if `key` is
+    `None`) a run of blank and/or comment lines
+    """
+
+    key: Optional[str] = attr.ib()
+    lines: List[str] = attr.ib()
+
+    @classmethod
+    def new(cls, key: str, value: str) -> "IniEntry":
+        entry = cls(key=key, lines=[])
+        entry.set_value(value)
+        return entry
+
+    @property
+    def value(self) -> str:
+        """
+        The entry's value, with comment lines removed and continuation lines
+        stripped & joined by newlines, as returned by `configparser`
+        """
+        if self.key is None:
+            raise ValueError("Blank & comment lines do not have a value")
+        m = KEY_RGX.match(self.lines[0])
+        assert m
+        parts = [m.group("value")]
+        for line in self.lines[1:]:
+            s = line.strip()
+            if not s.startswith(COMMENT_PREFIXES):
+                parts.append(s)
+        return "\n".join(parts).rstrip()
+
+    def set_value(self, value: str) -> None:
+        """
+        Replace the entry's value.  If ``value`` contains newlines, each line
+        after the first is written as an indented continuation line.  The
+        key's spelling and its separator are preserved.
+        """
+        if self.key is None:
+            raise ValueError("Blank & comment lines do not have a value")
+        sep = " = "
+        indent = DEFAULT_INDENT
+        if self.lines:
+            m = KEY_RGX.match(self.lines[0])
+            assert m
+            key = m.group("key")
+            sep = m.group("sep") or sep
+            indent = self.get_indent()
+        else:
+            key = self.key
+        first, *rest = value.split("\n")
+        if first:
+            lines = [key + sep + first + "\n"]
+        else:
+            lines = [key + sep.rstrip() + "\n"]
+        lines.extend(indent + ln + "\n" if ln else "\n" for ln in rest)
+        self.lines = lines
+
+    def prepend_to_first_item(self, text: str) -> None:
+        """
+        Insert ``text`` at the start of the entry's value, e.g., to add an
+        element to the front of a list value.  Only the line on which the
+        value starts is rewritten, so comment lines are preserved.
+        """
+        if self.key is None:
+            raise ValueError("Blank & comment lines do not have a value")
+        m = KEY_RGX.match(self.lines[0])
+        assert m
+        if m.group("value"):
+            i = m.start("value")
+            self.lines[0] = self.lines[0][:i] + text + self.lines[0][i:]
+            return
+        for i, line in enumerate(self.lines[1:], start=1):
+            if not is_blank_or_comment(line):
+                indent = len(line) - len(line.lstrip())
+                self.lines[i] = line[:indent] + text + line[indent:]
+                return
+        self.lines[0] = m.group("key") + m.group("sep").rstrip() + " " + text + "\n"
+
+    def get_indent(self) -> str:
+        """
+        Return the indentation of the first continuation line, or
+        `DEFAULT_INDENT` if there are none
+        """
+        for line in self.lines[1:]:
+            if line.strip():
+                return line[: len(line) - len(line.lstrip())]
+        return DEFAULT_INDENT
+
+    def append_line(self, item: str) -> None:
+        """
+        Append ``item`` to the entry's value as a new continuation line, e.g.,
+        to add an element to a list value
+        """
+        if self.key is None:
+            raise ValueError("Blank & comment lines do not have a value")
+        indent = self.get_indent()
+        ensure_newline(self.lines)
+        self.lines.append(indent + item + "\n")
+
+    def __str__(self) -> str:
+        return "".join(self.lines)
+
+
+@attr.s
+class IniSection:
+    """
+    A section of an INI file.  The section with `name` `None` holds any lines
+    before the first section header.
+    """
+
+    name: Optional[str] = attr.ib()
+    #: The section header line
+    header: str = attr.ib()
+    entries: List[IniEntry] = attr.ib(factory=list)
+    #: Mapping from lowercased keys to their entries, built on demand
+    _index: Optional[Dict[str, IniEntry]] = attr.ib(
+        default=None, init=False, repr=False, eq=False
+    )
+
+    @classmethod
+    def new(cls, name: str) -> "IniSection":
+        return cls(name=name, header=f"[{name}]\n")
+
+    @property
+    def index(self) -> Dict[str, IniEntry]:
+        if self._index is None:
+            self._index = {}
+            for entry in self.entries:
+                if entry.key is not None:
+                    self._index.setdefault(entry.key.lower(), entry)
+        return self._index
+
+    def get(self, key: str) -> Optional[IniEntry]:
+        return self.index.get(key.lower())
+
+    def __getitem__(self, key: str) -> IniEntry:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key: str) -> bool:
+        return key.lower() in self.index
+
+    def keys(self) -> Iterator[str]:
+        for entry in self.entries:
+            if entry.key is not None:
+                yield entry.key
+
+    def set(self, key: str, value: str) -> IniEntry:
+        """
+        Set the value of ``key``, adding it after the last key in the section
+        if it is not already present
+        """
+        entry = self.get(key)
+        if entry is not None:
+            entry.set_value(value)
+            return entry
+        entry = IniEntry.new(key, value)
+        i = len(self.entries)
+        while i > 0 and self.entries[i - 1].key is None:
+            i -= 1
+        if i > 0:
+            ensure_newline(self.entries[i - 1].lines)
+        self.entries.insert(i, entry)
+        self.index.setdefault(key.lower(), entry)
+        return entry
+
+    def replace(self, old_key: str, key: str, value: str) -> IniEntry:
+        """
+        Replace the entry for ``old_key`` with a new entry for ``key`` at the
+        same position
+
+        :raises KeyError: if ``old_key`` is not present
+        """
+        old = self[old_key]
+        entry = IniEntry.new(key, value)
+        i = next(i for i, e in enumerate(self.entries) if e is old)
+        self.entries[i] = entry
+        self._index = None
+        return entry
+
+    def delete(self, key: str) -> None:
+        """
+        :raises KeyError: if ``key`` is not present
+        """
+        old = self[key]
+        self.entries = [e for e in self.entries if e is not old]
+        self._index = None
+
+    def ends_with_blank(self) -> bool:
+        if self.entries:
+            last = self.entries[-1]
+            return last.key is None and last.lines[-1].strip() == ""
+        return False
+
+    def append_blank(self) -> None:
+        """Append a blank line to the end of the section"""
+        if self.entries:
+            ensure_newline(self.entries[-1].lines)
+        elif self.header and not self.header.endswith("\n"):
+            self.header += "\n"
+        if self.entries and self.entries[-1].key is None:
+            self.entries[-1].lines.append("\n")
+        else:
+            self.entries.append(IniEntry(key=None, lines=["\n"]))
+
+    def __str__(self) -> str:
+        return self.header + "".join(map(str, self.entries))
+
+
+@attr.s
+class IniDocument:
+    sections: List[IniSection] = attr.ib(factory=list)
+    #: Mapping from section names to sections, built on demand
+    _index: Optional[Dict[str, IniSection]] = attr.ib(
+        default=None, init=False, repr=False, eq=False
+    )
+
+    @classmethod
+    def parse(cls, text: str) -> "IniDocument":
+        sections: List[IniSection] = []
+        section: Optional[IniSection] = None
+        entries: List[IniEntry] = []
+        # The key whose value is open, i.e., can still be continued:
+        current: Optional[IniEntry] = None
+        # Blank & comment lines seen while `current` is open; they are part
+        # of its value if an indented line follows:
+        pending: List[str] = []
+        trivia: List[str] = []
+
+        def close() -> None:
+            nonlocal current, trivia
+            if current is not None:
+                trivia = pending[:]
+                pending.clear()
+                current = None
+            if trivia:
+                entries.append(IniEntry(key=None, lines=trivia))
+                trivia = []
+
+        for line in text.splitlines(keepends=True):
+            if (
+                current is not None
+                and is_blank_or_comment(line)
+                and (pending or not line[:1].isspace() or not line.strip())
+            ):
+                pending.append(line)
+            elif current is not None and line[:1].isspace():
+                current.lines.extend(pending)
+                pending.clear()
+                current.lines.append(line)
+            elif is_blank_or_comment(line):
+                close()
+                trivia.append(line)
+            else:
+                m = SECTION_RGX.match(line)
+                if m:
+                    close()
+                    if section is not None:
+                        sections.append(section)
+                    elif entries:
+                        sections.append(IniSection(None, "", entries))
+                    section = IniSection(m.group("name"), line)
+                    entries = section.entries
+                    continue
+                close()
+                m = KEY_RGX.match(line)
+                if m:
+                    current = IniEntry(key=m.group("key"), lines=[line])
+                    entries.append(current)
+                else:
+                    # Not valid INI; kept verbatim so that it round-trips
+                    trivia.append(line)
+        close()
+        if section is not None:
+            sections.append(section)
+        elif entries:
+            sections.append(IniSection(None, "", entries))
+        return cls(sections)
+
+    @property
+    def index(self) -> Dict[str, IniSection]:
+        if self._index is None:
+            self._index = {}
+            for sect in self.sections:
+                if sect.name is not None:
+                    self._index.setdefault(sect.name, sect)
+        return self._index
+
+    def get(self, name: str) -> Optional[IniSection]:
+        return self.index.get(name)
+
+    def __getitem__(self, name: str) -> IniSection:
+        sect = self.get(name)
+        if sect is None:
+            raise KeyError(name)
+        return sect
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def add_section(
+        self, section: IniSection, after: Optional[str] = None
+    ) -> IniSection:
+        """
+        Insert ``section`` after the section named ``after`` (default: at the
+        end of the document), adding blank lines as needed so that it is
+        separated from its neighbors by a blank line
+
+        :raises KeyError: if ``after`` is given and there is no such section
+        """
+        if after is None:
+            i = len(self.sections)
+        else:
+            prev = self[after]
+            i = next(i for i, s in enumerate(self.sections) if s is prev) + 1
+        if i > 0 and not self.sections[i - 1].ends_with_blank():
+            self.sections[i - 1].append_blank()
+        if i < len(self.sections) and not section.ends_with_blank():
+            section.append_blank()
+        self.sections.insert(i, section)
+        if section.name is not None:
+            self.index.setdefault(section.name, section)
+        return section
+
+    def __str__(self) -> str:
+        return "".join(map(str, self.sections))
@@ -1,22 +1,58 @@
 import ast
 from configparser import ConfigParser
+import json
+import logging
 from pathlib import Path
 import re
+import subprocess
 import time
+from typing import List, Optional, Set, Tuple
 from intspan import intspan
 from read_version import read_version
-from setuptools.config import read_configuration
 import yaml
 from . import util  # Import module to keep mocking easy
+from .doctests import has_doctests
+from .gitmeta import GitMetadata, GitMetadataError
+from .gitrepo import GitRepo
+from .inspection_cache import InspectionCache
 from .readme import Readme
+from .setupcfg import read_setup_cfg
 
+log = logging.getLogger(__name__)
 
-def inspect_project(dirpath=None):
-    """Fetch various information about an already-initialized project"""
+DOCTEST_CACHE_FILENAME = "doctests.json"
+COMMIT_YEARS_CACHE_FILENAME = "commit-years.json"
+
+
+def inspect_project(dirpath=None, use_cache=False):
+    """
+    Fetch various information about an already-initialized project.  If
+    ``use_cache`` is true, the result is cached in the project's :file:`.git`
+    directory, and a previously-cached result is returned if none of the files
+    that it was computed from have changed.
+    """
     if dirpath is None:
         dirpath = Path()
     else:
         dirpath = Path(dirpath)
+    cache = InspectionCache.for_project(dirpath) if use_cache else None
+    if cache is not None:
+        env = cache.load()
+        if env is not None:
+            return env
+        stamps = cache.snapshot()
+    env = scan_project(dirpath, use_cache=use_cache)
+    if cache is not None:
+        cache.save(stamps, env)
+    return env
+
+
+def scan_project(dirpath: Path, use_cache: bool = False):
+    """
+    Compute the return value of `inspect_project()` without consulting its
+    cache.  ``use_cache`` controls whether the doctest scan caches its
+    per-file results.
+    """
 
     def exists(*fname):
         return Path(dirpath, *fname).exists()
@@ -28,7 +64,7 @@ def inspect_project(dirpath=None):
     if not exists("src"):
         raise InvalidProjectError("Project does not have src/ layout")
 
-    cfg = read_configuration(str(dirpath / "setup.cfg"))
+    cfg = read_setup_cfg(dirpath / "setup.cfg")
     env = {
         "name": cfg["metadata"]["name"],
         "short_description": cfg["metadata"]["description"],
@@ -36,18 +72,13 @@ def inspect_project(dirpath=None):
         "author_email": cfg["metadata"]["author_email"],
         "python_requires": util.sort_specifier(cfg["options"]["python_requires"]),
         "install_requires": cfg["options"].get("install_requires", []),
-        # Until <https://github.com/pypa/setuptools/issues/2575> is fixed, we
-        # have to determine versions via read_version() instead of
-        # read_configuration().
-        # "version": cfg["metadata"].get("version"),
+        # read_setup_cfg() does not evaluate `attr:` directives, so versions
+        # are determined via read_version() instead.
         "keywords": cfg["metadata"].get("keywords", []),
         "supports_pypy3": False,
         "default_branch": get_default_branch(dirpath),
     }
 
-    # if env["version"] is None:
-    #    raise InvalidProjectError("Cannot determine project version")
-
     if cfg["options"].get("packages"):
         env["is_flat_module"] = False
         env["import_name"] = cfg["options"]["packages"][0]
@@ -97,64 +128,147 @@ def inspect_project(dirpath=None):
     else:
         env["rtfd_name"] = env["name"]
 
-    toxcfg = ConfigParser(interpolation=None)
-    toxcfg.read(str(dirpath / "tox.ini"))  # No-op when tox.ini doesn't exist
-    env["has_tests"] = toxcfg.has_section("testenv")
-
-    env["has_doctests"] = False
-    for pyfile in (dirpath / "src").rglob("*.py"):
-        if re.search(r"^\s*>>>\s+", pyfile.read_text(), flags=re.M):
-            env["has_doctests"] = True
-            break
-
+    env["has_tests"] = has_testenv(dirpath / "tox.ini")
+    env["has_doctests"] = find_doctests(dirpath, use_cache)
     env["has_typing"] = exists("src", env["import_name"], "py.typed")
     env["has_ci"] = exists(".github", "workflows", "test.yml")
     env["has_docs"] = exists("docs", "index.rst")
 
-    env["codecov_user"] = env["github_user"]
+    codecov_user, env["has_pypi"] = parse_readme_links(dirpath / "README.rst")
+    env["codecov_user"] = codecov_user or env["github_user"]
+    env["copyright_years"] = get_license_years(dirpath / "LICENSE")
+    env["extra_testenvs"] = parse_extra_testenvs(
+        dirpath / ".github" / "workflows" / "test.yml"
+    )
+
+    return env
+
+
+def has_testenv(filepath: Path) -> bool:
+    """Test whether the given :file:`tox.ini` file has a ``[testenv]``"""
+    toxcfg = ConfigParser(interpolation=None)
+    toxcfg.read(str(filepath))  # No-op when tox.ini doesn't exist
+    return toxcfg.has_section("testenv")
+
+
+def find_doctests(dirpath: Path, use_cache: bool = False) -> bool:
+    """
+    Test whether any Python source files under the project's :file:`src/`
+    have doctests.  If ``use_cache`` is true, per-file results are cached in
+    the project's :file:`.git` directory.
+    """
+    cache_file = None
+    if use_cache and (dirpath / ".git").is_dir():
+        cache_file = dirpath / ".git" / "pyrepo" / DOCTEST_CACHE_FILENAME
+    return has_doctests(dirpath / "src", cache_file=cache_file)
+
+
+def parse_readme_links(filepath: Path) -> Tuple[Optional[str], bool]:
+    """
+    Parse the header of the given :file:`README.rst` file and return a pair of
+    the Codecov username used in its badges (or `None` if there is no Codecov
+    badge) and whether it links to PyPI
+    """
     try:
-        with (dirpath / "README.rst").open(encoding="utf-8") as fp:
-            rdme = Readme.parse(fp)
+        with filepath.open(encoding="utf-8") as fp:
+            rdme = Readme.parse_header(fp)
     except FileNotFoundError:
-        env["has_pypi"] = False
-    else:
-        for badge in rdme.badges:
-            m = re.fullmatch(
-                r"https://codecov\.io/gh/([^/]+)/[^/]+/branch/.+" r"/graph/badge\.svg",
-                badge.href,
-            )
-            if m:
-                env["codecov_user"] = m.group(1)
-        env["has_pypi"] = any(link["label"] == "PyPI" for link in rdme.header_links)
+        return (None, False)
+    codecov_user = None
+    for badge in rdme.badges:
+        m = re.fullmatch(
+            r"https://codecov\.io/gh/([^/]+)/[^/]+/branch/.+" r"/graph/badge\.svg",
+            badge.href,
+        )
+        if m:
+            codecov_user = m.group(1)
+    has_pypi = any(link["label"] == "PyPI" for link in rdme.header_links)
+    return (codecov_user, has_pypi)
+
 
-    with (dirpath / "LICENSE").open(encoding="utf-8") as fp:
+def get_license_years(filepath: Path) -> List[int]:
+    """Return the copyright years listed in the given :file:`LICENSE` file"""
+    with filepath.open(encoding="utf-8") as fp:
         for line in fp:
             m = re.match(r"^Copyright \(c\) (\d[-,\d\s]+\d) \w+", line)
             if m:
-                env["copyright_years"] = list(intspan(m.group(1)))
-                break
-        else:
-            raise InvalidProjectError("Copyright years not found in LICENSE")
+                return list(intspan(m.group(1)))
+    raise InvalidProjectError("Copyright years not found in LICENSE")
+
+
+def get_commit_years(dirpath, include_now=True, use_cache=False):
+    """
+    Return a sorted list of the years in which commits were authored in the
+    Git repository at ``dirpath``, including the current year if
+    ``include_now`` is true.
+
+    If ``use_cache`` is true, the set of years is cached in the repository's
+    :file:`.git` directory along with the commit that was ``HEAD`` at the time,
+    and later calls only examine the commits added since then (or the whole
+    history if that commit is no longer an ancestor of ``HEAD``).
+    """
+    cache_file = Path(dirpath, ".git", "pyrepo", COMMIT_YEARS_CACHE_FILENAME)
+    if use_cache and cache_file.parent.parent.is_dir():
+        years = get_commit_years_cached(dirpath, cache_file)
+    elif GitRepo.for_directory(dirpath).head() is None:
+        # No commits yet, in which case `git log` fails
+        years = set()
+    else:
+        years = log_commit_years(dirpath)
+    if include_now:
+        years.add(time.localtime().tm_year)
+    return sorted(years)
 
-    env["extra_testenvs"] = parse_extra_testenvs(
-        dirpath / ".github" / "workflows" / "test.yml"
-    )
 
-    return env
+def get_commit_years_cached(dirpath, cache_file: Path) -> Set[int]:
+    head = GitRepo.for_directory(dirpath).head()
+    if head is None:
+        # No commits yet
+        return set()
+    try:
+        with cache_file.open(encoding="utf-8") as fp:
+            cached = json.load(fp)
+        last_seen = cached["head"]
+        cached_years = set(cached["years"])
+    except (OSError, ValueError, KeyError, TypeError):
+        log.debug("No usable commit years cache; walking full history")
+        years = log_commit_years(dirpath)
+    else:
+        if last_seen == head:
+            log.debug("Commit years cache is up to date with HEAD")
+            return cached_years
+        elif is_ancestor(dirpath, last_seen, head):
+            log.debug("Walking commits %s..%s for commit years", last_seen, head)
+            years = cached_years | log_commit_years(dirpath, f"{last_seen}..{head}")
+        else:
+            log.debug("History was rewritten; walking full history for commit years")
+            years = log_commit_years(dirpath)
+    try:
+        util.write_json_atomic(cache_file, {"head": head, "years": sorted(years)})
+    except OSError as e:
+        log.debug("Could not write commit years cache: %s", e)
+    return years
 
 
-def get_commit_years(dirpath, include_now=True):
-    years = set(
-        map(
-            int,
-            util.readcmd(
-                "git", "log", "--format=%ad", "--date=format:%Y", cwd=dirpath
-            ).splitlines(),
+def log_commit_years(dirpath, *revs: str) -> Set[int]:
+    return {
+        int(year)
+        for year in GitRepo.for_directory(dirpath).log_lines(
+            "--format=%ad", "--date=format:%Y", *revs
         )
+        if year
+    }
+
+
+def is_ancestor(dirpath, commit1: str, commit2: str) -> bool:
+    """Test whether ``commit1`` is an ancestor of ``commit2``"""
+    r = subprocess.run(
+        ["git", "merge-base", "--is-ancestor", commit1, commit2],
+        cwd=str(dirpath),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
-    if include_now:
-        years.add(time.localtime().tm_year)
-    return sorted(years)
+    return r.returncode == 0
 
 
 def find_module(dirpath: Path):
@@ -257,11 +371,15 @@ def parse_extra_testenvs(filepath: Path):
 
 
 def get_default_branch(dirpath):
-    branches = set(
-        util.readcmd(
-            "git", "--no-pager", "branch", "--format=%(refname:short)", cwd=dirpath
-        ).splitlines()
-    )
+    try:
+        branches = GitMetadata.for_directory(dirpath).branches()
+    except GitMetadataError as e:
+        log.debug("Could not read Git metadata directly (%s); running git", e)
+        branches = set(
+            util.readcmd(
+                "git", "--no-pager", "branch", "--format=%(refname:short)", cwd=dirpath
+            ).splitlines()
+        )
     for guess in ["main", "master"]:
         if guess in branches:
             return guess
@@ -0,0 +1,196 @@
+"""
+On-disk cache for the results of `inspect_project()`
+
+The cache for a project is stored in :file:`.git/pyrepo/inspection.json` and
+records the stat information (mtime & size) and SHA-256 hash of every file
+that inspection reads.  A cached result is only reused if the same set of
+files exists and every file either has the same stat information as before
+or, failing that, the same contents.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import attr
+from . import __version__
+from .util import write_json_atomic
+
+log = logging.getLogger(__name__)
+
+CACHE_FILENAME = "inspection.json"
+
+#: Files (relative to the project directory) that are read by
+#: `inspect_project()` when they exist
+INPUT_FILES = [
+    "pyproject.toml",
+    "setup.cfg",
+    "tox.ini",
+    "README.rst",
+    "LICENSE",
+    ".github/workflows/test.yml",
+    "docs/index.rst",
+]
+
+#: Files (relative to the Git directory) that determine the repository's
+#: branches
+GIT_FILES = ["HEAD", "packed-refs"]
+
+#: Files modified less than this many nanoseconds before being stamped are
+#: always rehashed on the next lookup
+RACY_WINDOW_NS = 2_000_000_000
+
+#: An ``(mtime_ns, size, sha256)`` triple
+FileStamp = Tuple[int, int, str]
+
+
+@attr.s(auto_attribs=True)
+class InspectionCache:
+    #: The project directory
+    dirpath: Path
+    #: The directory in which the cache file is stored
+    cache_dir: Path
+
+    @classmethod
+    def for_project(cls, dirpath: Path) -> Optional["InspectionCache"]:
+        """
+        Return the cache for the project at ``dirpath``, or `None` if the
+        project does not have a :file:`.git` directory to store it in
+        """
+        gitdir = dirpath / ".git"
+        if not gitdir.is_dir():
+            return None
+        return cls(dirpath=dirpath, cache_dir=gitdir / "pyrepo")
+
+    @property
+    def cache_file(self) -> Path:
+        return self.cache_dir / CACHE_FILENAME
+
+    def input_files(self) -> List[str]:
+        """
+        Return the paths (relative to the project directory, with forward
+        slashes) of all existing files that the inspection result depends on
+        """
+        files = [f for f in INPUT_FILES if (self.dirpath / f).is_file()]
+        files.extend(self.walk("src", skip_dirs={"__pycache__"}))
+        files.extend(
+            f".git/{f}" for f in GIT_FILES if (self.dirpath / ".git" / f).is_file()
+        )
+        files.extend(self.walk(".git/refs/heads"))
+        return files
+
+    def walk(self, reldir: str, skip_dirs=frozenset()) -> List[str]:
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.dirpath / reldir):
+            dirnames[:] = sorted(d for d in dirnames if d not in skip_dirs)
+            relpath = Path(dirpath).relative_to(self.dirpath).as_posix()
+            files.extend(f"{relpath}/{fn}" for fn in sorted(filenames))
+        return files
+
+    def snapshot(self) -> Dict[str, FileStamp]:
+        """
+        Return the current stamps of the input files, to be passed to `save()`
+        after inspecting
+        """
+        stamps = {}
+        for relpath in self.input_files():
+            path = self.dirpath / relpath
+            try:
+                st = path.stat()
+                stamps[relpath] = (stable_mtime(st), st.st_size, sha256_file(path))
+            except FileNotFoundError:
+                # Deleted since the directory walk
+                continue
+        return stamps
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached inspection result if it is still valid, or `None`
+        otherwise
+        """
+        try:
+            with self.cache_file.open(encoding="utf-8") as fp:
+                cached = json.load(fp)
+        except FileNotFoundError:
+            return self.miss("no cache file")
+        except ValueError:
+            return self.miss("cache file is corrupt")
+        if not isinstance(cached, dict):
+            return self.miss("cache file is corrupt")
+        if cached.get("pyrepo_version") != __version__:
+            return self.miss("cache was written by a different pyrepo version")
+        stamps = cached.get("files")
+        if not isinstance(stamps, dict) or not isinstance(cached.get("data"), dict):
+            return self.miss("cache file is corrupt")
+        files = self.input_files()
+        if sorted(files) != sorted(stamps):
+            return self.miss("set of input files changed")
+        updated = False
+        rehashed = 0
+        for relpath in files:
+            try:
+                mtime, size, digest = stamps[relpath]
+            except (TypeError, ValueError):
+                return self.miss("cache file is corrupt")
+            try:
+                st = (self.dirpath / relpath).stat()
+                if (st.st_mtime_ns, st.st_size) == (mtime, size):
+                    continue
+                rehashed += 1
+                newdigest = sha256_file(self.dirpath / relpath)
+            except FileNotFoundError:
+                return self.miss(f"{relpath} was deleted")
+            if st.st_size != size or newdigest != digest:
+                return self.miss(f"{relpath} changed")
+            # Only the mtime changed; record it so that the file doesn't need
+            # to be rehashed next time
+            stamps[relpath] = [stable_mtime(st), st.st_size, digest]
+            updated = True
+        log.debug(
+            "Inspection cache hit for %s: %d files checked, %d rehashed",
+            self.dirpath,
+            len(files),
+            rehashed,
+        )
+        if updated:
+            self.write(cached)
+        return cached["data"]
+
+    def save(self, stamps: Dict[str, FileStamp], data: Dict[str, Any]) -> None:
+        """
+        Store an inspection result in the cache along with the stamps of its
+        input files as returned by `snapshot()` before inspecting
+        """
+        self.write({"pyrepo_version": __version__, "files": stamps, "data": data})
+
+    def write(self, cached: Dict[str, Any]) -> None:
+        try:
+            write_json_atomic(self.cache_file, cached)
+        except OSError as e:
+            log.debug("Could not write inspection cache: %s", e)
+
+    def miss(self, reason: str) -> None:
+        log.debug("Inspection cache miss for %s: %s", self.dirpath, reason)
+        return None
+
+
+def stable_mtime(st: os.stat_result) -> int:
+    """
+    Return the mtime of a file to record in its stamp.  If the file was
+    modified very recently, it could be modified again within the same mtime
+    tick without us noticing, so 0 is returned to force a rehash next time.
+    """
+    if time.time() * 1e9 - st.st_mtime_ns < RACY_WINDOW_NS:
+        return 0
+    return st.st_mtime_ns
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,20 +1,40 @@
 from contextlib import suppress
+from enum import Enum
+from io import StringIO
 import logging
 from pathlib import Path
 import re
 from shutil import rmtree
 import sys
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 import attr
-from in_place import InPlace
 from .changelog import Changelog
+from .filecache import FileCache
+from .inifile import IniDocument, IniSection
 from .inspecting import inspect_project
-from .util import get_jinja_env, runcmd, split_ini_sections
+from .template_cache import render_blocks
+from .util import get_jinja_env, runcmd
 
 log = logging.getLogger(__name__)
 
 CHANGELOG_NAMES = ("CHANGELOG.md", "CHANGELOG.rst")
 
+#: The result of `Project.write_template()` for a file that is written
+WriteStatus = Enum("WriteStatus", "CREATED CHANGED UNCHANGED")
+
+
+def get_write_status(current: Optional[bytes], data: bytes) -> WriteStatus:
+    """
+    Return the status of writing ``data`` to a file whose current contents
+    are ``current`` (`None` if the file does not exist)
+    """
+    if current is None:
+        return WriteStatus.CREATED
+    elif current == data:
+        return WriteStatus.UNCHANGED
+    else:
+        return WriteStatus.CHANGED
+
 
 @attr.s(auto_attribs=True)
 class Project:
@@ -64,13 +84,34 @@ class Project:
     copyright_years: List[int]
     default_branch: str
 
+    # The remaining attributes are not context variables.
+
+    #: Changelogs loaded by `get_changelog()` during this run, keyed by the
+    #: value of its ``docs`` argument
+    changelogs: Dict[bool, "ChangelogFile"] = attr.ib(
+        init=False, factory=dict, repr=False
+    )
+
+    #: Cache of the project files read & modified during this run; edits made
+    #: by `Project` methods are only written to disk by `flush()`
+    files: FileCache = attr.ib(
+        init=False,
+        default=attr.Factory(lambda self: FileCache(self.directory), takes_self=True),
+        repr=False,
+    )
+
+    #: INI files parsed by `get_ini()` during this run, keyed by path
+    ini_files: Dict[str, IniDocument] = attr.ib(init=False, factory=dict, repr=False)
+
     @classmethod
-    def from_directory(cls, dirpath=None):
+    def from_directory(cls, dirpath=None, use_cache=False):
         if dirpath is None:
             directory = Path()
         else:
             directory = Path(dirpath)
-        return cls.from_inspection(directory, inspect_project(directory))
+        return cls.from_inspection(
+            directory, inspect_project(directory, use_cache=use_cache)
+        )
 
     @classmethod
     def from_inspection(cls, directory, context):
@@ -84,83 +125,263 @@ class Project:
             return self.directory / "src" / self.import_name / "__init__.py"
 
     def get_template_context(self):
-        context = attr.asdict(self)
+        context = attr.asdict(self, filter=lambda a, _: a.init)
         context.pop("directory")
         return context
 
-    def render_template(self, template_path, jinja_env):
+    def render_template(self, template_path, jinja_env, context=None):
+        if context is None:
+            context = self.get_template_context()
         return (
-            jinja_env.get_template(template_path + ".j2")
-            .render(self.get_template_context())
-            .rstrip()
+            jinja_env.get_template(template_path + ".j2").render(context).rstrip()
             + "\n"
         )
 
-    def write_template(self, template_path, jinja_env, force=True):
+    def write_template(
+        self, template_path, jinja_env, force=True, dry_run=False
+    ) -> Optional[WriteStatus]:
+        """
+        Render the given template and write it to the corresponding file in
+        the project, unless the file already contains exactly the rendered
+        output (in which case it is left untouched) or it exists and ``force``
+        is false (in which case `None` is returned).  If ``dry_run`` is true,
+        nothing is written, but the status that writing would have is still
+        returned.
+        """
         outpath = self.directory / template_path
         if not force and outpath.exists():
-            return
-        log.info("Writing %s ...", template_path)
-        outpath.parent.mkdir(parents=True, exist_ok=True)
-        outpath.write_text(
+            return None
+        return self.write_rendered(
+            template_path,
             self.render_template(template_path, jinja_env),
-            encoding="utf-8",
+            dry_run=dry_run,
         )
 
+    def write_rendered(
+        self,
+        template_path: str,
+        content: str,
+        dry_run: bool = False,
+        status: Optional[WriteStatus] = None,
+    ) -> WriteStatus:
+        """
+        Write the rendered ``content`` of the given template to the
+        corresponding file in the project if it differs from the file's
+        current contents.  If the caller has already compared the two (see
+        `get_write_status()`), the result can be passed as ``status`` so that
+        the file is not read again.
+        """
+        data = content.encode("utf-8")
+        outpath = self.directory / template_path
+        if status is None:
+            try:
+                current: Optional[bytes] = outpath.read_bytes()
+            except FileNotFoundError:
+                current = None
+            status = get_write_status(current, data)
+        if status is WriteStatus.UNCHANGED:
+            log.debug("%s is already up to date", template_path)
+        elif not dry_run:
+            log.info("Writing %s ...", template_path)
+            outpath.parent.mkdir(parents=True, exist_ok=True)
+            outpath.write_bytes(data)
+        return status
+
+    def get_templated_files(self) -> List[str]:
+        """
+        Return the paths of the files in the project that are generated from
+        templates and kept in sync with them, based on the project's features.
+        Files that are only created from a template by ``pyrepo init`` and
+        then edited by hand (:file:`README.rst`, :file:`LICENSE`, and
+        :file:`docs/index.rst`) are not included.
+        """
+        files = [
+            ".gitignore",
+            ".pre-commit-config.yaml",
+            "MANIFEST.in",
+            "pyproject.toml",
+            "setup.cfg",
+            "tox.ini",
+        ]
+        if self.has_ci:
+            files.append(".github/workflows/test.yml")
+        if self.has_docs:
+            files.extend([".readthedocs.yml", "docs/conf.py", "docs/requirements.txt"])
+        return files
+
+    def render_templates(self, template_paths: List[str], jinja_env) -> Dict[str, str]:
+        """
+        Render multiple templates, all from a single computation of the
+        template context, and return a `dict` mapping each template path to
+        its rendered output
+        """
+        context = self.get_template_context()
+        return {
+            path: self.render_template(path, jinja_env, context)
+            for path in template_paths
+        }
+
+    def write_templates(
+        self, template_paths: List[str], jinja_env, dry_run: bool = False
+    ) -> Dict[str, WriteStatus]:
+        """
+        Render the given templates with `render_templates()` and then write
+        each output that differs from the current file contents, returning
+        a `dict` mapping each template path to its `WriteStatus`.  Nothing is
+        written if any template fails to render.
+        """
+        rendered = self.render_templates(template_paths, jinja_env)
+        return {
+            path: self.write_rendered(path, content, dry_run=dry_run)
+            for path, content in rendered.items()
+        }
+
     def get_template_block(self, template_name, block_name, jinja_env):
-        tmpl = jinja_env.get_template(template_name)
-        context = tmpl.new_context()
-        return "".join(tmpl.blocks[block_name](context))
+        return self.get_template_blocks(template_name, [block_name], jinja_env)[
+            block_name
+        ]
+
+    def get_template_blocks(
+        self, template_name: str, block_names: List[str], jinja_env
+    ) -> Dict[str, str]:
+        """
+        Render several blocks from the same template in one pass, returning a
+        `dict` mapping block names to their output.  Results are cached on
+        ``jinja_env``.
+        """
+        return render_blocks(jinja_env, template_name, block_names)
 
     def set_version(self, version):
         log.info("Setting __version__ to %r ...", version)
-        with InPlace(self.initfile, mode="t", encoding="utf-8") as fp:
-            for line in fp:
-                # Preserve quotation marks around version:
-                m = re.fullmatch(
-                    r'__version__\s*=\s*([\x27"])(?P<version>.+)\1\s*',
-                    line,
+        fp = StringIO()
+        for line in self.files.read_text(self.initfile).splitlines(keepends=True):
+            # Preserve quotation marks around version:
+            m = re.fullmatch(
+                r'__version__\s*=\s*([\x27"])(?P<version>.+)\1\s*',
+                line,
+            )
+            if m:
+                line = (
+                    line[: m.start("version")] + str(version) + line[m.end("version") :]
                 )
-                if m:
-                    line = (
-                        line[: m.start("version")]
-                        + str(version)
-                        + line[m.end("version") :]
-                    )
-                print(line, file=fp, end="")
+            print(line, file=fp, end="")
+        self.files.write_text(self.initfile, fp.getvalue())
         self.version = version
 
-    def get_changelog(self, docs: bool = False) -> Optional[Changelog]:
-        if docs:
-            paths = [Path("docs", "changelog.rst")]
+    def get_changelog(
+        self, docs: bool = False, max_sections: Optional[int] = None
+    ) -> Optional[Changelog]:
+        """
+        Load the project's changelog (or the changelog in the docs, if
+        ``docs`` is true), or return `None` if it does not exist.  If
+        ``max_sections`` is given, only that many sections are parsed; see
+        `Changelog.load()`.
+
+        Each changelog file is only read once per `Project` instance; later
+        calls return the same `Changelog` object (with any modifications made
+        to it), parsing more of it if needed.
+        """
+        try:
+            cached = self.changelogs[docs]
+        except KeyError:
+            cached = self.changelogs[docs] = self.load_changelog(docs, max_sections)
         else:
-            paths = CHANGELOG_NAMES
-        for p in paths:
+            chlog = cached.changelog
+            if (
+                chlog is not None
+                and chlog.tail
+                and (max_sections is None or max_sections > len(chlog.sections))
+            ):
+                chlog.load_tail()
+        return cached.changelog
+
+    def load_changelog(
+        self, docs: bool, max_sections: Optional[int] = None
+    ) -> "ChangelogFile":
+        for p in self.changelog_paths(docs):
             try:
-                with (self.directory / p).open(encoding="utf-8") as fp:
-                    return Changelog.load(fp)
+                text = self.files.read_text(p)
             except FileNotFoundError:
                 continue
-        return None
+            chlog = Changelog.load(StringIO(text), max_sections=max_sections)
+            log.debug("Loaded changelog from %s", p)
+            return ChangelogFile(path=p, changelog=chlog)
+        return ChangelogFile(path=None, changelog=None)
 
     def set_changelog(self, value: Optional[Changelog], docs: bool = False) -> None:
+        """
+        Set the project's changelog (or the changelog in the docs, if ``docs``
+        is true), or delete it if ``value`` is `None`.  The change is not
+        written to disk until `flush()` is called.
+        """
+        try:
+            cached = self.changelogs[docs]
+        except KeyError:
+            path = None
+            for p in self.changelog_paths(docs):
+                if self.files.exists(p):
+                    path = p
+                    break
+            cached = self.changelogs[docs] = ChangelogFile(path=path, changelog=None)
+        cached.changelog = value
+        cached.dirty = True
+
+    def flush_changelogs(self) -> None:
+        """Store all changelogs modified by `set_changelog()` in `files`"""
+        for docs, cached in self.changelogs.items():
+            if not cached.dirty:
+                continue
+            if cached.changelog is None:
+                if cached.path is not None:
+                    self.files.delete(cached.path)
+                    cached.path = None
+            else:
+                if cached.path is None:
+                    cached.path = self.changelog_paths(docs)[0]
+                self.files.write_text(cached.path, str(cached.changelog))
+            cached.dirty = False
+
+    def get_ini(self, path: str) -> IniDocument:
+        """
+        Parse the INI file (e.g., :file:`setup.cfg` or :file:`tox.ini`) at the
+        given path in the project.  Each file is only parsed once per
+        `Project` instance; modifications made to the returned document are
+        written out by `flush()`.
+        """
+        try:
+            return self.ini_files[path]
+        except KeyError:
+            doc = self.ini_files[path] = IniDocument.parse(self.files.read_text(path))
+            return doc
+
+    def flush_ini_files(self) -> None:
+        """Store the INI documents returned by `get_ini()` in `files`"""
+        for path, doc in self.ini_files.items():
+            self.files.write_text(path, str(doc))
+
+    def flush(self) -> List[Path]:
+        """
+        Write all files modified by `Project` methods to disk, each one
+        atomically, and return their paths relative to the project directory
+        """
+        self.flush_changelogs()
+        self.flush_ini_files()
+        return self.files.flush()
+
+    def get_diff(self) -> str:
+        """
+        Return a unified diff of all modifications that `flush()` would write
+        """
+        self.flush_changelogs()
+        self.flush_ini_files()
+        return self.files.diff()
+
+    @staticmethod
+    def changelog_paths(docs: bool) -> Sequence[Path]:
         if docs:
-            paths = [Path("docs", "changelog.rst")]
+            return [Path("docs", "changelog.rst")]
         else:
-            paths = CHANGELOG_NAMES
-        for p in paths:
-            fpath = self.directory / p
-            if fpath.exists():
-                if value is None:
-                    fpath.unlink()
-                else:
-                    with fpath.open("w", encoding="utf-8") as fp:
-                        value.save(fp)
-                return
-        if value is not None:
-            fpath = self.directory / paths[0]
-            with fpath.open("w", encoding="utf-8") as fp:
-                value.save(fp)
+            return [Path(p) for p in CHANGELOG_NAMES]
 
     def build(self, sdist=True, wheel=True, clean=False):
         if clean:
@@ -182,7 +403,6 @@ class Project:
             return
         log.info("Unflattening project ...")
         pkgdir = self.directory / "src" / self.import_name
-        pkgdir.mkdir(parents=True, exist_ok=True)
         old_initfile = self.initfile
         new_initfile = pkgdir / "__init__.py"
         log.info(
@@ -190,85 +410,68 @@ class Project:
             old_initfile.relative_to(self.directory),
             new_initfile.relative_to(self.directory),
         )
-        old_initfile.rename(new_initfile)
+        self.files.rename(old_initfile, new_initfile)
         log.info("- Updating setup.cfg ...")
-        with InPlace(
-            self.directory / "setup.cfg",
-            mode="t",
-            encoding="utf-8",
-        ) as fp:
-            in_options = False
-            for ln in fp:
-                if re.match(r"^py_modules\s*=", ln):
-                    ln = "packages = find:\n"
-                print(ln, end="", file=fp)
-                if ln == "[options]\n":
-                    in_options = True
-                elif in_options and ln.isspace():
-                    print("[options.packages.find]", file=fp)
-                    print("where = src", file=fp)
-                    print("", file=fp)
-                    in_options = False
-            if in_options:
-                print("", file=fp)
-                print("[options.packages.find]", file=fp)
-                print("where = src", file=fp)
+        cfg = self.get_ini("setup.cfg")
+        options = cfg.get("options")
+        if options is not None:
+            if "py_modules" in options:
+                options.replace("py_modules", "packages", "find:")
+            if "options.packages.find" not in cfg:
+                find = IniSection.new("options.packages.find")
+                find.set("where", "src")
+                cfg.add_section(find, after="options")
         self.is_flat_module = False
 
     def add_typing(self):
         log.info("Adding typing configuration ...")
         self.unflatten()
         log.info("Creating src/%s/py.typed ...", self.import_name)
-        (self.directory / "src" / self.import_name / "py.typed").touch()
+        self.files.touch(Path("src", self.import_name, "py.typed"))
         jenv = get_jinja_env()
         log.info("Updating setup.cfg ...")
-        with InPlace(
-            self.directory / "setup.cfg",
-            mode="t",
-            encoding="utf-8",
-        ) as fp:
-            in_classifiers = False
-            for ln in fp:
-                if re.match(r"^classifiers\s*=", ln):
-                    in_classifiers = True
-                elif ln.isspace():
-                    if in_classifiers:
-                        print("    Typing :: Typed", file=fp)
-                    in_classifiers = False
-                print(ln, end="", file=fp)
-            if in_classifiers:
-                print("Typing :: Typed", file=fp)
-            print(file=fp)
-            print(
-                self.get_template_block("setup.cfg.j2", "mypy", jenv),
-                end="",
-                file=fp,
-            )
+        cfg = self.get_ini("setup.cfg")
+        metadata = cfg.get("metadata")
+        if metadata is not None and "classifiers" in metadata:
+            metadata["classifiers"].append_line("Typing :: Typed")
+        mypy = IniDocument.parse(self.get_template_block("setup.cfg.j2", "mypy", jenv))
+        for sect in mypy.sections:
+            cfg.add_section(sect)
         if self.has_tests:
             log.info("Updating tox.ini ...")
-            toxfile = self.directory / "tox.ini"
-            sections = split_ini_sections(toxfile.read_text(encoding="utf-8"))
-            with toxfile.open("w", encoding="utf-8") as fp:
-                for sectname, sect in sections:
-                    if sectname == "tox":
-                        m = re.search(r"^envlist\s*=\s*", sect, flags=re.M)
-                        if m:
-                            sect = sect[: m.end()] + "typing," + sect[m.end() :]
-                        else:
-                            raise RuntimeError("Could not find [tox]envlist in tox.ini")
-                    print(sect, end="", file=fp)
-                    if sectname == "testenv":
-                        print(
-                            self.get_template_block(
-                                "tox.ini.j2",
-                                "testenv_typing",
-                                jenv,
-                            ),
-                            file=fp,
-                        )
+            tox = self.get_ini("tox.ini")
+            envlist = tox["tox"].get("envlist") if "tox" in tox else None
+            if envlist is None:
+                raise RuntimeError("Could not find [tox]envlist in tox.ini")
+            envlist.prepend_to_first_item("typing,")
+            if "testenv" in tox:
+                block = IniDocument.parse(
+                    self.get_template_block("tox.ini.j2", "testenv_typing", jenv)
+                )
+                after = "testenv"
+                for sect in block.sections:
+                    tox.add_section(sect, after=after)
+                    after = sect.name
         if self.has_ci:
             pyver = self.python_versions[0]
             log.info("Adding testenv %r with Python version %r", "typing", pyver)
             self.extra_testenvs["typing"] = pyver
-            self.write_template(".github/workflows/test.yml", jenv)
+            log.info("Updating .github/workflows/test.yml ...")
+            self.files.write_text(
+                ".github/workflows/test.yml",
+                self.render_template(".github/workflows/test.yml", jenv),
+            )
         self.has_typing = True
+
+
+@attr.s
+class ChangelogFile:
+    """A changelog cached by a `Project`"""
+
+    #: The path to the changelog file relative to the project directory, or
+    #: `None` if the file does not exist
+    path: Optional[Path] = attr.ib()
+    #: The parsed changelog, or `None` if it does not exist or is to be deleted
+    changelog: Optional[Changelog] = attr.ib()
+    #: Whether the changelog has been modified since it was read or written
+    dirty: bool = attr.ib(default=False)
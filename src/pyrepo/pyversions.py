@@ -0,0 +1,86 @@
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Optional
+from pyversion_info import PyVersionInfo
+import requests
+from .util import user_cache_dir, write_json_atomic
+
+log = logging.getLogger(__name__)
+
+#: The URL from which the Python version release data is fetched
+DATA_URL = (
+    "https://raw.githubusercontent.com/jwodder/pyversion-info-data/master"
+    "/pyversion-info-data.json"
+)
+
+#: The default number of seconds for which cached version data is used before
+#: being refetched
+DEFAULT_TTL = 24 * 60 * 60
+
+#: Copy of the version data shipped with pyrepo for use when the data can't be
+#: fetched
+SNAPSHOT_FILE = Path(__file__).with_name("pyversion-info-data.json")
+
+CACHE_FILENAME = "pyversion-info-data.json"
+
+
+def cached_pyversion_info(
+    cache_dir: Optional[Path] = None,
+    ttl: float = DEFAULT_TTL,
+    refresh: bool = False,
+) -> PyVersionInfo:
+    """
+    Return a `PyVersionInfo` for the Python version release data, using the
+    copy cached in ``cache_dir`` (default: pyrepo's user cache directory) if it
+    is less than ``ttl`` seconds old and ``refresh`` is false.  Otherwise, the
+    data is fetched from `DATA_URL` and cached; if that fails, a stale cached
+    copy is used if there is one, and the bundled snapshot is used if not.
+    The data used after a failed fetch is cached as well so that the fetch is
+    not retried for another ``ttl`` seconds, e.g., on hosts without network
+    access.
+    """
+    if cache_dir is None:
+        cache_dir = user_cache_dir()
+    cache_file = Path(cache_dir, CACHE_FILENAME)
+    if not refresh:
+        try:
+            age = time.time() - cache_file.stat().st_mtime
+        except FileNotFoundError:
+            pass
+        else:
+            if age < ttl:
+                data = load_data(cache_file)
+                if data is not None:
+                    log.debug("Using cached Python version data from %s", cache_file)
+                    return PyVersionInfo(data)
+    try:
+        r = requests.get(DATA_URL, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+    except (requests.RequestException, ValueError) as e:
+        log.debug("Could not fetch Python version data: %s", e)
+        data = load_data(cache_file)
+        if data is not None:
+            log.debug("Using stale Python version data from %s", cache_file)
+        else:
+            log.debug("Using bundled Python version data snapshot")
+            data = load_data(SNAPSHOT_FILE)
+    save_data(cache_file, data)
+    return PyVersionInfo(data)
+
+
+def load_data(filepath: Path) -> Optional[dict]:
+    try:
+        with filepath.open(encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def save_data(filepath: Path, data: dict) -> None:
+    try:
+        write_json_atomic(filepath, data)
+    except OSError as e:
+        log.debug("Could not cache Python version data: %s", e)
@@ -5,7 +5,11 @@ from linesep import read_paragraphs
 
 ParserState = Enum("ParserState", "BADGES POST_LINKS POST_CONTENTS INTRO SECTIONS")
 
-HEADER_LINK_RGX = r"`(?P<label>[^`<>]+) <(?P<url>[^>]+)>`_"
+HEADER_LINK_RGX = re.compile(r"`(?P<label>[^`<>]+) <(?P<url>[^>]+)>`_")
+
+HEADER_LINK_SEP_RGX = re.compile(r"^\|", flags=re.M)
+
+IMAGE_OPTION_RGX = re.compile(r"^\s*:(\w+):\s*")
 
 IMAGE_START = ".. image:: "
 
@@ -35,20 +39,8 @@ class Readme:
         section_body = None
         for para in read_paragraphs(fp):
             if state == ParserState.BADGES:
-                if para.startswith(IMAGE_START):
-                    badges.append(Image.parse_string(para))
-                elif re.match(HEADER_LINK_RGX, para):
-                    for hlink in re.split(r"^\|", para.strip(), flags=re.M):
-                        m = re.fullmatch(HEADER_LINK_RGX, hlink.strip())
-                        if not m:
-                            raise ValueError(f"Invalid header link: {hlink!r}")
-                        header_links.append(m.groupdict())
+                if parse_header_paragraph(para, badges, header_links):
                     state = ParserState.POST_LINKS
-                else:
-                    raise ValueError(
-                        f"Expected image or header links,"
-                        f" found {para.splitlines()[0]!r}"
-                    )
             elif state == ParserState.POST_LINKS and para.startswith(".. contents::"):
                 contents = True
                 state = ParserState.POST_CONTENTS
@@ -94,6 +86,20 @@ class Readme:
             sections=sections,
         )
 
+    @classmethod
+    def parse_header(cls, fp):
+        """
+        Parse just the badges and header links at the start of a README,
+        stopping as soon as the header links have been read.  Returns a
+        `ReadmeHeader`.
+        """
+        badges = []
+        header_links = []
+        for para in read_paragraphs(fp):
+            if parse_header_paragraph(para, badges, header_links):
+                break
+        return ReadmeHeader(badges=badges, header_links=header_links)
+
     def __str__(self):
         s = ""
         for b in self.badges:
@@ -114,6 +120,20 @@ class Readme:
         return attr.asdict(self)
 
 
+@attr.s
+class ReadmeHeader:
+    """
+    The badges and header links of a README, as parsed by
+    `Readme.parse_header()`
+    """
+
+    badges = attr.ib()
+    header_links = attr.ib()
+
+    def for_json(self):
+        return attr.asdict(self)
+
+
 @attr.s
 class Image:
     href = attr.ib()
@@ -133,7 +153,7 @@ class Image:
         opt_name = None
         opt_value = None
         for ln in lines[1:]:
-            m = re.match(r"^\s*:(\w+):\s*", ln)
+            m = IMAGE_OPTION_RGX.match(ln)
             if m:
                 label = m.group(1)
                 if label not in options:
@@ -164,3 +184,26 @@ class Image:
 def is_section_start(para):
     lines = para.splitlines()
     return len(lines) >= 2 and lines[1] == "=" * len(lines[0])
+
+
+def parse_header_paragraph(para, badges, header_links):
+    """
+    Parse a paragraph in the header of a README, which must be either a badge
+    or the header links, and append the results to ``badges`` or
+    ``header_links``.  Returns true iff the paragraph was the header links,
+    which end the header.
+    """
+    if para.startswith(IMAGE_START):
+        badges.append(Image.parse_string(para))
+        return False
+    elif HEADER_LINK_RGX.match(para):
+        for hlink in HEADER_LINK_SEP_RGX.split(para.strip()):
+            m = HEADER_LINK_RGX.fullmatch(hlink.strip())
+            if not m:
+                raise ValueError(f"Invalid header link: {hlink!r}")
+            header_links.append(m.groupdict())
+        return True
+    else:
+        raise ValueError(
+            f"Expected image or header links, found {para.splitlines()[0]!r}"
+        )
@@ -0,0 +1,172 @@
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from .client import EXIT, EXIT_STATUS, STDERR, STDOUT, send_frame
+from .util import get_jinja_env
+
+log = logging.getLogger(__name__)
+
+
+class PyrepoServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Server that runs each ``pyrepo`` invocation received over a Unix domain
+    socket in a forked child process.  As the children are forked from an
+    interpreter that has already imported all of pyrepo's commands and loaded
+    its templates, they skip nearly all of pyrepo's startup cost, while any
+    state changed by a command (working directory, environment, logging
+    configuration, etc.) is discarded when the child exits.
+    """
+
+    # Don't wait for running commands when shutting down
+    block_on_close = False
+
+    def __init__(self, socket_path):
+        self.socket_path = Path(socket_path)
+        super().__init__(str(socket_path), RequestHandler, bind_and_activate=False)
+
+    def server_bind(self):
+        # Restrict the socket to the current user, as connecting to it allows
+        # running commands as the user
+        old_umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # This runs in the forked child.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        with self.request.makefile("rb") as fp:
+            request = json.loads(fp.readline())
+        send_lock = threading.Lock()
+
+        def send(ftype, payload):
+            with send_lock:
+                send_frame(self.request, ftype, payload)
+
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        # Redirect file descriptors 1 & 2 (not just `sys.stdout` & `sys.stderr`)
+        # so that the output of subprocesses is forwarded as well.
+        relays = []
+        for fd, ftype in [(1, STDOUT), (2, STDERR)]:
+            rfd, wfd = os.pipe()
+            os.dup2(wfd, fd)
+            os.close(wfd)
+            t = threading.Thread(target=relay, args=(rfd, ftype, send), daemon=True)
+            t.start()
+            relays.append(t)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        os.dup2(devnull, 0)
+        sys.stdin = io.TextIOWrapper(os.fdopen(0, "rb", closefd=False))
+        sys.stdout = io.TextIOWrapper(
+            os.fdopen(1, "wb", closefd=False), line_buffering=True
+        )
+        sys.stderr = io.TextIOWrapper(
+            os.fdopen(2, "wb", closefd=False), line_buffering=True
+        )
+        reset_logging()
+        status = run_command(request["argv"])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Close the write ends of the pipes so that the relays hit EOF
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        for t in relays:
+            t.join()
+        send(EXIT, EXIT_STATUS.pack(status))
+
+
+def relay(rfd, ftype, send):
+    with os.fdopen(rfd, "rb", buffering=0) as fp:
+        while True:
+            data = fp.read(65536)
+            if not data:
+                break
+            send(ftype, data)
+
+
+def reset_logging():
+    """
+    Discard the root logger configuration inherited from the daemon so that
+    ``colorlog.basicConfig()`` in the command (and thus the client's
+    ``--log-level``) takes effect
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(logging.WARNING)
+
+
+def run_command(argv):
+    """Run ``pyrepo`` with the given arguments and return its exit status"""
+    from .__main__ import main
+
+    try:
+        main.main(args=argv, prog_name="pyrepo", standalone_mode=True)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        elif isinstance(e.code, int):
+            return e.code
+        else:
+            print(e.code, file=sys.stderr)
+            return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def warm_up():
+    """Import & load everything that ``pyrepo`` commands use"""
+    from .__main__ import main
+
+    for cmdname in main.list_commands(None):
+        main.get_command(None, cmdname)
+    jenv = get_jinja_env()
+    for name in jenv.list_templates():
+        jenv.get_template(name)
+
+
+def serve(socket_path):
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(socket_path))
+            except ConnectionRefusedError:
+                log.debug("Removing stale socket %s", socket_path)
+                socket_path.unlink()
+            else:
+                raise RuntimeError(f"A server is already listening on {socket_path}")
+    warm_up()
+    # Exit via SystemExit on SIGTERM so that the socket gets removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with PyrepoServer(socket_path) as server:
+        server.server_bind()
+        server.server_activate()
+        log.info("Listening on %s", socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Shutting down")
@@ -0,0 +1,183 @@
+"""
+A lightweight reader for the parts of a ``setup.cfg`` file that pyrepo uses
+
+This module parses the same values as setuptools' ``read_configuration()``
+for the keys that pyrepo consumes, but it does not import setuptools and only
+touches the files that those values refer to.  In particular, ``attr:``
+directives (as used for ``version``) are not evaluated; use `read_version` for
+that.
+"""
+
+from configparser import ConfigParser
+from fnmatch import fnmatchcase
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+from packaging.specifiers import SpecifierSet
+
+
+def read_setup_cfg(filepath) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the ``[metadata]`` and ``[options]`` values of the given
+    ``setup.cfg`` file and return them as a `dict` with ``"metadata"`` and
+    ``"options"`` keys, each mapping to a `dict` of the options in the
+    respective section that were set in the file.  Values are parsed the same
+    way as by setuptools' ``read_configuration()``; ``file:`` directives are
+    resolved relative to the directory containing ``filepath``.
+
+    ``[options.entry_points]`` is parsed into ``options["entry_points"]``, and
+    ``[options.packages.find]`` is used to evaluate ``packages = find:``.
+    """
+    filepath = Path(filepath)
+    parser = SetupCfgParser(filepath.parent)
+    cfg = ConfigParser(interpolation=None)
+    cfg.optionxform = lambda s: s.lower().replace("-", "_")
+    with filepath.open(encoding="utf-8") as fp:
+        cfg.read_file(fp)
+    return parser.parse(cfg)
+
+
+def parse_list(value: Any, separator: str = ",") -> List[str]:
+    """
+    Split a value into a list, either on newlines (if it contains any) or
+    else on ``separator``
+    """
+    if isinstance(value, list):
+        return value
+    if "\n" in value:
+        chunks = value.splitlines()
+    else:
+        chunks = value.split(separator)
+    return [c.strip() for c in chunks if c.strip()]
+
+
+def parse_list_semicolon(value: Any) -> List[str]:
+    return parse_list(value, separator=";")
+
+
+def parse_dict(value: str) -> Dict[str, str]:
+    result = {}
+    for line in parse_list(value):
+        key, sep, val = line.partition("=")
+        if not sep:
+            raise ValueError(f"Unable to parse option value to dict: {value!r}")
+        result[key.strip()] = val.strip()
+    return result
+
+
+class SetupCfgParser:
+    def __init__(self, rootdir: Path) -> None:
+        #: The directory that ``file:`` directives and ``packages = find:``
+        #: are resolved relative to
+        self.rootdir = rootdir
+
+    def parse(self, cfg: ConfigParser) -> Dict[str, Dict[str, Any]]:
+        metadata = self.parse_section(
+            cfg, "metadata", self.metadata_parsers(), METADATA_ALIASES
+        )
+        options = self.parse_section(cfg, "options", self.options_parsers(cfg), {})
+        if cfg.has_section("options.entry_points"):
+            options["entry_points"] = {
+                k: parse_list(v) for k, v in cfg["options.entry_points"].items()
+            }
+        return {"metadata": metadata, "options": options}
+
+    @staticmethod
+    def parse_section(
+        cfg: ConfigParser,
+        section: str,
+        parsers: Dict[str, Callable[[str], Any]],
+        aliases: Dict[str, str],
+    ) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if cfg.has_section(section):
+            for key, value in cfg[section].items():
+                key = aliases.get(key, key)
+                if key in parsers and key not in data:
+                    data[key] = parsers[key](value)
+        return data
+
+    def metadata_parsers(self) -> Dict[str, Callable[[str], Any]]:
+        return {
+            "name": str,
+            "description": self.parse_file,
+            "author": str,
+            "author_email": str,
+            "url": str,
+            "keywords": parse_list,
+            "classifiers": lambda v: parse_list(self.parse_file(v)),
+            "project_urls": parse_dict,
+        }
+
+    def options_parsers(self, cfg: ConfigParser) -> Dict[str, Callable[[str], Any]]:
+        return {
+            "packages": lambda v: self.parse_packages(v, cfg),
+            "py_modules": parse_list,
+            "python_requires": SpecifierSet,
+            "install_requires": parse_list_semicolon,
+        }
+
+    def parse_file(self, value: str) -> str:
+        """Resolve a ``file:`` directive"""
+        if not value.startswith("file:"):
+            return value
+        root = self.rootdir.resolve()
+        contents = []
+        for fname in value[len("file:") :].split(","):
+            path = (root / fname.strip()).resolve()
+            if root != path and root not in path.parents:
+                raise ValueError(f"`file:` directive can not access {path}")
+            if path.is_file():
+                contents.append(path.read_text(encoding="utf-8"))
+        return "\n".join(contents)
+
+    def parse_packages(self, value: str, cfg: ConfigParser) -> List[str]:
+        if value.strip() != "find:":
+            return parse_list(value)
+        where = "."
+        include = ["*"]
+        exclude: List[str] = []
+        if cfg.has_section("options.packages.find"):
+            findcfg = cfg["options.packages.find"]
+            if parse_list(findcfg.get("where", "")):
+                where = parse_list(findcfg["where"])[0]
+            include = parse_list(findcfg.get("include", "")) or include
+            exclude = parse_list(findcfg.get("exclude", ""))
+        return list(find_packages(self.rootdir / where, include, exclude))
+
+
+# Names that setuptools accepts as synonyms for the canonical option names
+METADATA_ALIASES = {
+    "home_page": "url",
+    "summary": "description",
+    "classifier": "classifiers",
+}
+
+
+def find_packages(where: Path, include: List[str], exclude: List[str]) -> Iterator[str]:
+    """
+    Like setuptools' ``find_packages()``: yield the dotted names of all
+    packages (directories containing an ``__init__.py`` file, all of whose
+    ancestors below ``where`` are also packages) under ``where`` that match a
+    pattern in ``include`` and no pattern in ``exclude``
+    """
+    exclude = list(exclude) + ["ez_setup", "*__pycache__"]
+    dirs = [(where, "")]
+    while dirs:
+        dirpath, prefix = dirs.pop(0)
+        subdirs = []
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                if (
+                    entry.is_dir()
+                    and "." not in entry.name
+                    and os.path.exists(os.path.join(entry.path, "__init__.py"))
+                ):
+                    subdirs.append(entry)
+        for entry in sorted(subdirs, key=lambda e: e.name):
+            name = prefix + entry.name
+            if any(fnmatchcase(name, pat) for pat in include) and not any(
+                fnmatchcase(name, pat) for pat in exclude
+            ):
+                yield name
+            dirs.append((Path(entry.path), name + "."))
@@ -0,0 +1,113 @@
+"""
+Templates precompiled at build time
+
+When a wheel is built, the ``build_py`` step in :file:`setup.py` calls
+`build_bundle()` to compile every template in :file:`pyrepo/templates/` into
+a directory of Python modules, :file:`pyrepo/compiled_templates/`, which is
+installed (and byte-compiled by the installer) alongside the package.
+`get_jinja_env()` then loads templates from the bundle with a
+`jinja2.ModuleLoader`, so that no template needs to be lexed, parsed, or
+compiled at runtime even when there is no bytecode cache to reuse, such as on
+ephemeral CI runners.
+
+The bundle is only used if it was built for the running versions of both
+pyrepo and Jinja2; otherwise, templates are loaded from source as usual.
+
+This module is loaded by :file:`setup.py` before pyrepo's dependencies are
+installed, and so it may only import Jinja2 and the standard library.
+"""
+
+import json
+from pathlib import Path
+from shutil import rmtree
+from typing import Any, Callable, Dict, List, Optional
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+from jinja2 import __version__ as jinja2_version
+
+#: Options passed to the `~jinja2.Environment` that templates are compiled in;
+#: templates compiled with other options would render differently
+TEMPLATE_OPTIONS: Dict[str, Any] = {"trim_blocks": True, "lstrip_blocks": True}
+
+#: The names of the custom filters that `get_jinja_env()` defines.  Jinja2
+#: checks that filters exist at compile time, so placeholders for them are
+#: registered when building the bundle.
+FILTER_NAMES = ("repr", "rewrap", "years2str")
+
+#: The name of the bundle directory inside the ``pyrepo`` package
+BUNDLE_DIRNAME = "compiled_templates"
+
+#: The name of the file in the bundle directory that describes the bundle
+MANIFEST_FILENAME = "bundle.json"
+
+TEMPLATE_SUFFIX = ".j2"
+
+
+class BundleLoader(ModuleLoader):
+    """A `~jinja2.ModuleLoader` that can list the templates in the bundle"""
+
+    def __init__(self, path: Path, templates: List[str]) -> None:
+        super().__init__(str(path))
+        self.templates = templates
+
+    def list_templates(self) -> List[str]:
+        return list(self.templates)
+
+
+def build_bundle(
+    template_dir: Path,
+    target: Path,
+    version: str,
+    log_function: Optional[Callable[[str], None]] = None,
+) -> None:
+    """
+    Compile all of the templates in ``template_dir`` into a bundle for pyrepo
+    version ``version`` in the directory ``target``, replacing any previous
+    contents
+    """
+    env = Environment(loader=FileSystemLoader(str(template_dir)), **TEMPLATE_OPTIONS)
+    for name in FILTER_NAMES:
+        env.filters[name] = placeholder_filter
+    templates = sorted(
+        name for name in env.list_templates() if name.endswith(TEMPLATE_SUFFIX)
+    )
+    if target.exists():
+        rmtree(target)
+    target.mkdir(parents=True)
+    env.compile_templates(
+        str(target),
+        filter_func=lambda name: name.endswith(TEMPLATE_SUFFIX),
+        zip=None,
+        log_function=log_function,
+        ignore_errors=False,
+    )
+    with (target / MANIFEST_FILENAME).open("w", encoding="utf-8") as fp:
+        json.dump(
+            {"pyrepo": version, "jinja2": jinja2_version, "templates": templates},
+            fp,
+            indent=4,
+        )
+
+
+def load_bundle(version: str, package_dir: Path) -> Optional[BundleLoader]:
+    """
+    Return a loader for the bundle in the package directory ``package_dir``
+    if there is one and it was built for pyrepo version ``version`` and the
+    running version of Jinja2; otherwise, return `None`
+    """
+    path = package_dir / BUNDLE_DIRNAME
+    try:
+        with (path / MANIFEST_FILENAME).open(encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("pyrepo") != version
+        or manifest.get("jinja2") != jinja2_version
+    ):
+        return None
+    return BundleLoader(path, manifest.get("templates", []))
+
+
+def placeholder_filter(value: Any, *_args: Any, **_kwargs: Any) -> Any:
+    return value
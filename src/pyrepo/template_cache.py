@@ -0,0 +1,159 @@
+"""
+On-disk cache of compiled Jinja2 templates
+
+Compiling pyrepo's templates (lexing, parsing, and generating Python code for
+them) is a noticeable part of the startup cost of commands that render
+templates.  `TemplateBytecodeCache` stores the compiled bytecode of each
+template under :file:`~/.cache/pyrepo/templates/` so that later processes
+only need to unmarshal it.  Cache entries are keyed on the pyrepo version and
+the template's name & path and are only used if the SHA-1 of the template
+source matches the checksum recorded with them.  Entries are written to a
+temporary file and renamed into place so that concurrent processes never read
+a partially-written entry.
+
+This module also provides `render_blocks()` for rendering individual template
+blocks with in-memory caching of the results.
+"""
+
+from hashlib import sha1
+from io import BytesIO
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from jinja2 import BytecodeCache, Environment, Template
+from jinja2.bccache import Bucket
+from . import __version__
+from .util import atomic_write, user_cache_dir
+
+log = logging.getLogger(__name__)
+
+
+class TemplateBytecodeCache(BytecodeCache):
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        #: The directory in which cache entries are stored; if `None`, the
+        #: :file:`templates/` subdirectory of `user_cache_dir()` at the time
+        #: of each access is used
+        self._directory = directory
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is not None:
+            return self._directory
+        return user_cache_dir() / "templates"
+
+    def get_cache_key(self, name: str, filename: Optional[str] = None) -> str:
+        key = sha1(f"{__version__}|{name}".encode("utf-8"))
+        if filename is not None:
+            key.update(f"|{filename}".encode("utf-8"))
+        return key.hexdigest()
+
+    def get_cache_path(self, bucket: Bucket) -> Path:
+        return self.directory / f"{bucket.key}.cache"
+
+    def get_bucket(
+        self, environment: Environment, name: str, filename: Optional[str], source: str
+    ) -> Bucket:
+        start = time.perf_counter()
+        bucket = super().get_bucket(environment, name, filename, source)
+        if bucket.code is not None:
+            log.debug(
+                "Loaded template %s from bytecode cache in %.2f ms",
+                name,
+                (time.perf_counter() - start) * 1000,
+            )
+        return bucket
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        try:
+            with self.get_cache_path(bucket).open("rb") as fp:
+                bucket.load_bytecode(fp)
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            # A corrupt or unreadable entry is treated as a miss and
+            # overwritten once the template is compiled.
+            log.debug("Could not read template bytecode cache entry: %s", e)
+            bucket.reset()
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        buf = BytesIO()
+        bucket.write_bytecode(buf)
+        try:
+            atomic_write(self.get_cache_path(bucket), buf.getvalue())
+        except OSError as e:
+            log.debug("Could not write template bytecode cache entry: %s", e)
+
+    def clear(self) -> None:
+        try:
+            paths = list(self.directory.glob("*.cache"))
+        except OSError:
+            return
+        for p in paths:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+class TimedEnvironment(Environment):
+    """
+    A Jinja2 environment that logs how long each template takes to compile,
+    for comparison with the load times logged by `TemplateBytecodeCache`
+    """
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        start = time.perf_counter()
+        code = super().compile(
+            source, name=name, filename=filename, raw=raw, defer_init=defer_init
+        )
+        log.debug(
+            "Compiled template %s in %.2f ms",
+            name,
+            (time.perf_counter() - start) * 1000,
+        )
+        return code
+
+
+def render_blocks(
+    jinja_env: Environment,
+    template_name: str,
+    block_names: Iterable[str],
+    context: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    """
+    Render the given blocks of a template with the given context variables
+    (default: none), all from a single template context, and return a `dict`
+    mapping block names to their output.
+
+    Rendered blocks are cached on ``jinja_env`` keyed on the template, block
+    name, and a fingerprint of ``context``, so rendering the same block again
+    with the same context returns the cached output.  Reloading the template
+    (e.g., after its source changes) invalidates its entries.
+    """
+    tmpl = jinja_env.get_template(template_name)
+    jinja_env.extend(block_cache={})
+    cache: Dict[Tuple[Template, str, str], str] = jinja_env.block_cache  # type: ignore
+    fingerprint = context_fingerprint(context)
+    results: Dict[str, str] = {}
+    missing = []
+    for name in block_names:
+        try:
+            results[name] = cache[(tmpl, name, fingerprint)]
+        except KeyError:
+            missing.append(name)
+    if missing:
+        ctx = tmpl.new_context(context)
+        for name in missing:
+            results[name] = cache[(tmpl, name, fingerprint)] = "".join(
+                tmpl.blocks[name](ctx)
+            )
+    return results
+
+
+def context_fingerprint(context: Optional[Dict[str, Any]]) -> str:
+    if not context:
+        return ""
+    data = json.dumps(context, sort_keys=True, default=repr)
+    return sha1(data.encode("utf-8")).hexdigest()
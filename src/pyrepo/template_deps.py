@@ -0,0 +1,109 @@
+"""
+Static analysis of which context variables each template reads
+
+`get_template_dependencies()` parses every template in
+:file:`pyrepo/templates/` and uses `jinja2.meta` to find the context variables
+that it reads, including those read inside ``{% block %}``\\s and by any
+templates that it extends, includes, or imports.  This lets commands that
+change only some of a project's properties re-render just the files that
+depend on them.
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+import attr
+from jinja2 import PackageLoader, meta
+from .project import Project
+from .util import get_jinja_env
+
+TEMPLATE_SUFFIX = ".j2"
+
+
+@lru_cache(maxsize=None)
+def get_template_dependencies() -> Dict[str, FrozenSet[str]]:
+    """
+    Return a `dict` mapping the path of each templated file (i.e., each
+    template name without the :file:`.j2` suffix) to the set of context
+    variables that its template reads
+    """
+    # Always parse the template sources, even when `get_jinja_env()` loads
+    # precompiled templates, which have no source.
+    jenv = get_jinja_env().overlay(loader=PackageLoader("pyrepo", "templates"))
+    direct: Dict[str, Set[str]] = {}
+    references: Dict[str, Set[str]] = {}
+    for name in jenv.list_templates():
+        source, _, _ = jenv.loader.get_source(jenv, name)
+        ast = jenv.parse(source, name)
+        direct[name] = set(meta.find_undeclared_variables(ast))
+        # Dynamic references (e.g., `{% include var %}`) are yielded as `None`
+        # and cannot be followed.
+        references[name] = {
+            ref for ref in meta.find_referenced_templates(ast) if ref is not None
+        }
+    deps: Dict[str, FrozenSet[str]] = {}
+    for name in direct:
+        variables: Set[str] = set()
+        seen: Set[str] = set()
+        stack = [name]
+        while stack:
+            tmpl = stack.pop()
+            if tmpl in seen:
+                continue
+            seen.add(tmpl)
+            variables |= direct.get(tmpl, set())
+            stack.extend(references.get(tmpl, ()))
+        if name.endswith(TEMPLATE_SUFFIX):
+            deps[name[: -len(TEMPLATE_SUFFIX)]] = frozenset(variables)
+    return deps
+
+
+def templates_affected_by(
+    variables: Iterable[str], template_paths: Iterable[str]
+) -> List[str]:
+    """
+    Return the paths in ``template_paths`` whose templates read at least one
+    of ``variables``, in the same order.  Paths without a known template are
+    assumed to be affected.
+    """
+    changed = set(variables)
+    deps = get_template_dependencies()
+    return [
+        path
+        for path in template_paths
+        if path not in deps or not changed.isdisjoint(deps[path])
+    ]
+
+
+def parse_variables(s: str) -> List[str]:
+    """
+    Split a comma-separated list of template variable names
+
+    :raises ValueError: if any of the names is not a template variable
+    """
+    variables = [v.strip() for v in s.split(",") if v.strip()]
+    known = {a.name for a in attr.fields(Project) if a.init} - {"directory"}
+    for v in variables:
+        if v not in known:
+            raise ValueError(f"Unknown template variable: {v!r}")
+    return variables
+
+
+def select_templated_files(
+    project: Project,
+    template_paths: Sequence[str],
+    all_files: bool = False,
+    variables: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Return the templated files to re-evaluate in ``project``: either the given
+    ``template_paths`` or, if ``all_files`` is true or ``variables`` is given
+    without any paths, all of the project's templated files, in either case
+    narrowed down to just those that read ``variables`` if it is not `None`
+    """
+    if all_files or (variables is not None and not template_paths):
+        paths = project.get_templated_files()
+    else:
+        paths = list(template_paths)
+    if variables is not None:
+        paths = templates_affected_by(variables, paths)
+    return paths
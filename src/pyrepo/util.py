@@ -1,17 +1,25 @@
+from contextlib import suppress
+from functools import lru_cache
+import json
 import logging
 from operator import attrgetter
+import os
+from pathlib import Path
 import re
+from secrets import token_hex
 import shlex
+import stat
 import subprocess
 import sys
 from textwrap import fill
 import time
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional
 import click
 from in_place import InPlace
 from intspan import intspan
-from jinja2 import Environment, PackageLoader
-from linesep import split_preceded
+from jinja2 import PackageLoader
+from . import __version__
+from .template_bundle import TEMPLATE_OPTIONS, load_bundle
 
 log = logging.getLogger(__name__)
 
@@ -34,14 +42,26 @@ def readcmd(*args, **kwargs):
 def ensure_license_years(filepath, years: List[int]) -> None:
     with InPlace(filepath, mode="t", encoding="utf-8") as fp:
         for line in fp:
-            m = re.match(r"^Copyright \(c\) (\d[-,\d\s]+\d) \w+", line)
-            if m:
-                line = (
-                    line[: m.start(1)]
-                    + update_years2str(m.group(1), years)
-                    + line[m.end(1) :]
-                )
-            print(line, file=fp, end="")
+            print(update_license_line(line, years), file=fp, end="")
+
+
+def update_license_years(text: str, years: List[int]) -> str:
+    """
+    Update the copyright line in the text of a :file:`LICENSE` file to include
+    the given years
+    """
+    return "".join(
+        update_license_line(line, years) for line in text.splitlines(keepends=True)
+    )
+
+
+def update_license_line(line: str, years: List[int]) -> str:
+    m = re.match(r"^Copyright \(c\) (\d[-,\d\s]+\d) \w+", line)
+    if m:
+        line = (
+            line[: m.start(1)] + update_years2str(m.group(1), years) + line[m.end(1) :]
+        )
+    return line
 
 
 def years2str(years):
@@ -60,12 +80,29 @@ def update_years2str(year_str: str, years: Optional[List[int]] = None) -> str:
     return years2str(yearspan)
 
 
+def user_cache_dir() -> Path:
+    """
+    Return the directory in which pyrepo stores cached data, honoring
+    ``$XDG_CACHE_HOME``.  The directory is not guaranteed to exist.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "pyrepo")
+
+
+@lru_cache(maxsize=None)
 def get_jinja_env():
-    jenv = Environment(
-        loader=PackageLoader("pyrepo", "templates"),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
+    from .template_cache import TemplateBytecodeCache, TimedEnvironment
+
+    bundle = load_bundle(__version__, Path(__file__).parent)
+    if bundle is not None:
+        log.debug("Loading templates from precompiled bundle")
+        jenv = TimedEnvironment(loader=bundle, **TEMPLATE_OPTIONS)
+    else:
+        jenv = TimedEnvironment(
+            loader=PackageLoader("pyrepo", "templates"),
+            bytecode_cache=TemplateBytecodeCache(),
+            **TEMPLATE_OPTIONS,
+        )
     jenv.filters["repr"] = repr
     jenv.filters["rewrap"] = rewrap
     jenv.filters["years2str"] = years2str
@@ -123,15 +160,49 @@ def sort_specifier(specset):
     return ", ".join(map(str, sorted(specset, key=attrgetter("version"))))
 
 
-def split_ini_sections(s: str) -> List[Tuple[Optional[str], str]]:
+def atomic_write(filepath: Path, data: bytes, mode: Optional[int] = None) -> None:
+    """
+    Write ``data`` to ``filepath`` (creating its parent directory if
+    necessary) by writing to a temporary file in the same directory and then
+    renaming it into place so that concurrent pyrepo processes never see a
+    partially-written file.  The file is given the permissions ``mode`` if
+    that is not `None`; otherwise, the default permissions for new files under
+    the current umask are used.
+    """
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        tmppath = filepath.with_name(f"{filepath.name}.{token_hex(4)}.tmp")
+        try:
+            # Letting the kernel apply the umask to 0o666 gives the file the
+            # same permissions as a plain `open()` would.
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        break
+    try:
+        with open(fd, "wb") as fp:
+            fp.write(data)
+        if mode is not None:
+            os.chmod(tmppath, mode)
+        os.replace(tmppath, filepath)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmppath)
+        raise
+
+
+def write_json_atomic(filepath: Path, data: Any) -> None:
+    """Write ``data`` as JSON to ``filepath`` via `atomic_write()`"""
+    atomic_write(filepath, json.dumps(data).encode("utf-8"))
+
+
+def write_text_atomic(filepath: Path, text: str) -> None:
     """
-    Splits an INI file into a list of (section name, sections) pairs.  A given
-    section name is `None` iff the "section" is leading whitespace and/or
-    comments in the file. Each section includes the `[section name]` line and
-    any trailing newlines.
+    Write ``text`` to ``filepath`` via `atomic_write()`, preserving the
+    permissions of ``filepath`` if it already exists
     """
-    sect_rgx = re.compile(r"^\[([^]]+)\]$", flags=re.M)
-    for sect in split_preceded(s, sect_rgx, retain=True):
-        m = sect_rgx.match(sect)
-        sect_name = m and m[1]
-        yield (sect_name, sect)
+    try:
+        mode: Optional[int] = stat.S_IMODE(filepath.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+    atomic_write(filepath, text.encode("utf-8"), mode)
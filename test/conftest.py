@@ -4,3 +4,11 @@ import pytest
 @pytest.fixture
 def default_branch(mocker):
     mocker.patch("pyrepo.inspecting.get_default_branch", return_value="master")
+
+
+@pytest.fixture(autouse=True)
+def user_cache(monkeypatch, tmp_path_factory):
+    # Keep pyrepo's caches out of the real user cache directory
+    cache_home = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home / "pyrepo"
@@ -1,8 +1,12 @@
+from io import StringIO
 import json
 from operator import attrgetter
 from pathlib import Path
+from shutil import copyfile, copytree
 import pytest
-from pyrepo.changelog import Changelog
+from pyrepo import filecache
+from pyrepo.changelog import Changelog, ChangelogSection, SectionStore
+from pyrepo.project import Project
 
 DATA_DIR = Path(__file__).with_name("data")
 
@@ -17,3 +21,253 @@ def test_readme(filepath):
         chlog = Changelog.load(fp)
     assert chlog.for_json() == json.loads(filepath.with_suffix(".json").read_text())
     assert str(chlog) == filepath.read_text(encoding="utf-8")
+
+
+CHANGELOG_FILES = [
+    p for p in (DATA_DIR / "changelog").iterdir() if p.suffix in (".md", ".rst")
+]
+
+
+@pytest.mark.parametrize("filepath", CHANGELOG_FILES, ids=attrgetter("name"))
+@pytest.mark.parametrize("max_sections", [0, 1, 2])
+def test_load_head_only(filepath, max_sections):
+    text = filepath.read_text(encoding="utf-8")
+    with filepath.open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp, max_sections=max_sections)
+    assert len(chlog.sections) <= max_sections
+    assert str(chlog) == text
+    assert chlog.for_json() == json.loads(filepath.with_suffix(".json").read_text())
+
+
+@pytest.mark.parametrize("filepath", CHANGELOG_FILES, ids=attrgetter("name"))
+@pytest.mark.parametrize("content", ["Released", "- One\n\n- Two"])
+def test_edit_head_only(filepath, content):
+    with filepath.open(encoding="utf-8") as fp:
+        full = Changelog.load(fp)
+    with filepath.open(encoding="utf-8") as fp:
+        head = Changelog.load(fp, max_sections=1)
+    for chlog in (full, head):
+        new_sect = ChangelogSection(version="v9.0.0", date="2021-01-01", content="")
+        if chlog.sections:
+            chlog.sections[0].content = content
+        chlog.sections.insert(0, new_sect)
+    assert str(head) == str(full)
+    assert head.tail == "" or head.tail.startswith("v")
+
+
+@pytest.mark.parametrize("content", ["Released", "- One\n\n- Two"])
+def test_delete_all_loaded_sections(content):
+    text = (
+        f"v0.3.0 (in development)\n---\n{content}\n\n\n"
+        "v0.2.0 (2021-01-01)\n---\n- Stuff\n\n\n"
+        "v0.1.0 (2020-07-16)\n---\nInitial release\n"
+    )
+    full = load_text(text)
+    head = load_text(text, max_sections=1)
+    for chlog in (full, head):
+        del chlog.sections[0]
+    assert str(head) == str(full)
+
+
+def test_load_tail():
+    with (DATA_DIR / "changelog" / "big-sections.md").open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp, max_sections=1)
+    assert len(chlog.sections) == 1
+    assert chlog.tail != ""
+    chlog.load_tail()
+    assert chlog.tail == ""
+    assert [s.version for s in chlog.sections] == ["v0.2.0", "v0.1.0"]
+
+
+def load_text(text, **kwargs):
+    return Changelog.load(StringIO(text), **kwargs)
+
+
+def test_get_insert_replace():
+    with (DATA_DIR / "changelog" / "two-sections.md").open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp)
+    assert chlog.get("v0.1.0") == ChangelogSection(
+        version="v0.1.0", date="2020-07-16", content="Initial release"
+    )
+    assert chlog.get("v0.3.0") is None
+    chlog.insert(
+        0, ChangelogSection(version="v0.3.0", date="in development", content="")
+    )
+    assert chlog.get("v0.3.0").date == "in development"
+    assert [s.version for s in chlog.sections] == ["v0.3.0", "v0.2.0", "v0.1.0"]
+    chlog.replace(
+        "v0.2.0",
+        ChangelogSection(version="v0.2.0", date="2021-01-01", content="- Stuff"),
+    )
+    assert chlog.get("v0.2.0").content == "- Stuff"
+    assert str(chlog).startswith(
+        "v0.3.0 (in development)\n-----------------------\n\n"
+        "v0.2.0 (2021-01-01)\n-------------------\n- Stuff\n\n"
+    )
+    with pytest.raises(KeyError):
+        chlog.replace("v9.9.9", ChangelogSection(version="v9", date="x", content=""))
+
+
+def test_get_after_version_change():
+    with (DATA_DIR / "changelog" / "two-sections.md").open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp)
+    assert chlog.get("v0.2.0") is not None
+    chlog.sections[0].version = "v0.2.1"
+    assert chlog.get("v0.2.0") is None
+    assert chlog.get("v0.2.1") is chlog.sections[0]
+    del chlog.sections[0]
+    assert chlog.get("v0.2.1") is None
+
+
+def test_get_replace_duplicate_versions():
+    chlog = load_text(
+        "v0.3.0 (in development)\n---\n\n"
+        "v0.2.0 (2021-01-01)\n---\n- First\n\n"
+        "v0.2.0 (2021-02-02)\n---\n- Second\n"
+    )
+    assert chlog.get("v0.2.0").content == "- First"
+    chlog.replace(
+        "v0.2.0", ChangelogSection(version="v0.2.1", date="2021-01-01", content="")
+    )
+    assert chlog.get("v0.2.0").content == "- Second"
+    assert chlog.get("v0.2.1") is chlog.sections[1]
+    chlog.insert(1, ChangelogSection(version="v0.2.0", date="x", content="- New"))
+    assert chlog.get("v0.2.0").content == "- New"
+    assert chlog.get("v0.3.0") is chlog.sections[0]
+    assert chlog.get("v0.2.1") is chlog.sections[2]
+
+
+def test_lookups_reuse_index(mocker):
+    with (DATA_DIR / "changelog" / "two-sections.md").open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp)
+    spy = mocker.spy(SectionStore, "_build_index")
+    assert chlog.get("v9.9.9") is None
+    assert chlog.get("v9.9.9") is None
+    chlog.insert(
+        0, ChangelogSection(version="v0.3.0", date="in development", content="")
+    )
+    chlog.replace(
+        "v0.2.0",
+        ChangelogSection(version="v0.2.0", date="2021-01-01", content="- Stuff"),
+    )
+    assert chlog.get("v0.2.0").content == "- Stuff"
+    assert chlog.get("v0.1.0").content == "Initial release"
+    assert spy.call_count == 1
+
+
+def test_get_loads_tail():
+    with (DATA_DIR / "changelog" / "two-sections.md").open(encoding="utf-8") as fp:
+        chlog = Changelog.load(fp, max_sections=1)
+    assert len(chlog.sections) == 1
+    assert chlog.get("v0.1.0").content == "Initial release"
+    assert chlog.tail == ""
+    assert len(chlog.sections) == 2
+
+
+def test_untouched_sections_verbatim():
+    text = (
+        "v0.2.0 (in development)\n"
+        "---\n"
+        "- Dropped support for Python 3.4\n"
+        "\n"
+        "v0.1.0   (2020-07-16)\n"
+        "-----\n"
+        "Initial release\n"
+    )
+    chlog = load_text(text)
+    assert str(chlog) == text
+    chlog.sections[0].date = "2021-01-01"
+    assert str(chlog) == (
+        "v0.2.0 (2021-01-01)\n"
+        "-------------------\n"
+        "- Dropped support for Python 3.4\n"
+        "\n"
+        "v0.1.0   (2020-07-16)\n"
+        "-----\n"
+        "Initial release\n"
+    )
+
+
+def test_constructed_changelog():
+    sections = [
+        ChangelogSection(version="v0.2.0", date="in development", content=""),
+        ChangelogSection(version="v0.1.0", date="2020-07-16", content="Initial"),
+    ]
+    chlog = Changelog(intro="", sections=sections)
+    assert chlog.sections == sections
+    assert chlog == Changelog(intro="", sections=list(sections))
+    assert chlog.get("v0.1.0") is sections[1]
+    assert load_text(str(chlog)) == chlog
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "---\nv0.1.0 (2020-07-16)\n",
+        "v0.1.0 (2020-07-16)\n---\n---\n",
+        "Intro\n",
+        "v0.1.0\n---\n",
+    ],
+)
+def test_load_invalid(text):
+    with pytest.raises(ValueError):
+        load_text(text)
+
+
+@pytest.fixture
+def project(tmp_path, default_branch):  # noqa: U100
+    dirpath = tmp_path / "project"
+    copytree(DATA_DIR / "inspect_project" / "has-docs-tests", dirpath)
+    (dirpath / "_inspect.json").unlink()
+    copyfile(DATA_DIR / "changelog" / "two-sections.md", dirpath / "CHANGELOG.md")
+    return Project.from_directory(dirpath)
+
+
+def test_project_changelog_read_once(project, mocker):
+    spy = mocker.spy(Project, "load_changelog")
+    chlog = project.get_changelog(max_sections=0)
+    assert chlog is not None
+    assert project.get_changelog(max_sections=1) is chlog
+    assert chlog.sections[0].version == "v0.2.0"
+    assert project.get_changelog() is chlog
+    assert len(chlog.sections) == 2
+    assert project.get_changelog(docs=True) is None
+    assert project.get_changelog(docs=True) is None
+    assert spy.call_count == 2
+
+
+def test_project_changelog_write_once(project, mocker):
+    chlog = project.get_changelog(max_sections=1)
+    chlog.sections[0].date = "2021-01-01"
+    project.set_changelog(chlog)
+    before = (project.directory / "CHANGELOG.md").read_text(encoding="utf-8")
+    assert "in development" in before
+    docs = Changelog(
+        intro="Changelog\n=========\n\n",
+        sections=[ChangelogSection(version="v0.2.0", date="2021-01-01", content="")],
+    )
+    project.set_changelog(docs, docs=True)
+    spy = mocker.spy(filecache, "write_text_atomic")
+    project.flush()
+    assert spy.call_count == 2
+    assert (project.directory / "CHANGELOG.md").read_text(
+        encoding="utf-8"
+    ) == before.replace("in development", "2021-01-01").replace(
+        "v0.2.0 (2021-01-01)\n-----------------------",
+        "v0.2.0 (2021-01-01)\n" + "-" * 19,
+    )
+    assert (project.directory / "docs" / "changelog.rst").read_text(
+        encoding="utf-8"
+    ) == str(docs)
+    project.flush()
+    assert spy.call_count == 2
+    project.set_changelog(None)
+    assert (project.directory / "CHANGELOG.md").exists()
+    project.flush()
+    assert not (project.directory / "CHANGELOG.md").exists()
+    assert project.get_changelog() is None
+
+
+def test_project_changelog_not_context(project):
+    project.get_changelog()
+    assert "changelogs" not in project.get_template_context()
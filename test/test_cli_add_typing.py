@@ -28,3 +28,22 @@ def test_pyrepo_add_typing(caplog, dirpath, tmp_path):
     )
     assert r.exit_code == 0, show_result(r)
     assert_dirtrees_eq(tmp_path, dirpath / "after")
+
+
+@pytest.mark.parametrize(
+    "dirpath",
+    sorted((DATA_DIR / "add_typing").iterdir()),
+    ids=attrgetter("name"),
+)
+@pytest.mark.usefixtures("default_branch")
+def test_pyrepo_add_typing_dry_run(dirpath, tmp_path):
+    tmp_path /= "tmp"  # copytree() can't copy to a dir that already exists
+    copytree(dirpath / "before", tmp_path)
+    r = CliRunner().invoke(
+        main,
+        ["-c", os.devnull, "-C", str(tmp_path), "add-typing", "--dry-run"],
+        standalone_mode=False,
+    )
+    assert r.exit_code == 0, show_result(r)
+    assert "+++ setup.cfg\n" in r.output
+    assert_dirtrees_eq(tmp_path, dirpath / "before")
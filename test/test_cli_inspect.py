@@ -0,0 +1,81 @@
+import json
+import os
+from shutil import copytree
+import subprocess
+from click.testing import CliRunner
+import pytest
+from pyrepo.__main__ import main
+from test_helpers import DATA_DIR, show_result
+
+PROJECTS = sorted((DATA_DIR / "inspect_project").iterdir())
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_pyrepo_inspect_fleet(tmp_path):
+    listfile = tmp_path / "projects.txt"
+    listfile.write_text(
+        "# Projects to inspect\n\n" + "".join(f"{p}\n" for p in PROJECTS[1:])
+    )
+    r = CliRunner().invoke(
+        main,
+        [
+            "-c",
+            os.devnull,
+            "inspect",
+            "--jobs",
+            "2",
+            "--from-file",
+            str(listfile),
+            str(PROJECTS[0]),
+        ],
+    )
+    assert r.exit_code == 1, show_result(r)
+    results = sorted(
+        map(json.loads, r.output.splitlines()), key=lambda res: res["directory"]
+    )
+    assert [res["directory"] for res in results] == list(map(str, PROJECTS))
+    for dirpath, res in zip(PROJECTS, results):
+        if (dirpath / "_errmsg.txt").exists():
+            assert res == {
+                "directory": str(dirpath),
+                "error_type": "InvalidProjectError",
+                "error": (dirpath / "_errmsg.txt").read_text().strip(),
+            }
+        else:
+            assert res == {
+                "directory": str(dirpath),
+                "result": json.loads((dirpath / "_inspect.json").read_text()),
+            }
+
+
+def test_pyrepo_inspect_fleet_broken_projects(tmp_path):
+    good = tmp_path / "good"
+    copytree(DATA_DIR / "inspect_project" / "has-ci", good)
+    for args in [
+        ["init", "-q"],
+        ["checkout", "-q", "-b", "main"],
+        ["add", "-A"],
+        ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+        + ["commit", "-q", "-m", "Initial commit"],
+    ]:
+        subprocess.run(["git", *args], cwd=good, check=True)
+    nongit = tmp_path / "nongit"
+    copytree(DATA_DIR / "inspect_project" / "has-ci", nongit)
+    missing = tmp_path / "missing"
+    r = CliRunner(mix_stderr=False).invoke(
+        main,
+        [
+            "-c",
+            os.devnull,
+            "inspect",
+            "--jobs",
+            "2",
+            *map(str, [good, nongit, missing]),
+        ],
+    )
+    assert r.exit_code == 1, show_result(r)
+    results = {res["directory"]: res for res in map(json.loads, r.stdout.splitlines())}
+    assert sorted(results) == sorted(map(str, [good, nongit, missing]))
+    assert results[str(good)]["result"]["default_branch"] == "main"
+    assert results[str(nongit)]["error_type"] == "SystemExit"
+    assert results[str(missing)]["error_type"] == "InvalidProjectError"
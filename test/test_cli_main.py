@@ -0,0 +1,68 @@
+from pathlib import Path
+import sys
+import click
+from click.testing import CliRunner
+import pytest
+import pyrepo
+from pyrepo.__main__ import COMMANDS, main
+from pyrepo.config import configure
+
+
+def test_commands_manifest():
+    cmddir = Path(pyrepo.__file__).with_name("commands")
+    modnames = {
+        p.stem
+        for p in cmddir.iterdir()
+        if p.suffix == ".py" and p.stem.isidentifier() and not p.stem.startswith("_")
+    }
+    assert set(COMMANDS.values()) == modnames
+    for cmdname, modname in COMMANDS.items():
+        assert cmdname == modname.replace("_", "-")
+
+
+def test_help_lists_all_commands():
+    r = CliRunner().invoke(main, ["--help"])
+    assert r.exit_code == 0, r.output
+    for cmdname in COMMANDS:
+        assert f"  {cmdname}" in r.output
+
+
+def test_commands_imported_lazily(mocker):
+    mocker.patch.dict(sys.modules)
+    for modname in COMMANDS.values():
+        sys.modules.pop(f"pyrepo.commands.{modname}", None)
+    mocker.patch.dict(main.commands, clear=True)
+    cmd = main.get_command(None, "inspect")
+    assert cmd is sys.modules["pyrepo.commands.inspect"].cli
+    assert "pyrepo.commands.release" not in sys.modules
+    assert "pyrepo.commands.init" not in sys.modules
+
+
+def test_command_defaults(tmp_path):
+    cfg = tmp_path / "pyrepo.cfg"
+    cfg.write_text(
+        "[options]\n"
+        "author = Example Author\n"
+        "\n"
+        "[options.make]\n"
+        "clean = yes\n"
+        "\n"
+        "[options.release]\n"
+        "tox = maybe\n"
+        "\n"
+        "[pyversions]\n"
+        "minimum = 3.6\n"
+        "maximum = 3.9\n"
+    )
+    ctx = click.Context(main)
+    configure(ctx, str(cfg))
+    defaults = ctx.obj.defaults["make"]
+    assert defaults["clean"] is True
+    assert defaults["author"] == "Example Author"
+    assert defaults["python_requires"] == "~=3.6"
+    # Invalid values are only reported for the commands that are looked up:
+    with pytest.raises(click.UsageError) as excinfo:
+        ctx.obj.defaults["release"]
+    assert str(excinfo.value) == "Invalid boolean value for config option tox: 'maybe'"
+    with pytest.raises(KeyError):
+        ctx.obj.defaults["nonexistent"]
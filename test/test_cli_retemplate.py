@@ -0,0 +1,148 @@
+import json
+import os
+from pathlib import Path
+from shutil import copytree
+import subprocess
+from click.testing import CliRunner
+import pytest
+from pyrepo.__main__ import main
+from pyrepo.commands.retemplate import retemplate_project
+from test_helpers import DATA_DIR, show_result
+
+
+@pytest.fixture
+def projects(tmp_path):
+    dirs = []
+    for name in ["has-ci", "has-docs-tests"]:
+        dirpath = tmp_path / name
+        copytree(DATA_DIR / "inspect_project" / name, dirpath)
+        (dirpath / "_inspect.json").unlink()
+        (dirpath / "tox.ini").write_text("[tox]\n")
+        dirs.append(dirpath)
+    return dirs
+
+
+def run_retemplate(*args):
+    return CliRunner(mix_stderr=False).invoke(
+        main, ["-c", os.devnull, "retemplate", "--jobs", "2", *args]
+    )
+
+
+def results_by_dir(output):
+    return {res["directory"]: res for res in map(json.loads, output.splitlines())}
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_retemplate_report(projects, tmp_path):
+    diff_file = tmp_path / "changes.diff"
+    r = run_retemplate(
+        "-t",
+        "tox.ini",
+        "--diff",
+        str(diff_file),
+        *map(str, projects),
+    )
+    assert r.exit_code == 0, show_result(r)
+    results = results_by_dir(r.stdout)
+    assert sorted(results) == sorted(map(str, projects))
+    for dirpath in projects:
+        res = results[str(dirpath)]["result"]
+        assert res["changed"] == ["tox.ini"]
+        assert res["applied"] is False
+        assert res["render_time"] >= 0
+        # Nothing is written without --apply:
+        assert (dirpath / "tox.ini").read_text() == "[tox]\n"
+    patch = diff_file.read_text()
+    for dirpath in projects:
+        assert f"--- {dirpath / 'tox.ini'}\n" in patch
+    assert "-[tox]\n" in patch
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_retemplate_apply(projects):
+    r = run_retemplate("--all", "--apply", *map(str, projects))
+    assert r.exit_code == 0, show_result(r)
+    for dirpath in projects:
+        assert (dirpath / "tox.ini").read_text() != "[tox]\n"
+    r = run_retemplate("--all", *map(str, projects))
+    assert r.exit_code == 0, show_result(r)
+    for res in results_by_dir(r.stdout).values():
+        assert res["result"]["changed"] == []
+        assert res["result"]["created"] == []
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_retemplate_affected_by(projects, tmp_path):
+    listfile = tmp_path / "projects.txt"
+    listfile.write_text("".join(f"{p}\n" for p in projects))
+    r = run_retemplate("--affected-by", "extra_testenvs", "--from-file", str(listfile))
+    assert r.exit_code == 0, show_result(r)
+    results = results_by_dir(r.stdout)
+    assert results[str(projects[0])]["result"]["unchanged"] == [
+        ".github/workflows/test.yml"
+    ]
+    assert results[str(projects[1])]["result"]["unchanged"] == []
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_retemplate_error(projects, tmp_path):
+    bad = tmp_path / "not-a-project"
+    bad.mkdir()
+    r = run_retemplate("-t", "tox.ini", str(bad), *map(str, projects))
+    assert r.exit_code == 1, show_result(r)
+    results = results_by_dir(r.stdout)
+    assert "error" in results[str(bad)]
+    assert all("result" in results[str(p)] for p in projects)
+
+
+def test_retemplate_no_templates(projects):
+    r = run_retemplate(str(projects[0]))
+    assert r.exit_code != 0
+    assert "No templates selected" in r.stderr
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_retemplate_diff_reads_once(projects, mocker):
+    dirpath = projects[0]
+    spy = mocker.spy(Path, "open")
+    res = retemplate_project(
+        dirpath,
+        templates=["tox.ini"],
+        all_templates=False,
+        variables=None,
+        apply=True,
+        with_diff=True,
+        use_cache=False,
+    )
+    assert res["changed"] == ["tox.ini"]
+    assert "-[tox]\n" in res["diff"]
+    toxini = dirpath / "tox.ini"
+    opens = [
+        c.kwargs.get("mode") or c.args[1]
+        for c in spy.call_args_list
+        if c.args[0] == toxini
+    ]
+    # Opened once for reading (for both the diff & the comparison) and once
+    # for writing:
+    assert opens == ["rb", "wb"]
+    assert (dirpath / "tox.ini").read_text() != "[tox]\n"
+
+
+def test_retemplate_non_git_project(projects, tmp_path):
+    good, nongit = projects
+    for args in [
+        ["init", "-q"],
+        ["checkout", "-q", "-b", "main"],
+        ["add", "-A"],
+        ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+        + ["commit", "-q", "-m", "Initial commit"],
+    ]:
+        subprocess.run(["git", *args], cwd=good, check=True)
+    missing = tmp_path / "missing"
+    r = run_retemplate("--all", *map(str, [good, nongit, missing]))
+    assert r.exit_code == 1, show_result(r)
+    results = results_by_dir(r.stdout)
+    assert sorted(results) == sorted(map(str, [good, nongit, missing]))
+    assert "tox.ini" in results[str(good)]["result"]["changed"]
+    assert results[str(nongit)]["error_type"] == "SystemExit"
+    assert results[str(missing)]["error_type"] == "InvalidProjectError"
@@ -0,0 +1,160 @@
+import logging
+import os
+from shutil import copytree
+from click.testing import CliRunner
+import pytest
+from pyrepo.__main__ import main
+from pyrepo.project import Project, WriteStatus
+from pyrepo.util import get_jinja_env
+from test_helpers import DATA_DIR, show_result
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    dirpath = tmp_path / "project"
+    copytree(DATA_DIR / "inspect_project" / "has-ci", dirpath)
+    (dirpath / "_inspect.json").unlink()
+    return dirpath
+
+
+def run_template(dirpath, *args):
+    return CliRunner(mix_stderr=False).invoke(
+        main, ["-c", os.devnull, "-C", str(dirpath), "template", *args]
+    )
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_write_template_status(project_dir):
+    project = Project.from_directory(project_dir)
+    jenv = get_jinja_env()
+    assert project.write_template("tox.ini", jenv) in (
+        WriteStatus.CHANGED,
+        WriteStatus.UNCHANGED,
+    )
+    st = (project_dir / "tox.ini").stat()
+    assert project.write_template("tox.ini", jenv) is WriteStatus.UNCHANGED
+    assert (project_dir / "tox.ini").stat().st_mtime_ns == st.st_mtime_ns
+    (project_dir / "tox.ini").write_text("[tox]\n")
+    assert project.write_template("tox.ini", jenv, dry_run=True) is WriteStatus.CHANGED
+    assert (project_dir / "tox.ini").read_text() == "[tox]\n"
+    assert project.write_template("tox.ini", jenv) is WriteStatus.CHANGED
+    assert project.write_template("tox.ini", jenv) is WriteStatus.UNCHANGED
+    assert project.write_template("tox.ini", jenv, force=False) is None
+    (project_dir / "docs").mkdir()
+    assert (
+        project.write_template("docs/conf.py", jenv, dry_run=True)
+        is WriteStatus.CREATED
+    )
+    assert not (project_dir / "docs" / "conf.py").exists()
+    assert project.write_template("docs/conf.py", jenv) is WriteStatus.CREATED
+    assert (project_dir / "docs" / "conf.py").exists()
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_check(project_dir):
+    r = run_template(project_dir, "tox.ini", "setup.cfg")
+    assert r.exit_code == 0, show_result(r)
+    r = run_template(project_dir, "--check", "tox.ini", "setup.cfg")
+    assert r.exit_code == 0, show_result(r)
+    assert r.stdout == ""
+    (project_dir / "tox.ini").write_text("[tox]\n")
+    r = run_template(project_dir, "--check", "tox.ini", "setup.cfg")
+    assert r.exit_code == 1, show_result(r)
+    assert r.stdout == "tox.ini\n"
+    assert (project_dir / "tox.ini").read_text() == "[tox]\n"
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_counts(caplog, project_dir):
+    r = run_template(project_dir, "tox.ini", "setup.cfg")
+    assert r.exit_code == 0, show_result(r)
+    (project_dir / "tox.ini").write_text("[tox]\n")
+    caplog.clear()
+    caplog.set_level(logging.INFO)
+    r = run_template(project_dir, "tox.ini", "setup.cfg", ".readthedocs.yml")
+    assert r.exit_code == 0, show_result(r)
+    assert "1 file(s) changed, 1 unchanged, 1 created" in caplog.messages
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_check_outfile(project_dir):
+    r = run_template(project_dir, "--check", "-o", "-", "tox.ini")
+    assert r.exit_code != 0
+    assert "mutually exclusive" in r.stderr
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_all(project_dir):
+    project = Project.from_directory(project_dir)
+    assert project.get_templated_files() == [
+        ".gitignore",
+        ".pre-commit-config.yaml",
+        "MANIFEST.in",
+        "pyproject.toml",
+        "setup.cfg",
+        "tox.ini",
+        ".github/workflows/test.yml",
+    ]
+    readme = (project_dir / "README.rst").read_text()
+    r = run_template(project_dir, "--all")
+    assert r.exit_code == 0, show_result(r)
+    jenv = get_jinja_env()
+    for path in project.get_templated_files():
+        assert (project_dir / path).read_text() == project.render_template(path, jenv)
+    assert (project_dir / "README.rst").read_text() == readme
+    r = run_template(project_dir, "--all", "--check")
+    assert r.exit_code == 0, show_result(r)
+    (project_dir / ".gitignore").unlink()
+    r = run_template(project_dir, "--all", "--check")
+    assert r.exit_code == 1, show_result(r)
+    assert r.stdout == ".gitignore\n"
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_write_templates_render_error(mocker, project_dir):
+    project = Project.from_directory(project_dir)
+    before = (project_dir / "tox.ini").read_text()
+    (project_dir / "tox.ini").write_text("[tox]\n")
+    real_render = Project.render_template
+
+    def render_template(self, template_path, jinja_env, context=None):
+        if template_path == "setup.cfg":
+            raise RuntimeError("Render failed")
+        return real_render(self, template_path, jinja_env, context)
+
+    mocker.patch.object(Project, "render_template", render_template)
+    with pytest.raises(RuntimeError):
+        project.write_templates(["tox.ini", "setup.cfg"], get_jinja_env())
+    # Nothing is written if any template fails:
+    assert (project_dir / "tox.ini").read_text() == "[tox]\n" != before
+
+
+def test_template_all_with_args(project_dir):
+    r = run_template(project_dir, "--all", "tox.ini")
+    assert r.exit_code != 0
+    assert "--all cannot be combined" in r.stderr
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_affected_by(project_dir):
+    (project_dir / "tox.ini").write_text("[tox]\n")
+    workflow = project_dir / ".github" / "workflows" / "test.yml"
+    with workflow.open("a") as fp:
+        fp.write("# Edited\n")
+    r = run_template(project_dir, "--affected-by", "extra_testenvs,supports_pypy3")
+    assert r.exit_code == 0, show_result(r)
+    assert (project_dir / "tox.ini").read_text() == "[tox]\n"
+    assert not workflow.read_text().endswith("# Edited\n")
+    r = run_template(project_dir, "--affected-by", "has_doctests", "--check")
+    assert r.exit_code == 1, show_result(r)
+    assert r.stdout == "tox.ini\n"
+    r = run_template(project_dir, "--affected-by", "python_versions", "setup.cfg")
+    assert r.exit_code == 0, show_result(r)
+    assert (project_dir / "tox.ini").read_text() == "[tox]\n"
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_template_affected_by_unknown(project_dir):
+    r = run_template(project_dir, "--affected-by", "python_versions,nonexistent")
+    assert r.exit_code != 0
+    assert "Unknown template variable: 'nonexistent'" in r.stderr
@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+import subprocess
+import pytest
+from pyrepo import doctests
+from pyrepo.doctests import contains_doctest, has_doctests
+
+
+@pytest.mark.parametrize(
+    "data,result",
+    [
+        (b"", False),
+        (b">>> 1 + 1\n2\n", True),
+        (b'def f():\n    """\n    >>> f()\n    """\n', True),
+        (b"x = 1\n\n\t >>> x\n", True),
+        (b"x = '>>> not a doctest'\n", False),
+        (b"# >>> not a doctest\n", False),
+        (b">>>\n", True),
+        (b">>>x\n", False),
+        (b">>>", False),
+        (b"foo >>> bar\n>>> 42\n", True),
+        (b"\0binary\n>>> 42\n", False),
+    ],
+)
+def test_contains_doctest(data, result):
+    assert contains_doctest(data) is result
+
+
+def mkfiles(dirpath: Path, files: dict) -> None:
+    for relpath, content in files.items():
+        path = dirpath / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_has_doctests_scandir(tmp_path):
+    mkfiles(
+        tmp_path,
+        {
+            "foo/__init__.py": "x = 1\n",
+            "foo/bar.py": "y = 2\n",
+            "foo/notes.txt": ">>> 1 + 1\n",
+            "foo/__pycache__/bar.py": ">>> 1 + 1\n",
+            ".hidden/baz.py": ">>> 1 + 1\n",
+        },
+    )
+    assert not has_doctests(tmp_path)
+    mkfiles(tmp_path, {"foo/sub/quux.py": '"""\n>>> 1 + 1\n2\n"""\n'})
+    assert has_doctests(tmp_path)
+
+
+def test_has_doctests_honors_gitignore(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=str(tmp_path), check=True)
+    mkfiles(
+        tmp_path,
+        {
+            ".gitignore": "/src/foo/_generated.py\n",
+            "src/foo/__init__.py": "x = 1\n",
+            "src/foo/_generated.py": ">>> 1 + 1\n",
+        },
+    )
+    assert not has_doctests(tmp_path / "src")
+    mkfiles(tmp_path, {"src/foo/untracked.py": ">>> 1 + 1\n"})
+    assert has_doctests(tmp_path / "src")
+
+
+def test_has_doctests_skips_oversized(monkeypatch, tmp_path):
+    monkeypatch.setattr(doctests, "MAX_FILE_SIZE", 16)
+    mkfiles(tmp_path, {"big.py": "x = 1\n" * 10 + ">>> 1 + 1\n"})
+    assert not has_doctests(tmp_path)
+
+
+def test_has_doctests_mmap(monkeypatch, tmp_path):
+    monkeypatch.setattr(doctests, "MMAP_THRESHOLD", 16)
+    mkfiles(tmp_path, {"big.py": "x = 1\n" * 10 + ">>> 1 + 1\n"})
+    assert has_doctests(tmp_path)
+
+
+def test_has_doctests_cache(mocker, tmp_path):
+    cache_file = tmp_path / "cache" / "doctests.json"
+    srcdir = tmp_path / "src"
+    mkfiles(srcdir, {"a.py": "x = 1\n", "b.py": "y = 2\n"})
+    scan_file = mocker.spy(doctests, "scan_file")
+    assert not has_doctests(srcdir, cache_file=cache_file)
+    assert scan_file.call_count == 2
+    assert sorted(json.loads(cache_file.read_text())) == ["a.py", "b.py"]
+    assert not has_doctests(srcdir, cache_file=cache_file)
+    # Files modified within the last couple seconds are always rescanned:
+    assert scan_file.call_count == 4
+    cache = json.loads(cache_file.read_text())
+    for relpath, entry in cache.items():
+        st = (srcdir / relpath).stat()
+        cache[relpath] = [st.st_ino, st.st_mtime_ns, st.st_size, entry[3]]
+    cache_file.write_text(json.dumps(cache))
+    assert not has_doctests(srcdir, cache_file=cache_file)
+    assert scan_file.call_count == 4
+    mkfiles(srcdir, {"b.py": ">>> 1 + 1\n"})
+    assert has_doctests(srcdir, cache_file=cache_file)
+    assert scan_file.call_count == 5
+    assert json.loads(cache_file.read_text())["b.py"][3] is True
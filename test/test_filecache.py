@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+import stat
+import pytest
+from pyrepo.filecache import FileCache
+
+
+def test_read_once(tmp_path, mocker):
+    (tmp_path / "foo.txt").write_text("Foo\n")
+    cache = FileCache(tmp_path)
+    spy = mocker.spy(Path, "read_text")
+    assert cache.read_text("foo.txt") == "Foo\n"
+    assert cache.read_text(tmp_path / "foo.txt") == "Foo\n"
+    assert spy.call_count == 1
+    (tmp_path / "foo.txt").write_text("Changed\n")
+    assert cache.read_text("foo.txt") == "Foo\n"
+
+
+def test_edits_flushed_once(tmp_path, mocker):
+    (tmp_path / "foo.txt").write_text("Foo\n")
+    (tmp_path / "old.txt").write_text("Old\n")
+    (tmp_path / "same.txt").write_text("Same\n")
+    cache = FileCache(tmp_path)
+    cache.write_text("foo.txt", "Bar\n")
+    cache.write_text("foo.txt", cache.read_text("foo.txt") + "Baz\n")
+    cache.rename("old.txt", Path("sub", "new.txt"))
+    cache.touch("empty.txt")
+    cache.write_text("same.txt", "Same\n")
+    assert cache.exists("sub/new.txt")
+    assert not cache.exists("old.txt")
+    with pytest.raises(FileNotFoundError):
+        cache.read_text("old.txt")
+    assert (tmp_path / "foo.txt").read_text() == "Foo\n"
+    assert (tmp_path / "old.txt").exists()
+    assert cache.get_dirty() == [
+        Path("empty.txt"),
+        Path("foo.txt"),
+        Path("old.txt"),
+        Path("sub", "new.txt"),
+    ]
+    spy = mocker.spy(os, "replace")
+    assert cache.flush() == [
+        Path("empty.txt"),
+        Path("foo.txt"),
+        Path("old.txt"),
+        Path("sub", "new.txt"),
+    ]
+    assert spy.call_count == 3
+    assert (tmp_path / "foo.txt").read_text() == "Bar\nBaz\n"
+    assert not (tmp_path / "old.txt").exists()
+    assert (tmp_path / "sub" / "new.txt").read_text() == "Old\n"
+    assert (tmp_path / "empty.txt").read_text() == ""
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "empty.txt",
+        "foo.txt",
+        "same.txt",
+        "sub",
+    ]
+    assert cache.get_dirty() == []
+    assert cache.flush() == []
+
+
+def test_flush_preserves_mode(tmp_path):
+    script = tmp_path / "script.sh"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o755)
+    cache = FileCache(tmp_path)
+    cache.write_text("script.sh", "#!/bin/sh\nexit 0\n")
+    cache.flush()
+    assert stat.S_IMODE(script.stat().st_mode) == 0o755
+    assert script.read_text() == "#!/bin/sh\nexit 0\n"
+
+
+def test_diff(tmp_path):
+    (tmp_path / "foo.txt").write_text("Foo\nBar\n")
+    (tmp_path / "gone.txt").write_text("Gone\n")
+    cache = FileCache(tmp_path)
+    cache.write_text("foo.txt", "Foo\nQuux\n")
+    cache.delete("gone.txt")
+    cache.write_text("new.txt", "New\n")
+    assert cache.diff() == (
+        "--- foo.txt\n"
+        "+++ foo.txt\n"
+        "@@ -1,2 +1,2 @@\n"
+        " Foo\n"
+        "-Bar\n"
+        "+Quux\n"
+        "--- gone.txt\n"
+        f"+++ {os.devnull}\n"
+        "@@ -1 +0,0 @@\n"
+        "-Gone\n"
+        f"--- {os.devnull}\n"
+        "+++ new.txt\n"
+        "@@ -0,0 +1 @@\n"
+        "+New\n"
+    )
+    assert (tmp_path / "foo.txt").read_text() == "Foo\nBar\n"
+    assert (tmp_path / "gone.txt").exists()
+    assert not (tmp_path / "new.txt").exists()
@@ -0,0 +1,138 @@
+from pathlib import Path
+import subprocess
+import pytest
+from pyrepo.gitmeta import (
+    GitMetadata,
+    NotARepositoryError,
+    UnsupportedRepositoryError,
+    parse_git_config,
+)
+
+
+def git(dirpath: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=str(dirpath),
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    dirpath = tmp_path / "repo"
+    dirpath.mkdir()
+    git(dirpath, "init", "-q")
+    git(dirpath, "checkout", "-q", "-b", "main")
+    git(dirpath, "config", "user.name", "Test")
+    git(dirpath, "config", "user.email", "test@example.com")
+    git(dirpath, "commit", "-q", "--allow-empty", "-m", "Initial commit")
+    git(dirpath, "branch", "feature/packed")
+    git(dirpath, "pack-refs", "--all")
+    git(dirpath, "branch", "loose")
+    git(dirpath, "remote", "add", "origin", "https://github.com/example/repo")
+    git(dirpath, "remote", "add", "upstream", "git@github.com:upstream/repo.git")
+    return dirpath
+
+
+def git_branches(dirpath: Path) -> set:
+    return set(git(dirpath, "branch", "--format=%(refname:short)").splitlines())
+
+
+def test_branches(repo):
+    meta = GitMetadata.for_directory(repo)
+    assert meta.branches() == {"main", "feature/packed", "loose"}
+    assert meta.branches() == git_branches(repo)
+    assert meta.has_branch("main")
+    assert meta.has_branch("feature/packed")
+    assert not meta.has_branch("master")
+    assert meta.head() == ("refs/heads/main", git(repo, "rev-parse", "HEAD"))
+    assert meta.current_branch() == "main"
+
+
+def test_subdirectory(repo):
+    (repo / "src" / "pkg").mkdir(parents=True)
+    meta = GitMetadata.for_directory(repo / "src" / "pkg")
+    assert meta.gitdir == (repo / ".git").resolve()
+    assert meta.branches() == git_branches(repo)
+
+
+def test_detached_head(repo):
+    git(repo, "checkout", "-q", "--detach")
+    meta = GitMetadata.for_directory(repo)
+    assert meta.head() == (None, git(repo, "rev-parse", "HEAD"))
+    assert meta.current_branch() is None
+
+
+def test_unborn_branch(tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "checkout", "-q", "-b", "trunk")
+    meta = GitMetadata.for_directory(tmp_path)
+    assert meta.head() == ("refs/heads/trunk", None)
+    assert meta.branches() == set()
+
+
+def test_worktree(repo, tmp_path):
+    wt = tmp_path / "wt"
+    git(repo, "worktree", "add", "-q", "-b", "wt-branch", str(wt))
+    meta = GitMetadata.for_directory(wt)
+    assert meta.gitdir != meta.commondir
+    assert meta.commondir == (repo / ".git").resolve()
+    assert meta.branches() == git_branches(wt)
+    assert meta.current_branch() == "wt-branch"
+    assert meta.head()[1] == git(wt, "rev-parse", "HEAD")
+    assert set(meta.remote_urls()) == {"origin", "upstream"}
+
+
+def test_separate_git_dir(tmp_path):
+    worktree = tmp_path / "work"
+    gitdir = tmp_path / "store.git"
+    worktree.mkdir()
+    git(worktree, "init", "-q", f"--separate-git-dir={gitdir}")
+    assert (worktree / ".git").is_file()
+    git(worktree, "checkout", "-q", "-b", "master")
+    meta = GitMetadata.for_directory(worktree)
+    assert meta.gitdir == gitdir.resolve()
+    assert meta.current_branch() == "master"
+
+
+def test_remote_urls(repo):
+    meta = GitMetadata.for_directory(repo)
+    assert meta.remote_urls() == {
+        "origin": ["https://github.com/example/repo"],
+        "upstream": ["git@github.com:upstream/repo.git"],
+    }
+
+
+def test_not_a_repository(tmp_path):
+    with pytest.raises(NotARepositoryError):
+        GitMetadata.for_directory(tmp_path)
+
+
+def test_reftable_unsupported(repo):
+    with (repo / ".git" / "config").open("a") as fp:
+        fp.write("[extensions]\n\trefStorage = reftable\n")
+    with pytest.raises(UnsupportedRepositoryError):
+        GitMetadata.for_directory(repo)
+
+
+def test_parse_git_config():
+    config = [
+        "# A comment\n",
+        "[core]\n",
+        "\tbare = false\n",
+        "\tFileMode\n",
+        '[remote "my \\"remote\\""]  ; comment\n',
+        '\turl = "https://example.com/a b" # comment\n',
+        "\tfetch = +refs/heads/*:refs/remotes/origin/*\n",
+        "[Branch.main]\n",
+        "\tremote = origin\n",
+    ]
+    assert list(parse_git_config(config)) == [
+        ("core", None, "bare", "false"),
+        ("core", None, "filemode", "true"),
+        ("remote", 'my "remote"', "url", "https://example.com/a b"),
+        ("remote", 'my "remote"', "fetch", "+refs/heads/*:refs/remotes/origin/*"),
+        ("branch", "main", "remote", "origin"),
+    ]
@@ -0,0 +1,148 @@
+from pathlib import Path
+import subprocess
+import pytest
+from pyrepo.gitrepo import CommitInfo, GitError, GitRepo, Signature
+
+
+def git(dirpath: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=str(dirpath),
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    dirpath = tmp_path / "repo"
+    dirpath.mkdir()
+    git(dirpath, "init", "-q")
+    git(dirpath, "checkout", "-q", "-b", "main")
+    git(dirpath, "config", "user.name", "Test")
+    git(dirpath, "config", "user.email", "test@example.com")
+    git(dirpath, "commit", "-q", "--allow-empty", "-m", "Initial commit")
+    git(
+        dirpath,
+        "commit",
+        "-q",
+        "--allow-empty",
+        "-m",
+        "Version 1.0.0\n\n- Added a feature\n- Fixed a bug\n",
+    )
+    git(dirpath, "tag", "-a", "-m", "Version 1.0.0", "v1.0.0")
+    with GitRepo(dirpath) as r:
+        yield r
+
+
+def test_read_object(repo):
+    sha, objtype, data = repo.read_object("HEAD")
+    assert sha == git(repo.directory, "rev-parse", "HEAD")
+    assert objtype == "commit"
+    assert data == git(repo.directory, "cat-file", "commit", "HEAD").encode() + b"\n"
+    tag = repo.read_object("v1.0.0")
+    assert tag is not None
+    assert tag[1] == "tag"
+    assert repo.read_object("v9.9.9") is None
+    assert repo.read_object("v9.9.9^{commit}") is None
+    # The process is still usable after a missing object:
+    assert repo.read_object("HEAD^")[1] == "commit"
+
+
+def test_read_object_newline(repo):
+    with pytest.raises(ValueError):
+        repo.read_object("HEAD\nHEAD")
+
+
+def test_commit_info(repo):
+    info = repo.commit_info("v1.0.0")
+    assert info.sha == git(repo.directory, "rev-parse", "v1.0.0^{commit}")
+    assert info.parents == [git(repo.directory, "rev-parse", "HEAD^")]
+    assert info.author.name == "Test"
+    assert info.author.email == "test@example.com"
+    assert info.committer.timestamp == int(
+        git(repo.directory, "show", "-s", "--format=%ct", "HEAD")
+    )
+    assert info.subject == git(repo.directory, "show", "-s", "--format=%s", "HEAD")
+    assert info.body == git(repo.directory, "show", "-s", "--format=%b", "HEAD") + "\n"
+    assert repo.commit_info("HEAD^").parents == []
+
+
+def test_commit_info_missing(repo):
+    with pytest.raises(GitError):
+        repo.commit_info("v9.9.9")
+
+
+def test_commit_info_sees_new_tags(repo):
+    repo.commit_info("HEAD")
+    git(repo.directory, "tag", "v1.0.1", "HEAD^")
+    git(repo.directory, "pack-refs", "--all")
+    assert repo.commit_info("v1.0.1").subject == "Initial commit"
+
+
+def test_single_process(repo, mocker):
+    popen = mocker.spy(subprocess, "Popen")
+    for _ in range(5):
+        repo.commit_info("v1.0.0")
+        repo.commit_info("HEAD^")
+    assert popen.call_count == 1
+    repo.close()
+    repo.commit_info("HEAD")
+    assert popen.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "message,subject,body",
+    [
+        ("Subject\n", "Subject", ""),
+        ("Subject\n\nBody\n", "Subject", "Body\n"),
+        ("Two-line\nsubject\n\nBody\n\nMore\n", "Two-line subject", "Body\n\nMore\n"),
+        ("\n\nSubject\n\n\nBody\n", "Subject", "Body\n"),
+    ],
+)
+def test_commit_info_message(message, subject, body):
+    sig = Signature(name="Test", email="test@example.com", timestamp=0, tz="+0000")
+    info = CommitInfo(
+        sha="0" * 40,
+        tree="0" * 40,
+        parents=[],
+        author=sig,
+        committer=sig,
+        message=message,
+    )
+    assert info.subject == subject
+    assert info.body == body
+
+
+def test_signature_parse():
+    assert Signature.parse("J. Random <jr@example.com> 1555438634 -0400") == Signature(
+        name="J. Random", email="jr@example.com", timestamp=1555438634, tz="-0400"
+    )
+
+
+def test_log_lines(repo):
+    assert list(repo.log_lines("--format=%s")) == ["Version 1.0.0", "Initial commit"]
+    assert list(repo.log_lines("--format=%s", "HEAD^..HEAD")) == ["Version 1.0.0"]
+    with pytest.raises(GitError):
+        list(repo.log_lines("nonexistent-rev"))
+
+
+def test_head(repo, tmp_path):
+    assert repo.head() == git(repo.directory, "rev-parse", "HEAD")
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    git(empty, "init", "-q")
+    assert GitRepo(empty).head() is None
+
+
+def test_remotes(repo):
+    assert repo.remotes() == []
+    git(repo.directory, "remote", "add", "origin", "https://github.com/example/repo")
+    assert repo.remotes() == ["origin"]
+
+
+def test_for_directory(repo):
+    r = GitRepo.for_directory(repo.directory)
+    assert GitRepo.for_directory(str(repo.directory)) is r
+    assert r is not repo
@@ -0,0 +1,152 @@
+from configparser import ConfigParser
+from pathlib import Path
+import pytest
+from pyrepo.inifile import IniDocument, IniSection
+
+DATA_DIR = Path(__file__).with_name("data")
+
+INI_FILES = sorted(
+    p
+    for subdir in ("add_typing", "inspect_project", "unflatten")
+    for pattern in ("**/setup.cfg", "**/tox.ini")
+    for p in (DATA_DIR / subdir).glob(pattern)
+)
+
+SETUP_CFG = """\
+# Leading comment
+
+[metadata]
+name = foobar
+classifiers =
+    Development Status :: 3 - Alpha
+    #Development Status :: 4 - Beta
+    Programming Language :: Python :: 3
+    ###
+
+keywords = foo, bar
+
+[options]
+py_modules = foobar
+install_requires =
+    attrs ~= 19.1
+
+    click ~= 7.0
+
+[flake8]
+max-line-length = 80
+"""
+
+
+@pytest.mark.parametrize(
+    "filepath", INI_FILES, ids=lambda p: str(p.relative_to(DATA_DIR))
+)
+def test_roundtrip_matches_configparser(filepath):
+    text = filepath.read_text(encoding="utf-8")
+    doc = IniDocument.parse(text)
+    assert str(doc) == text
+    cfg = ConfigParser(interpolation=None)
+    cfg.optionxform = str
+    cfg.read_string(text)
+    assert [s.name for s in doc.sections if s.name is not None] == cfg.sections()
+    for name in cfg.sections():
+        assert list(doc[name].keys()) == list(cfg[name].keys())
+        for key, value in cfg[name].items():
+            assert doc[name][key].value == value
+
+
+def test_lookup():
+    doc = IniDocument.parse(SETUP_CFG)
+    assert str(doc) == SETUP_CFG
+    assert doc.sections[0].name is None
+    assert "metadata" in doc
+    assert "mypy" not in doc
+    assert doc.get("mypy") is None
+    with pytest.raises(KeyError):
+        doc["mypy"]
+    assert doc["metadata"]["NAME"].value == "foobar"
+    assert doc["metadata"]["classifiers"].value == (
+        "\nDevelopment Status :: 3 - Alpha\nProgramming Language :: Python :: 3"
+    )
+    assert doc["options"]["install_requires"].value == (
+        "\nattrs ~= 19.1\n\nclick ~= 7.0"
+    )
+    assert doc["flake8"]["max-line-length"].value == "80"
+
+
+def test_edits():
+    doc = IniDocument.parse(SETUP_CFG)
+    doc["metadata"]["classifiers"].append_line("Typing :: Typed")
+    doc["metadata"]["keywords"].set_value("foo, bar, baz")
+    doc["options"].replace("py_modules", "packages", "find:")
+    doc["options"].set("python_requires", "~=3.6")
+    doc["flake8"].set("ignore", "\nE203,\nW503")
+    doc["metadata"].delete("name")
+    find = IniSection.new("options.packages.find")
+    find.set("where", "src")
+    doc.add_section(find, after="options")
+    doc.add_section(IniDocument.parse("[mypy]\npretty = True\n").sections[0])
+    assert str(doc) == (
+        "# Leading comment\n"
+        "\n"
+        "[metadata]\n"
+        "classifiers =\n"
+        "    Development Status :: 3 - Alpha\n"
+        "    #Development Status :: 4 - Beta\n"
+        "    Programming Language :: Python :: 3\n"
+        "    ###\n"
+        "    Typing :: Typed\n"
+        "\n"
+        "keywords = foo, bar, baz\n"
+        "\n"
+        "[options]\n"
+        "packages = find:\n"
+        "install_requires =\n"
+        "    attrs ~= 19.1\n"
+        "\n"
+        "    click ~= 7.0\n"
+        "python_requires = ~=3.6\n"
+        "\n"
+        "[options.packages.find]\n"
+        "where = src\n"
+        "\n"
+        "[flake8]\n"
+        "max-line-length = 80\n"
+        "ignore =\n"
+        "    E203,\n"
+        "    W503\n"
+        "\n"
+        "[mypy]\n"
+        "pretty = True\n"
+    )
+    assert "name" not in doc["metadata"]
+    assert doc["options"]["packages"].value == "find:"
+    assert "py_modules" not in doc["options"]
+    assert doc["options.packages.find"] is find
+
+
+def test_no_trailing_newline():
+    doc = IniDocument.parse("[tox]\nenvlist = py36")
+    doc["tox"]["envlist"].append_line("py37")
+    doc.add_section(IniSection.new("testenv"))
+    assert str(doc) == "[tox]\nenvlist = py36\n    py37\n\n[testenv]\n"
+
+
+@pytest.mark.parametrize(
+    "before,after",
+    [
+        ("envlist = py37,py38\n", "envlist = typing,py37,py38\n"),
+        (
+            "envlist =\n    py37,py38\n    # py39 disabled\n    pypy3\n",
+            "envlist =\n    typing,py37,py38\n    # py39 disabled\n    pypy3\n",
+        ),
+        (
+            "envlist =\n    # py36 disabled\n\n    py37\n",
+            "envlist =\n    # py36 disabled\n\n    typing,py37\n",
+        ),
+        ("envlist =\n", "envlist = typing,\n"),
+    ],
+)
+def test_prepend_to_first_item(before, after):
+    doc = IniDocument.parse("[tox]\n" + before + "\n[testenv]\n")
+    doc["tox"]["envlist"].prepend_to_first_item("typing,")
+    assert str(doc) == "[tox]\n" + after + "\n[testenv]\n"
@@ -1,10 +1,14 @@
 import json
 from operator import attrgetter
+import os
 from pathlib import Path
-from shutil import copyfile
+from shutil import copyfile, copytree
+import subprocess
 import time
 import pytest
-from pyrepo import util
+from pyrepo import inspecting, util
+from pyrepo.gitmeta import UnsupportedRepositoryError
+from pyrepo.gitrepo import GitRepo
 from pyrepo.inspecting import (
     InvalidProjectError,
     extract_requires,
@@ -32,11 +36,12 @@ DATA_DIR = Path(__file__).with_name("data")
 def test_get_commit_years_include_now(gitoutput, result, mocker):
     # Set current time to 2019-04-16T18:17:14Z:
     mocker.patch("time.localtime", return_value=time.localtime(1555438634))
-    mocker.patch("pyrepo.util.readcmd", return_value=gitoutput)
-    assert get_commit_years(Path()) == result
-    util.readcmd.assert_called_once_with(
-        "git", "log", "--format=%ad", "--date=format:%Y", cwd=Path()
+    mocker.patch.object(GitRepo, "head", return_value="0" * 40)
+    log_lines = mocker.patch.object(
+        GitRepo, "log_lines", return_value=iter(gitoutput.splitlines())
     )
+    assert get_commit_years(Path()) == result
+    log_lines.assert_called_once_with("--format=%ad", "--date=format:%Y")
     time.localtime.assert_called_once_with()
 
 
@@ -53,11 +58,12 @@ def test_get_commit_years_include_now(gitoutput, result, mocker):
 def test_get_commit_years_no_include_now(gitoutput, result, mocker):
     # Set current time to 2019-04-16T18:17:14Z:
     mocker.patch("time.localtime", return_value=time.localtime(1555438634))
-    mocker.patch("pyrepo.util.readcmd", return_value=gitoutput)
-    assert get_commit_years(Path(), include_now=False) == result
-    util.readcmd.assert_called_once_with(
-        "git", "log", "--format=%ad", "--date=format:%Y", cwd=Path()
+    mocker.patch.object(GitRepo, "head", return_value="0" * 40)
+    log_lines = mocker.patch.object(
+        GitRepo, "log_lines", return_value=iter(gitoutput.splitlines())
     )
+    assert get_commit_years(Path(), include_now=False) == result
+    log_lines.assert_called_once_with("--format=%ad", "--date=format:%Y")
     time.localtime.assert_not_called()
 
 
@@ -155,15 +161,47 @@ def test_inspect_project(dirpath, mocker):
         assert project.get_template_context() == env
 
 
+@pytest.mark.parametrize(
+    "branches,result",
+    [
+        (["foo", "master", "quux"], "master"),
+        (["foo", "main", "quux"], "main"),
+        (["foo", "main", "master", "quux"], "main"),
+    ],
+)
+def test_get_default_branch(branches, result, mocker, tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=str(tmp_path), check=True)
+    (tmp_path / ".git" / "refs" / "heads" / branches[0]).write_text("0" * 40 + "\n")
+    (tmp_path / ".git" / "packed-refs").write_text(
+        "# pack-refs with: peeled fully-peeled sorted \n"
+        + "".join(f"{'0' * 40} refs/heads/{b}\n" for b in branches[1:])
+    )
+    mocker.spy(util, "readcmd")
+    assert get_default_branch(tmp_path) == result
+    util.readcmd.assert_not_called()
+
+
+def test_get_default_branch_error(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=str(tmp_path), check=True)
+    for b in ["foo", "quux"]:
+        (tmp_path / ".git" / "refs" / "heads" / b).write_text("0" * 40 + "\n")
+    with pytest.raises(InvalidProjectError) as excinfo:
+        get_default_branch(tmp_path)
+    assert str(excinfo.value) == "Could not determine default Git branch"
+
+
 @pytest.mark.parametrize(
     "gitoutput,result",
     [
         ("foo\nmaster\nquux", "master"),
         ("foo\nmain\nquux", "main"),
-        ("foo\nmain\nmaster\nquux", "main"),
     ],
 )
-def test_get_default_branch(gitoutput, result, mocker):
+def test_get_default_branch_fallback(gitoutput, result, mocker):
+    mocker.patch(
+        "pyrepo.inspecting.GitMetadata.for_directory",
+        side_effect=UnsupportedRepositoryError("reftable"),
+    )
     mocker.patch("pyrepo.util.readcmd", return_value=gitoutput)
     assert get_default_branch(Path()) == result
     util.readcmd.assert_called_once_with(
@@ -171,11 +209,74 @@ def test_get_default_branch(gitoutput, result, mocker):
     )
 
 
-def test_get_default_branch_error(mocker):
-    mocker.patch("pyrepo.util.readcmd", return_value="foo\nquux")
+@pytest.mark.usefixtures("default_branch")
+def test_inspect_project_probe_error(tmp_path):
+    dirpath = tmp_path / "project"
+    copytree(DATA_DIR / "inspect_project" / "flat-req", dirpath)
+    (dirpath / "LICENSE").write_text("No copyright here\n")
     with pytest.raises(InvalidProjectError) as excinfo:
-        get_default_branch(Path())
-    assert str(excinfo.value) == "Could not determine default Git branch"
-    util.readcmd.assert_called_once_with(
-        "git", "--no-pager", "branch", "--format=%(refname:short)", cwd=Path()
+        inspect_project(dirpath)
+    assert str(excinfo.value) == "Copyright years not found in LICENSE"
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_get_commit_years_empty_repo(mocker, tmp_path, use_cache):
+    mocker.patch("time.localtime", return_value=time.localtime(1555438634))
+    subprocess.run(["git", "init", "-q"], cwd=str(tmp_path), check=True)
+    assert get_commit_years(tmp_path, include_now=False, use_cache=use_cache) == []
+    assert get_commit_years(tmp_path, use_cache=use_cache) == [2019]
+
+
+def test_get_commit_years_cached(mocker, tmp_path):
+    def commit(year):
+        subprocess.run(
+            ["git", "commit", "-q", "--allow-empty", "-m", f"Commit from {year}"],
+            cwd=str(tmp_path),
+            check=True,
+            env={
+                **os.environ,
+                "GIT_AUTHOR_NAME": "Test",
+                "GIT_AUTHOR_EMAIL": "test@example.com",
+                "GIT_AUTHOR_DATE": f"{year}-06-15T12:00:00Z",
+                "GIT_COMMITTER_NAME": "Test",
+                "GIT_COMMITTER_EMAIL": "test@example.com",
+            },
+        )
+
+    subprocess.run(["git", "init", "-q"], cwd=str(tmp_path), check=True)
+    log_commit_years = mocker.spy(inspecting, "log_commit_years")
+    assert get_commit_years(tmp_path, include_now=False, use_cache=True) == []
+    assert log_commit_years.call_count == 0
+    commit(2015)
+    commit(2017)
+    assert get_commit_years(tmp_path, include_now=False, use_cache=True) == [
+        2015,
+        2017,
+    ]
+    log_commit_years.assert_called_once_with(tmp_path)
+    log_commit_years.reset_mock()
+    assert get_commit_years(tmp_path, include_now=False, use_cache=True) == [
+        2015,
+        2017,
+    ]
+    assert log_commit_years.call_count == 0
+    head = util.readcmd("git", "rev-parse", "HEAD", cwd=tmp_path)
+    commit(2019)
+    assert get_commit_years(tmp_path, include_now=False, use_cache=True) == [
+        2015,
+        2017,
+        2019,
+    ]
+    new_head = util.readcmd("git", "rev-parse", "HEAD", cwd=tmp_path)
+    log_commit_years.assert_called_once_with(tmp_path, f"{head}..{new_head}")
+    log_commit_years.reset_mock()
+    # Rewrite history:
+    subprocess.run(
+        ["git", "reset", "-q", "--hard", "HEAD~2"], cwd=str(tmp_path), check=True
     )
+    commit(2016)
+    assert get_commit_years(tmp_path, include_now=False, use_cache=True) == [
+        2015,
+        2016,
+    ]
+    log_commit_years.assert_called_once_with(tmp_path)
@@ -0,0 +1,97 @@
+import json
+import os
+from pathlib import Path
+from shutil import copytree
+import pytest
+from pyrepo import __version__, inspecting
+from pyrepo.inspecting import inspect_project
+from pyrepo.inspection_cache import InspectionCache
+
+DATA_DIR = Path(__file__).with_name("data")
+
+
+@pytest.fixture
+def project(tmp_path):
+    dirpath = tmp_path / "project"
+    copytree(DATA_DIR / "inspect_project" / "nonflat-req", dirpath)
+    (dirpath / ".git" / "refs" / "heads").mkdir(parents=True)
+    (dirpath / ".git" / "HEAD").write_text("ref: refs/heads/master\n")
+    return dirpath
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_inspection_cache(mocker, project):
+    expected = json.loads((project / "_inspect.json").read_text())
+    spy = mocker.spy(inspecting, "scan_project")
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 1
+    assert (project / ".git" / "pyrepo" / "inspection.json").exists()
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 1
+    # Changing only the mtime of an input is still a hit:
+    setup_cfg = project / "setup.cfg"
+    st = setup_cfg.stat()
+    os.utime(setup_cfg, ns=(st.st_atime_ns, st.st_mtime_ns - 10_000_000_000))
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 1
+    # Changing the contents of an input is a miss:
+    setup_cfg.write_text(
+        setup_cfg.read_text().replace("author = John", "author = Jane")
+    )
+    env = inspect_project(project, use_cache=True)
+    assert spy.call_count == 2
+    assert env["author"] == expected["author"].replace("John", "Jane")
+    # Adding a file under src/ is a miss:
+    (project / "src" / "foobar" / "cli.py").write_text(">>> 1 + 1\n")
+    env = inspect_project(project, use_cache=True)
+    assert spy.call_count == 3
+    assert env["has_doctests"]
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_inspection_no_cache(mocker, project):
+    spy = mocker.spy(inspecting, "scan_project")
+    inspect_project(project)
+    inspect_project(project)
+    assert spy.call_count == 2
+    assert not (project / ".git" / "pyrepo").exists()
+
+
+@pytest.mark.parametrize(
+    "cached",
+    [
+        [],
+        {"pyrepo_version": __version__},
+        {"pyrepo_version": __version__, "files": [], "data": {}},
+        {"pyrepo_version": __version__, "files": {"setup.cfg": 42}, "data": {}},
+    ],
+)
+@pytest.mark.usefixtures("default_branch")
+def test_inspection_cache_bad_shape(cached, mocker, project):
+    expected = json.loads((project / "_inspect.json").read_text())
+    cache_file = project / ".git" / "pyrepo" / "inspection.json"
+    cache_file.parent.mkdir()
+    cache_file.write_text(json.dumps(cached))
+    spy = mocker.spy(inspecting, "scan_project")
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 1
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 1
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_inspection_cache_file_deleted_during_check(mocker, project):
+    expected = json.loads((project / "_inspect.json").read_text())
+    extra = project / "src" / "foobar" / "extra.py"
+    extra.write_text("x = 1\n")
+    spy = mocker.spy(inspecting, "scan_project")
+    assert inspect_project(project, use_cache=True) == expected
+    # Simulate the file being deleted between the directory walk and the
+    # stat() by having the walk still report it:
+    files = InspectionCache.for_project(project).input_files()
+    mocker.patch.object(InspectionCache, "input_files", return_value=files)
+    extra.unlink()
+    assert inspect_project(project, use_cache=True) == expected
+    assert spy.call_count == 2
+    stamps = json.loads((project / ".git" / "pyrepo" / "inspection.json").read_text())
+    assert "src/foobar/extra.py" not in stamps["files"]
@@ -0,0 +1,90 @@
+import json
+import os
+import time
+import pytest
+import responses
+from pyrepo.pyversions import (
+    CACHE_FILENAME,
+    DATA_URL,
+    SNAPSHOT_FILE,
+    cached_pyversion_info,
+)
+
+DATA = {
+    "version_release_dates": {
+        "3.6.0": "2016-12-23",
+        "3.7.0": "2018-06-27",
+    },
+    "series_eol_dates": {
+        "3.6": None,
+        "3.7": None,
+    },
+}
+
+
+@pytest.fixture
+def cache_file(user_cache):
+    return user_cache / CACHE_FILENAME
+
+
+def write_cache(cache_file, data, age=0):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(data))
+    mtime = time.time() - age
+    os.utime(cache_file, (mtime, mtime))
+
+
+def test_fresh_cache_used(cache_file):
+    write_cache(cache_file, DATA)
+    with responses.RequestsMock():
+        # Any request would raise a ConnectionError
+        pvi = cached_pyversion_info()
+    assert pvi.supported_series() == ["3.6", "3.7"]
+
+
+def test_stale_cache_refetched(cache_file):
+    write_cache(cache_file, {**DATA, "series_eol_dates": {"3.6": True}}, age=7200)
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, DATA_URL, json=DATA)
+        pvi = cached_pyversion_info(ttl=3600)
+    assert pvi.supported_series() == ["3.6", "3.7"]
+    assert json.loads(cache_file.read_text()) == DATA
+
+
+def test_refresh_ignores_fresh_cache(cache_file):
+    write_cache(cache_file, {**DATA, "series_eol_dates": {"3.6": True}})
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, DATA_URL, json=DATA)
+        pvi = cached_pyversion_info(refresh=True)
+    assert pvi.supported_series() == ["3.6", "3.7"]
+
+
+def test_fetch_failure_uses_stale_cache(cache_file):
+    write_cache(cache_file, DATA, age=7200)
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, DATA_URL, status=500)
+        pvi = cached_pyversion_info(ttl=3600)
+    assert pvi.supported_series() == ["3.6", "3.7"]
+    assert time.time() - cache_file.stat().st_mtime < 3600
+
+
+@pytest.mark.parametrize("has_cache", [False, True])
+def test_fetch_failure_not_retried(cache_file, has_cache):
+    if has_cache:
+        write_cache(cache_file, DATA, age=7200)
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, DATA_URL, status=500)
+        pvi1 = cached_pyversion_info(ttl=3600)
+        pvi2 = cached_pyversion_info(ttl=3600)
+        assert len(rsps.calls) == 1
+    assert pvi2.series_eol_dates == pvi1.series_eol_dates
+
+
+def test_fetch_failure_uses_snapshot(cache_file):
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, DATA_URL, status=500)
+        pvi = cached_pyversion_info()
+    with SNAPSHOT_FILE.open(encoding="utf-8") as fp:
+        snapshot = json.load(fp)
+    assert pvi.series_eol_dates.keys() == snapshot["series_eol_dates"].keys()
+    assert json.loads(cache_file.read_text()) == snapshot
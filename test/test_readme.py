@@ -17,3 +17,39 @@ def test_readme(filepath):
         rme = Readme.parse(fp)
     assert rme.for_json() == json.loads(filepath.with_suffix(".json").read_text())
     assert str(rme) == filepath.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    (DATA_DIR / "readme").glob("*.rst"),
+    ids=attrgetter("name"),
+)
+def test_readme_header(filepath):
+    with filepath.open(encoding="utf-8") as fp:
+        header = Readme.parse_header(fp)
+    data = json.loads(filepath.with_suffix(".json").read_text())
+    assert header.for_json() == {
+        "badges": data["badges"],
+        "header_links": data["header_links"],
+    }
+
+
+def test_readme_header_stops_early():
+    lines = (DATA_DIR / "readme" / "readme.rst").read_text(encoding="utf-8")
+    lines = lines.splitlines(keepends=True)
+    consumed = []
+
+    def reader():
+        for ln in lines:
+            consumed.append(ln)
+            yield ln
+
+    header = Readme.parse_header(reader())
+    assert header.header_links
+    assert len(consumed) < len(lines)
+
+
+def test_readme_header_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        Readme.parse_header(iter(["Foo\n", "===\n"]))
+    assert str(excinfo.value) == "Expected image or header links, found 'Foo'"
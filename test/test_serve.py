@@ -0,0 +1,128 @@
+import errno
+from io import BytesIO
+import os
+import sys
+import threading
+import pytest
+from pyrepo import __version__
+from pyrepo.client import main as client_main
+from pyrepo.client import run
+from pyrepo.server import PyrepoServer
+from test_helpers import DATA_DIR
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="pyrepo serve requires fork()"
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = tmp_path / "pyrepo.sock"
+    srv = PyrepoServer(socket_path)
+    srv.server_bind()
+    srv.server_activate()
+    t = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05})
+    t.start()
+    try:
+        yield socket_path
+    finally:
+        srv.shutdown()
+        t.join()
+        srv.server_close()
+    assert not socket_path.exists()
+
+
+def test_serve_version(server):
+    out, err = BytesIO(), BytesIO()
+    status = run(["--version"], socket_path=server, stdout=out, stderr=err)
+    assert status == 0
+    assert out.getvalue() == f"jwodder-pyrepo {__version__}\n".encode("utf-8")
+    assert err.getvalue() == b""
+
+
+def test_serve_usage_error(server, tmp_path):
+    out, err = BytesIO(), BytesIO()
+    status = run(
+        ["-c", os.devnull, "nonexistent-command"],
+        cwd=tmp_path,
+        socket_path=server,
+        stdout=out,
+        stderr=err,
+    )
+    assert status == 2
+    assert out.getvalue() == b""
+    assert b"No such command" in err.getvalue()
+
+
+def test_serve_forwards_cwd_env_and_subprocess_output(server, tmp_path, mocker):
+    def fake_main(*_args, **_kwargs):
+        print("cwd:", os.getcwd())
+        print("var:", os.environ["PYREPO_TEST_VAR"])
+        sys.stdout.flush()
+        os.system("echo from subprocess >&2")
+        sys.exit(3)
+
+    mocker.patch("pyrepo.__main__.main.main", side_effect=fake_main)
+    out, err = BytesIO(), BytesIO()
+    status = run(
+        ["whatever"],
+        cwd=tmp_path,
+        env={**os.environ, "PYREPO_TEST_VAR": "quux"},
+        socket_path=server,
+        stdout=out,
+        stderr=err,
+    )
+    assert status == 3
+    cwd = os.path.realpath(tmp_path)
+    assert out.getvalue() == f"cwd: {cwd}\nvar: quux\n".encode("utf-8")
+    assert err.getvalue() == b"from subprocess\n"
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_serve_log_level(server, tmp_path):
+    out, err = BytesIO(), BytesIO()
+    status = run(
+        [
+            "-c",
+            os.devnull,
+            "-l",
+            "DEBUG",
+            "-C",
+            str(DATA_DIR / "inspect_project" / "has-ci"),
+            "inspect",
+        ],
+        cwd=tmp_path,
+        socket_path=server,
+        stdout=out,
+        stderr=err,
+    )
+    assert status == 0, err.getvalue()
+    assert b"[DEBUG   ]" in err.getvalue()
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        FileNotFoundError(errno.ENOENT, "No such file or directory"),
+        ConnectionRefusedError(errno.ECONNREFUSED, "Connection refused"),
+        PermissionError(errno.EACCES, "Permission denied"),
+        OSError(errno.ENOTSOCK, "Socket operation on non-socket"),
+    ],
+)
+def test_client_falls_back_if_unreachable(mocker, exc):
+    mocker.patch("pyrepo.client.connect", side_effect=exc)
+    execv = mocker.patch("os.execv", side_effect=SystemExit(0))
+    with pytest.raises(SystemExit):
+        client_main(["--version"])
+    execv.assert_called_once_with(
+        sys.executable, [sys.executable, "-m", "pyrepo", "--version"]
+    )
+
+
+def test_client_no_fallback_after_connect(mocker):
+    mocker.patch("pyrepo.client.connect", return_value=mocker.MagicMock())
+    mocker.patch("pyrepo.client.run_on_socket", side_effect=BrokenPipeError)
+    execv = mocker.patch("os.execv")
+    with pytest.raises(BrokenPipeError):
+        client_main(["--version"])
+    execv.assert_not_called()
@@ -0,0 +1,44 @@
+from pathlib import Path
+import warnings
+import pytest
+from pyrepo.setupcfg import read_setup_cfg
+
+DATA_DIR = Path(__file__).with_name("data")
+
+METADATA_KEYS = [
+    "name",
+    "description",
+    "author",
+    "author_email",
+    "url",
+    "keywords",
+    "classifiers",
+    "project_urls",
+]
+
+OPTIONS_KEYS = ["install_requires", "py_modules"]
+
+
+@pytest.mark.parametrize(
+    "dirpath",
+    sorted(p.parent for p in (DATA_DIR / "inspect_project").glob("*/setup.cfg")),
+    ids=lambda p: p.name,
+)
+def test_read_setup_cfg_matches_setuptools(dirpath):
+    setuptools_config = pytest.importorskip("setuptools.config")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = setuptools_config.read_configuration(str(dirpath / "setup.cfg"))
+    cfg = read_setup_cfg(dirpath / "setup.cfg")
+    for key in METADATA_KEYS:
+        assert cfg["metadata"].get(key) == expected["metadata"].get(key)
+    for key in OPTIONS_KEYS:
+        assert cfg["options"].get(key) == expected["options"].get(key)
+    # setuptools uses its own vendored copy of `packaging`:
+    assert str(cfg["options"]["python_requires"]) == str(
+        expected["options"]["python_requires"]
+    )
+    assert sorted(cfg["options"].get("packages", [])) == sorted(
+        expected["options"].get("packages", [])
+    )
+    assert cfg["options"].get("entry_points") == expected["options"].get("entry_points")
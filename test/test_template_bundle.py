@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+from jinja2 import PackageLoader
+import pytest
+import pyrepo
+from pyrepo import __version__, template_bundle, util
+from pyrepo.project import Project
+from pyrepo.template_bundle import (
+    BUNDLE_DIRNAME,
+    MANIFEST_FILENAME,
+    TEMPLATE_OPTIONS,
+    build_bundle,
+    load_bundle,
+)
+from test_helpers import DATA_DIR
+
+TEMPLATE_DIR = Path(pyrepo.__file__).with_name("templates")
+
+
+@pytest.fixture
+def bundle_pkgdir(tmp_path):
+    build_bundle(TEMPLATE_DIR, tmp_path / BUNDLE_DIRNAME, __version__)
+    return tmp_path
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_bundle_renders_same(bundle_pkgdir):
+    loader = load_bundle(__version__, bundle_pkgdir)
+    assert loader is not None
+    source_env = util.get_jinja_env().overlay(
+        loader=PackageLoader("pyrepo", "templates"), **TEMPLATE_OPTIONS
+    )
+    bundle_env = util.get_jinja_env().overlay(loader=loader, **TEMPLATE_OPTIONS)
+    names = source_env.list_templates()
+    assert bundle_env.list_templates() == sorted(names)
+    project = Project.from_directory(DATA_DIR / "inspect_project" / "has-docs-tests")
+    context = project.get_template_context()
+    context["version"] = __version__  # needed by init.j2
+    for name in names:
+        assert bundle_env.get_template(name).render(context) == source_env.get_template(
+            name
+        ).render(context), name
+
+
+@pytest.mark.parametrize("key", ["pyrepo", "jinja2"])
+def test_bundle_version_mismatch(bundle_pkgdir, key):
+    manifest_path = bundle_pkgdir / BUNDLE_DIRNAME / MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest[key] = "0.0.0"
+    manifest_path.write_text(json.dumps(manifest))
+    assert load_bundle(__version__, bundle_pkgdir) is None
+
+
+def test_no_bundle(tmp_path):
+    assert load_bundle(__version__, tmp_path) is None
+
+
+def test_get_jinja_env_uses_bundle(bundle_pkgdir, mocker):
+    util.get_jinja_env.cache_clear()
+    mocker.patch.object(
+        util, "load_bundle", return_value=load_bundle(__version__, bundle_pkgdir)
+    )
+    try:
+        jenv = util.get_jinja_env()
+        assert isinstance(jenv.loader, template_bundle.BundleLoader)
+        assert jenv.bytecode_cache is None
+        assert (
+            jenv.get_template("LICENSE.j2")
+            .render(copyright_years=[2020, 2021], author="J. Doe")
+            .startswith("The MIT License")
+        )
+    finally:
+        util.get_jinja_env.cache_clear()
@@ -0,0 +1,119 @@
+from jinja2 import DictLoader, Environment
+import pytest
+from pyrepo import template_cache
+from pyrepo.project import Project
+from pyrepo.template_cache import TemplateBytecodeCache, TimedEnvironment, render_blocks
+from pyrepo.util import get_jinja_env
+from test_helpers import DATA_DIR
+
+
+def make_env(templates, cache_dir):
+    return TimedEnvironment(
+        loader=DictLoader(templates),
+        bytecode_cache=TemplateBytecodeCache(cache_dir),
+    )
+
+
+def test_reuse_compiled(mocker, tmp_path):
+    templates = {"greet.j2": "Hello, {{ name }}!"}
+    env = make_env(templates, tmp_path)
+    assert env.get_template("greet.j2").render(name="World") == "Hello, World!"
+    assert len(list(tmp_path.glob("*.cache"))) == 1
+    compile_spy = mocker.spy(TimedEnvironment, "compile")
+    env = make_env(templates, tmp_path)
+    assert env.get_template("greet.j2").render(name="World") == "Hello, World!"
+    compile_spy.assert_not_called()
+
+
+def test_source_changed(mocker, tmp_path):
+    make_env({"greet.j2": "Hello, {{ name }}!"}, tmp_path).get_template("greet.j2")
+    compile_spy = mocker.spy(TimedEnvironment, "compile")
+    env = make_env({"greet.j2": "Goodbye, {{ name }}!"}, tmp_path)
+    assert env.get_template("greet.j2").render(name="World") == "Goodbye, World!"
+    compile_spy.assert_called_once()
+    # The stale entry was replaced:
+    assert len(list(tmp_path.glob("*.cache"))) == 1
+    compile_spy.reset_mock()
+    make_env({"greet.j2": "Goodbye, {{ name }}!"}, tmp_path).get_template("greet.j2")
+    compile_spy.assert_not_called()
+
+
+def test_version_changed(mocker, tmp_path):
+    templates = {"greet.j2": "Hello, {{ name }}!"}
+    make_env(templates, tmp_path).get_template("greet.j2")
+    mocker.patch.object(template_cache, "__version__", "999.0.0")
+    compile_spy = mocker.spy(TimedEnvironment, "compile")
+    make_env(templates, tmp_path).get_template("greet.j2")
+    compile_spy.assert_called_once()
+    assert len(list(tmp_path.glob("*.cache"))) == 2
+
+
+@pytest.mark.parametrize("content", [b"", b"garbage", b"j2\x00\x01garbage"])
+def test_corrupt_entry(content, tmp_path):
+    templates = {"greet.j2": "Hello, {{ name }}!"}
+    make_env(templates, tmp_path).get_template("greet.j2")
+    (entry,) = tmp_path.glob("*.cache")
+    entry.write_bytes(content)
+    env = make_env(templates, tmp_path)
+    assert env.get_template("greet.j2").render(name="World") == "Hello, World!"
+    assert entry.read_bytes() != content
+
+
+def test_unwritable_directory(tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.touch()
+    env = make_env({"greet.j2": "Hello, {{ name }}!"}, blocker / "cache")
+    assert env.get_template("greet.j2").render(name="World") == "Hello, World!"
+
+
+def test_default_directory(user_cache):
+    env = TimedEnvironment(
+        loader=DictLoader({"greet.j2": "Hello, {{ name }}!"}),
+        bytecode_cache=TemplateBytecodeCache(),
+    )
+    env.get_template("greet.j2")
+    assert len(list((user_cache / "templates").glob("*.cache"))) == 1
+    env.bytecode_cache.clear()
+    assert list((user_cache / "templates").glob("*.cache")) == []
+
+
+BLOCKS_TEMPLATE = (
+    "{% block greeting %}Hello, {{ name }}!{% endblock %}\n"
+    "{% block farewell %}Goodbye, {{ name }}!{% endblock %}\n"
+)
+
+
+def test_render_blocks(mocker):
+    templates = {"blocks.j2": BLOCKS_TEMPLATE}
+    env = Environment(loader=DictLoader(templates))
+    tmpl = env.get_template("blocks.j2")
+    new_context = mocker.spy(type(tmpl), "new_context")
+    assert render_blocks(
+        env, "blocks.j2", ["greeting", "farewell"], {"name": "World"}
+    ) == {"greeting": "Hello, World!", "farewell": "Goodbye, World!"}
+    assert new_context.call_count == 1
+    assert render_blocks(env, "blocks.j2", ["farewell"], {"name": "World"}) == {
+        "farewell": "Goodbye, World!"
+    }
+    assert new_context.call_count == 1
+    assert render_blocks(env, "blocks.j2", ["farewell"], {"name": "Moon"}) == {
+        "farewell": "Goodbye, Moon!"
+    }
+    assert new_context.call_count == 2
+    assert render_blocks(env, "blocks.j2", ["greeting"]) == {"greeting": "Hello, !"}
+    # Changing the template source invalidates the cached blocks:
+    templates["blocks.j2"] = BLOCKS_TEMPLATE.replace("Hello", "Hi")
+    assert render_blocks(env, "blocks.j2", ["greeting"], {"name": "World"}) == {
+        "greeting": "Hi, World!"
+    }
+
+
+@pytest.mark.usefixtures("default_branch")
+def test_get_template_block():
+    project = Project.from_directory(DATA_DIR / "inspect_project" / "has-ci")
+    jenv = get_jinja_env()
+    block = project.get_template_block("tox.ini.j2", "testenv_typing", jenv)
+    assert block.startswith("[testenv:typing]\n")
+    assert project.get_template_blocks("tox.ini.j2", ["testenv_typing"], jenv) == {
+        "testenv_typing": block
+    }
@@ -0,0 +1,40 @@
+import attr
+import pytest
+from pyrepo.project import Project
+from pyrepo.template_deps import get_template_dependencies, templates_affected_by
+
+
+def test_template_dependencies():
+    deps = get_template_dependencies()
+    assert deps[".github/workflows/test.yml"] == {
+        "extra_testenvs",
+        "has_doctests",
+        "python_versions",
+        "supports_pypy3",
+    }
+    assert deps[".gitignore"] == set()
+    assert "python_requires" in deps["setup.cfg"]
+    assert "init" in deps
+    # Every variable read by a template is a `Project` attribute:
+    fields = set(attr.fields_dict(Project)) - {"directory"}
+    for path, variables in deps.items():
+        if path != "init":
+            assert variables <= fields, path
+
+
+@pytest.mark.parametrize(
+    "variables,affected",
+    [
+        (["extra_testenvs"], [".github/workflows/test.yml"]),
+        ([], []),
+        (["nonexistent"], []),
+        (["python_versions"], ["setup.cfg", ".github/workflows/test.yml"]),
+    ],
+)
+def test_templates_affected_by(variables, affected):
+    paths = [".gitignore", "setup.cfg", ".github/workflows/test.yml"]
+    assert templates_affected_by(variables, paths) == affected
+
+
+def test_templates_affected_by_unknown_path():
+    assert templates_affected_by(["name"], ["no-such-file"]) == ["no-such-file"]
@@ -1,8 +1,12 @@
+import os
+from pathlib import Path
+import stat
 from typing import List
 from packaging.specifiers import SpecifierSet
 import pytest
-from pyrepo.commands.release import next_version
-from pyrepo.util import sort_specifier, update_years2str
+from pyrepo.commands.release import advance_dev_status, next_version
+from pyrepo.inifile import IniDocument
+from pyrepo.util import atomic_write, sort_specifier, update_years2str
 
 
 @pytest.mark.parametrize(
@@ -45,3 +49,60 @@ def test_sort_specifier() -> None:
 )
 def test_next_version(old: str, new: str) -> None:
     assert next_version(old) == new
+
+
+def test_atomic_write(tmp_path: Path) -> None:
+    path = tmp_path / "sub" / "file.bin"
+    atomic_write(path, b"\x00\x01")
+    assert path.read_bytes() == b"\x00\x01"
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+    atomic_write(path, b"new", mode=0o600)
+    assert path.read_bytes() == b"new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert os.listdir(path.parent) == ["file.bin"]
+
+
+def test_atomic_write_error(tmp_path: Path) -> None:
+    path = tmp_path / "dir"
+    path.mkdir()
+    with pytest.raises(OSError):
+        atomic_write(path, b"data")
+    assert os.listdir(tmp_path) == ["dir"]
+
+
+@pytest.mark.parametrize(
+    "before,after",
+    [
+        (
+            "classifiers =\n"
+            "    Development Status :: 3 - Alpha\n"
+            "    #Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+            "classifiers =\n"
+            "    Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+        ),
+        (
+            "classifiers = Development Status :: 3 - Alpha\n"
+            "    #Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+            "classifiers =\n"
+            "    Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+        ),
+        (
+            "classifiers = Development Status :: 5 - Production/Stable\n"
+            "    #Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+            "classifiers = Development Status :: 5 - Production/Stable\n"
+            "    #Development Status :: 4 - Beta\n"
+            "    Programming Language :: Python :: 3\n",
+        ),
+    ],
+)
+def test_advance_dev_status(before: str, after: str) -> None:
+    doc = IniDocument.parse("[metadata]\n" + before)
+    advance_dev_status(doc["metadata"]["classifiers"])
+    assert str(doc) == "[metadata]\n" + after